@@ -1,7 +1,9 @@
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QTabWidget, QLineEdit, QCheckBox, QLabel,
-                            QSpinBox, QGroupBox, QMessageBox, QComboBox)
+                            QSpinBox, QDoubleSpinBox, QGroupBox, QMessageBox, QComboBox)
 from PyQt6.QtGui import QFont
+from PyQt6.QtCore import QTimer
+import os
 import sys
 
 # Direct imports for task tabs
@@ -13,10 +15,20 @@ from gui.tabs.tabs_doorreward import DoorRewardTab
 
 from utils.utils import is_valid_name
 from utils.logger import get_logger
+from utils.hardware_probe import get_hardware_probe
+from utils.journal import journal_path, load_journal, next_session
+from utils.catalog import last_session
 
 logger = get_logger()
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class ExperimentMenu(QMainWindow):
+    # Libellé menu -> backend du port de triggers (voir utils/hardware_manager.py)
+    TRIGGER_BACKENDS = {"LPT": 'lpt', "Série": 'serial', "Émulé": 'emulated'}
+    TR_SOURCES = {"TR clavier": 'keyboard', "TR broche LPT": 'port'}
+    FSYNC_POLICIES = {"fsync/essai": 'trial', "fsync/bloc": 'block', "fsync/5 s": 5.0}
+
     def __init__(self, last_config=None):
         super().__init__()
         self.setWindowTitle("Configuration Expérimentale")
@@ -38,30 +50,64 @@ class ExperimentMenu(QMainWindow):
             'nom': '', 'session': '01', 'enregistrer': True, 
             'fullscr': True, 'screenid': 1, 'monitor' : 'temp_monitor', 
             'colorspace' : 'rgb', 'parport_actif': False, 
-            'eyetracker_actif':False, 'mode': 'fmri'
+            'eyetracker_actif':False, 'mode': 'fmri',
+            'parport_backend': 'lpt', 'serial_port': 'COM3',
+            'tr_s': None, 'tr_source': 'keyboard', 'tr_locked': False, 'realtime': False,
+            'profile': False, 'fsync_policy': 'trial'
         }
 
         if last_config:
             self.default_config.update(last_config)
+            # Session suivante, sauf si le run précédent (crash) est reprenable
             try:
                 current_sess = int(self.default_config['session'])
-                self.default_config['session'] = f"{current_sess + 1:02d}"
+                sess = next_session(ROOT_DIR, self.default_config['nom'], current_sess,
+                                    task_key=last_config.get('tache'))
+                self.default_config['session'] = f"{sess:02d}"
             except ValueError: pass
 
         self.initUI()
 
     def check_hardware_availability(self):
-        # Logique de détection (Identique à l'original)
-        try:
-            from hardware.parport import ParPort
-            test_port = ParPort(address=0x378)
-            self.hardware_present = not test_port.dummy_mode
-        except: self.hardware_present = False
+        """
+        Détection non bloquante : utilise le cache du service de détection
+        et relance une détection en arrière-plan si nécessaire.
+        """
+        self.hw_probe = get_hardware_probe()
+        cached = self.hw_probe.result()
+        if cached:
+            self.hardware_present = cached['parport']
+            self.eyelink_present = cached['eyelink']
+        self.hw_probe.start()
 
-        try:
-            import pylink
-            self.eyelink_present = True
-        except: self.eyelink_present = False
+    def _poll_hardware_probe(self):
+        """Met à jour les cases Hardware quand la détection est terminée (thread GUI)."""
+        if self.hw_probe.is_fresh():
+            self._hw_timer.stop()
+            result = self.hw_probe.result()
+            self.hardware_present = result['parport']
+            self.eyelink_present = result['eyelink']
+            self._apply_hardware_state()
+
+    def _apply_hardware_state(self):
+        # Série / émulé : disponibles sans carte LPT (repli Dummy si l'ouverture échoue)
+        backend = self.current_backend()
+        parport_present = self.hardware_present or backend != 'lpt'
+        self.txt_serial.setVisible(backend == 'serial')
+        for chk, present, key in [(self.chk_parport, parport_present, 'parport_actif'),
+                                  (self.chk_eyetracker, self.eyelink_present, 'eyetracker_actif')]:
+            chk.setChecked(present and self.default_config.get(key, False))
+            chk.setEnabled(present)
+            chk.setStyleSheet(self.ACTIVE_STYLE if present else self.INACTIVE_STYLE)
+
+    def current_backend(self):
+        return self.TRIGGER_BACKENDS[self.combo_backend.currentText()]
+
+    def current_tr_source(self):
+        return self.TR_SOURCES[self.combo_tr_source.currentText()]
+
+    def current_fsync_policy(self):
+        return self.FSYNC_POLICIES[self.combo_fsync.currentText()]
 
     def initUI(self):
         main_widget = QWidget()
@@ -74,6 +120,12 @@ class ExperimentMenu(QMainWindow):
         self.create_general_section(main_layout)
         self.create_task_tabs(main_layout)
 
+        # Les cases Hardware sont mises à jour à la fin de la détection
+        self._hw_timer = QTimer(self)
+        self._hw_timer.timeout.connect(self._poll_hardware_probe)
+        self._hw_timer.start(100)
+        self._poll_hardware_probe()
+
     def create_general_section(self, parent_layout):
         group = QGroupBox("Configuration Générale")
         layout = QHBoxLayout()
@@ -85,6 +137,7 @@ class ExperimentMenu(QMainWindow):
         self.txt_name = QLineEdit()
         self.txt_name.setFixedWidth(180)
         self.txt_name.setText(self.default_config.get('nom', ''))
+        self.txt_name.editingFinished.connect(self.suggest_session)
         layout.addWidget(self.txt_name)
         
         layout.addWidget(QLabel("Session:"))
@@ -109,30 +162,88 @@ class ExperimentMenu(QMainWindow):
         self.combo_mode.setCurrentText(self.default_config.get('mode', 'fmri'))
         layout.addWidget(self.combo_mode)
 
+        # TR nominal du scanner (0 = estimé depuis les impulsions)
+        layout.addWidget(QLabel("TR (s):"))
+        self.spin_tr = QDoubleSpinBox()
+        self.spin_tr.setRange(0.0, 10.0)
+        self.spin_tr.setDecimals(3)
+        self.spin_tr.setSingleStep(0.1)
+        self.spin_tr.setSpecialValueText("auto")
+        self.spin_tr.setFixedWidth(90)
+        self.spin_tr.setValue(self.default_config.get('tr_s') or 0.0)
+        layout.addWidget(self.spin_tr)
+
+        # Source des impulsions TR : touche 't' ou broche 10 (ACK) du port parallèle
+        self.combo_tr_source = QComboBox()
+        self.combo_tr_source.addItems(list(self.TR_SOURCES.keys()))
+        saved_source = self.default_config.get('tr_source', 'keyboard')
+        for label, source in self.TR_SOURCES.items():
+            if source == saved_source:
+                self.combo_tr_source.setCurrentText(label)
+        layout.addWidget(self.combo_tr_source)
+
+        # Onsets recalés sur les impulsions TR (nécessite un TR nominal)
+        self.chk_tr_lock = QCheckBox("TR-lock")
+        self.chk_tr_lock.setChecked(self.default_config.get('tr_locked', False))
+        layout.addWidget(self.chk_tr_lock)
+
+        # Priorité maximale + cœur CPU dédié au rendu pendant le run
+        self.chk_realtime = QCheckBox("Temps réel")
+        self.chk_realtime.setChecked(self.default_config.get('realtime', False))
+        layout.addWidget(self.chk_realtime)
+
+        # Chronométrage du chemin critique (rapport <stem>_profile.csv)
+        self.chk_profile = QCheckBox("Profiler")
+        self.chk_profile.setChecked(self.default_config.get('profile', False))
+        layout.addWidget(self.chk_profile)
+
         self.chk_save = QCheckBox("Enregistrer")
         self.chk_save.setChecked(self.default_config.get('enregistrer', True))
         layout.addWidget(self.chk_save)
 
+        # Passage sur disque des enregistrements écrits en continu
+        self.combo_fsync = QComboBox()
+        self.combo_fsync.addItems(list(self.FSYNC_POLICIES.keys()))
+        saved_fsync = self.default_config.get('fsync_policy', 'trial')
+        for label, policy in self.FSYNC_POLICIES.items():
+            if policy == saved_fsync:
+                self.combo_fsync.setCurrentText(label)
+        layout.addWidget(self.combo_fsync)
+
         # -- HARDWARE (Augmentés par la police globale) --
         # Styles sans gras (Font-weight normal)
-        ACTIVE_STYLE = "color: #2e7d32; font-size: 16px;" 
-        INACTIVE_STYLE = "color: #757575; font-size: 16px;" 
+        self.ACTIVE_STYLE = "color: #2e7d32; font-size: 16px;" 
+        self.INACTIVE_STYLE = "color: #757575; font-size: 16px;" 
 
         self.chk_parport = QCheckBox("Port Parallèle")
         self.chk_eyetracker = QCheckBox("Eye Tracker")
 
-        for chk, present, key in [(self.chk_parport, self.hardware_present, 'parport_actif'), 
-                                  (self.chk_eyetracker, self.eyelink_present, 'eyetracker_actif')]:
-            
+        # Backend du port de triggers (physique ou émulé)
+        self.combo_backend = QComboBox()
+        self.combo_backend.addItems(list(self.TRIGGER_BACKENDS.keys()))
+        saved_backend = self.default_config.get('parport_backend', 'lpt')
+        for label, backend in self.TRIGGER_BACKENDS.items():
+            if backend == saved_backend:
+                self.combo_backend.setCurrentText(label)
+        self.combo_backend.currentTextChanged.connect(lambda _: self._apply_hardware_state())
+
+        # Nom du port du boîtier TTL série (ex: COM3, /dev/ttyUSB0)
+        self.txt_serial = QLineEdit()
+        self.txt_serial.setFixedWidth(130)
+        self.txt_serial.setText(self.default_config.get('serial_port', 'COM3'))
+
+        for chk in [self.chk_parport, self.chk_eyetracker]:
             lbl_sep = QLabel("|")
             # On ajuste aussi la taille du séparateur pour qu'il suive
             lbl_sep.setStyleSheet("color: #bdbdbd; font-size: 14px;") 
             layout.addWidget(lbl_sep)
-            
-            chk.setChecked(present and self.default_config.get(key, False))
-            chk.setEnabled(present)
-            chk.setStyleSheet(ACTIVE_STYLE if present else INACTIVE_STYLE)
             layout.addWidget(chk)
+            if chk is self.chk_parport:
+                layout.addWidget(self.combo_backend)
+                layout.addWidget(self.txt_serial)
+
+        # État initial : cache de la détection (désactivé tant qu'inconnu)
+        self._apply_hardware_state()
 
         layout.addStretch()
         group.setLayout(layout)
@@ -147,6 +258,28 @@ class ExperimentMenu(QMainWindow):
         self.tabs.addTab(DoorRewardTab(self), "Door Reward")
         parent_layout.addWidget(self.tabs)
 
+    def suggest_session(self):
+        """
+        Participant déjà vu : session suivante d'après le catalogue des runs, sauf
+        si la session affichée a un run interrompu encore reprenable (le CSV
+        partiel d'un crash est aussi catalogué et ne doit pas faire passer à la
+        session suivante). Le journal d'une autre session ne déplace pas la
+        session choisie par l'opérateur.
+        """
+        nom = self.txt_name.text().strip()
+        if not is_valid_name(nom):
+            return
+        try:
+            last = last_session(ROOT_DIR, nom)
+        except Exception as e:
+            logger.warn(f"Catalogue des runs illisible ({e})")
+            last = None
+        sess = next_session(ROOT_DIR, nom, last, current=self.spin_session.value())
+        if sess is None:
+            return  # Participant inconnu : rien à proposer
+        self.spin_session.setValue(min(sess, self.spin_session.maximum()))
+        logger.log(f"{nom} : session {sess:02d} proposée (dernière enregistrée : {last})")
+
     def validate_config(self):
         nom = self.txt_name.text().strip()
         if not is_valid_name(nom):
@@ -160,7 +293,15 @@ class ExperimentMenu(QMainWindow):
             'enregistrer': self.chk_save.isChecked(),
             'screenid': self.screenid.value() - 1,
             'mode': self.combo_mode.currentText(),
+            'tr_s': self.spin_tr.value() or None,
+            'tr_source': self.current_tr_source(),
+            'tr_locked': self.chk_tr_lock.isChecked(),
+            'realtime': self.chk_realtime.isChecked(),
+            'profile': self.chk_profile.isChecked(),
+            'fsync_policy': self.current_fsync_policy(),
             'parport_actif': self.chk_parport.isChecked(),
+            'parport_backend': self.current_backend(),
+            'serial_port': self.txt_serial.text().strip(),
             'eyetracker_actif': self.chk_eyetracker.isChecked()
         })
         return config
@@ -169,9 +310,29 @@ class ExperimentMenu(QMainWindow):
         general_config = self.validate_config()
         if not general_config: return
         self.final_config = {**general_config, **task_params}
+        # run_type de l'onglet lui-même (pas celui hérité de last_config)
+        self.final_config['resume'] = self.offer_resume(self.final_config, task_params.get('run_type'))
         self.close()
         QApplication.instance().quit()
 
+    def offer_resume(self, config, run_type=None):
+        """Run interrompu (journal de reprise) pour ce participant / tâche / type de run / session : proposer la reprise."""
+        if not config.get('enregistrer'):
+            return False
+        state = load_journal(journal_path(ROOT_DIR, config['nom'], config['tache'], config['session'],
+                                          run_type=run_type))
+        if state is None or not state.resumable:
+            return False
+        answer = QMessageBox.question(
+            self, "Run interrompu",
+            f"Un run interrompu existe pour {config['nom']} (session {config['session']}).\n"
+            f"Reprendre à l'étape {state.last_completed + 1} / {state.n_steps} ?\n\n"
+            "Non : nouveau run depuis le début.")
+        resume = answer == QMessageBox.StandardButton.Yes
+        logger.log(f"Journal trouvé ({state.last_completed}/{state.n_steps}) : "
+                   f"{'reprise' if resume else 'nouveau run'}")
+        return resume
+
     def get_config(self):
         return self.final_config
 
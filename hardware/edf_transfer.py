@@ -0,0 +1,103 @@
+"""
+edf_transfer.py
+---------------
+Transfert EDF (Host PC -> PC local) en arrière-plan.
+
+Le fichier est reçu dans '<nom>.EDF.part' puis renommé une fois complet,
+de sorte qu'un fichier .EDF présent localement est toujours entier.
+pylink ne sait pas reprendre un transfert interrompu au milieu : une
+tentative échouée est relancée depuis le début (l'EDF reste intact sur
+le Host PC), avec un délai croissant entre les tentatives.
+"""
+
+import os
+import threading
+import time
+
+
+class EdfTransfer(threading.Thread):
+    def __init__(self, el, remote_name, local_path, retries=3, backoff_s=2.0, close_link=True):
+        # Thread non-daemon : le process attend la fin du transfert avant de quitter
+        super().__init__(name=f"EdfTransfer-{remote_name}", daemon=False)
+        self.el = el
+        self.remote_name = remote_name
+        self.local_path = local_path
+        self.part_path = local_path + '.part'
+        self.retries = int(retries)
+        self.backoff_s = float(backoff_s)
+        self.close_link = close_link
+
+        self.attempt = 0
+        self.size = None
+        self.error = None
+        self.success = False
+        self.t_start = None
+        self.t_end = None
+
+    # --- Suivi ---
+
+    def bytes_received(self):
+        """Taille actuelle du fichier en cours de réception (octets)."""
+        for path in (self.part_path, self.local_path):
+            try:
+                return os.path.getsize(path)
+            except OSError:
+                continue
+        return 0
+
+    def progress_str(self):
+        kb = self.bytes_received() / 1024
+        elapsed = (self.t_end or time.perf_counter()) - (self.t_start or time.perf_counter())
+        state = "OK" if self.success else ("ECHEC" if self.error and not self.is_alive() else "en cours")
+        return (f"EDF {self.remote_name}: {kb:.0f} ko | tentative {self.attempt}/{self.retries} "
+                f"| {elapsed:.1f} s | {state}")
+
+    def wait(self, timeout=None, report_every=2.0, report=print):
+        """Attend la fin du transfert en affichant la progression. Retourne success."""
+        end = None if timeout is None else time.perf_counter() + timeout
+        while self.is_alive():
+            remaining = None if end is None else end - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            self.join(report_every if remaining is None else min(report_every, remaining))
+            if self.is_alive():
+                report(self.progress_str())
+        return self.success
+
+    # --- Thread ---
+
+    def run(self):
+        self.t_start = time.perf_counter()
+        folder = os.path.dirname(self.local_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        for self.attempt in range(1, self.retries + 1):
+            try:
+                if os.path.exists(self.part_path):
+                    os.remove(self.part_path)
+                size = self.el.receiveDataFile(self.remote_name, self.part_path)
+                if size is not None and size < 0:
+                    raise RuntimeError(f"receiveDataFile a retourné {size}")
+                os.replace(self.part_path, self.local_path)
+                self.size = size
+                self.success = True
+                self.error = None
+                break
+            except Exception as e:
+                self.error = e
+                print(f"EyeLink: Échec transfert (tentative {self.attempt}/{self.retries}) : {e}")
+                if self.attempt < self.retries:
+                    time.sleep(self.backoff_s * self.attempt)
+
+        self.t_end = time.perf_counter()
+        if self.success:
+            print(f"EyeLink: Transfert terminé avec succès ({self.local_path}).")
+        else:
+            print(f"EyeLink: Transfert abandonné, {self.remote_name} reste sur le Host PC.")
+
+        if self.close_link:
+            try:
+                self.el.close()
+            except Exception:
+                pass
@@ -0,0 +1,217 @@
+"""
+emulated_port.py
+----------------
+Port de triggers émulé (sans matériel), adossé à un fichier mappé en mémoire.
+
+Chaque écriture de pins est ajoutée dans un tampon circulaire mmap avec :
+    - perf_ns    : time.perf_counter_ns() au moment de l'écriture
+    - core_t     : horloge PsychoPy (même base que win.flip())
+    - last_flip  : instant du flip auquel l'impulsion est verrouillée, relevé
+                   par mark_flip() (NaN pour un trigger hors flip)
+    - requested  : durée d'impulsion demandée (s), NaN pour une remise à 0
+    - code       : valeur écrite sur les pins
+
+Flip : flip_and_stamp enregistre mark_flip() en callOnFlip juste avant
+send_trigger. C'est le premier callback exécuté après le swap : win.lastFrameT
+n'est pas encore mis à jour à ce moment (et ne l'est que si
+recordFrameIntervals est actif).
+
+Le lecteur (ce module exécuté en script) reconstruit les trains
+d'impulsions et mesure débit, précision de largeur et latence flip->trigger :
+
+    python -m hardware.emulated_port data/emulated_lpt.bin
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from hardware.pulse import PulseScheduler
+from hardware.trigger_timeline import TriggerTimeline
+
+try:
+    from psychopy import logging as _ps_logging
+    _core_time = _ps_logging.defaultClock.getTime
+except ImportError:
+    _core_time = time.perf_counter
+
+MAGIC = b'EMULPT01'
+HEADER = struct.Struct('<8sQQ')          # magic, capacity, n_written
+HEADER_SIZE = 32
+RECORD = struct.Struct('<qdddi4x')       # perf_ns, core_t, last_flip, requested, code
+RECORD_DTYPE = np.dtype([('perf_ns', '<i8'), ('core_t', '<f8'), ('last_flip', '<f8'),
+                         ('requested', '<f8'), ('code', '<i4'), ('pad', '<i4')])
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'emulated_lpt.bin')
+
+
+class EmulatedParPort:
+    def __init__(self, path=DEFAULT_PATH, capacity=65536, policy='preempt'):
+        """Même interface que ParPort ; les pins sont écrites dans `path`."""
+        self.path = path
+        self.capacity = int(capacity)
+        self.dummy_mode = False
+        self._flip_t = None        # Dernier flip marqué, pas encore consommé
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        self._file = open(path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._n = 0
+        HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, 0)
+
+        self.timeline = TriggerTimeline()
+        self.scheduler = PulseScheduler(self._write_pins, policy=policy,
+                                        recorder=self.timeline.record)
+
+    # --- Interface ParPort ---
+
+    def attach_clock(self, clock):
+        """Nouvelle tâche : timeline et tampon repartent de zéro."""
+        self.timeline.clear()
+        self.timeline.attach_clock(clock)
+        self.scheduler.clear_history()
+        self._n = 0
+        HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, 0)
+
+    def mark_flip(self):
+        """callOnFlip placé avant send_trigger : instant du flip (horloge PsychoPy)."""
+        self._flip_t = _core_time()
+
+    def send_trigger(self, code, duration=0.03):
+        # Flip marqué consommé par cette impulsion seulement ; sinon trigger hors flip
+        # Instant du flip transmis avec l'impulsion (file / fusion du PulseScheduler)
+        flip_t, self._flip_t = self._flip_t, None
+        self.scheduler.pulse(code, duration, meta=flip_t)
+
+    @property
+    def last_pulse_width(self):
+        return self.scheduler.last_pulse_width
+
+    def reset(self):
+        self.scheduler.cancel()
+
+    def is_healthy(self):
+        return self.scheduler.is_alive() and not self._mm.closed
+
+    def close(self):
+        self.scheduler.close()
+        if not self._mm.closed:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+
+    # --- Écriture (appelée sous le verrou du PulseScheduler) ---
+
+    def _write_pins(self, code):
+        # Durée demandée et flip de CETTE écriture (pas de la dernière impulsion déposée)
+        requested, flip_t = self.scheduler.write_info if code else (None, None)
+        requested = math.nan if requested is None else requested
+        last_flip = math.nan if flip_t is None else flip_t
+        offset = HEADER_SIZE + (self._n % self.capacity) * RECORD.size
+        RECORD.pack_into(self._mm, offset, time.perf_counter_ns(), _core_time(),
+                         last_flip, requested, int(code))
+        self._n += 1
+        # n_written en dernier : un lecteur concurrent ne voit que des records complets
+        struct.pack_into('<Q', self._mm, 16, self._n)
+
+
+# =============================================================================
+# LECTEUR
+# =============================================================================
+
+def read_records(path):
+    """Retourne les écritures (tableau structuré numpy) dans l'ordre chronologique."""
+    with open(path, 'rb') as f:
+        buf = f.read()
+    magic, capacity, n_written = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} n'est pas un fichier de port émulé")
+    data = np.frombuffer(buf, dtype=RECORD_DTYPE, offset=HEADER_SIZE, count=capacity)
+    if n_written <= capacity:
+        return data[:n_written].copy()
+    start = n_written % capacity
+    return np.concatenate([data[start:], data[:start]])
+
+
+def reconstruct_pulses(records):
+    """
+    Reconstruit les impulsions : liste de dict (code, onset_s, width_s, requested_s, flip_latency_s).
+    Une impulsion commence à une écriture non nulle et finit à l'écriture suivante.
+    """
+    pulses = []
+    for i in range(len(records) - 1):
+        rec = records[i]
+        if rec['code'] == 0:
+            continue
+        nxt = records[i + 1]
+        pulses.append({
+            'code': int(rec['code']),
+            'onset_s': rec['perf_ns'] / 1e9,
+            'width_s': (int(nxt['perf_ns']) - int(rec['perf_ns'])) / 1e9,
+            'requested_s': float(rec['requested']),
+            'truncated': int(nxt['code']) != 0,
+            'flip_latency_s': float(rec['core_t'] - rec['last_flip']),
+        })
+    return pulses
+
+
+def summarize(path):
+    """
+    Statistiques de benchmark. Latence flip->trigger : impulsions envoyées sur
+    un flip (last_flip renseigné), toutes comptées ; les autres sont
+    dénombrées à part (n_off_flip).
+    """
+    pulses = reconstruct_pulses(read_records(path))
+    if not pulses:
+        return {'n_pulses': 0}
+
+    onsets = np.array([p['onset_s'] for p in pulses])
+    full = [p for p in pulses if not p['truncated']]
+    err_ms = np.array([(p['width_s'] - p['requested_s']) * 1000 for p in full]) if full else np.array([np.nan])
+    lat = np.array([p['flip_latency_s'] for p in pulses])
+    lat = lat[np.isfinite(lat)] * 1000
+
+    span = onsets[-1] - onsets[0]
+    return {
+        'n_pulses': len(pulses),
+        'n_truncated': len(pulses) - len(full),
+        'throughput_hz': float((len(pulses) - 1) / span) if span > 0 else float('nan'),
+        'min_interval_ms': float(np.min(np.diff(onsets)) * 1000) if len(onsets) > 1 else float('nan'),
+        'width_err_ms_mean': float(np.nanmean(err_ms)),
+        'width_err_ms_max': float(np.nanmax(np.abs(err_ms))),
+        'n_flip_locked': int(lat.size),
+        'n_off_flip': len(pulses) - int(lat.size),
+        'flip_latency_ms_mean': float(lat.mean()) if lat.size else float('nan'),
+        'flip_latency_ms_p99': float(np.percentile(lat, 99)) if lat.size else float('nan'),
+        'flip_latency_ms_max': float(lat.max()) if lat.size else float('nan'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Lecture / benchmark du port de triggers émulé")
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    parser.add_argument('--csv', help="Exporte les impulsions reconstruites en CSV")
+    args = parser.parse_args()
+
+    for key, val in summarize(args.path).items():
+        print(f"{key:>22} : {val:.3f}" if isinstance(val, float) else f"{key:>22} : {val}")
+
+    if args.csv:
+        import csv
+        pulses = reconstruct_pulses(read_records(args.path))
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(pulses[0].keys()) if pulses else ['code'])
+            writer.writeheader()
+            writer.writerows(pulses)
+        print(f"Impulsions exportées : {args.csv}")
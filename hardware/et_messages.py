@@ -0,0 +1,93 @@
+"""
+et_messages.py
+--------------
+File d'envoi asynchrone des messages EyeLink.
+
+Le thread de rendu ne fait que déposer (horodatage, message) dans une
+queue.SimpleQueue (implémentée en C, sans verrou côté Python). Un thread
+dédié envoie ensuite chaque message sous la forme « offset » d'EyeLink :
+
+    "<offset_ms> <message>"
+
+où offset_ms est le temps écoulé entre la capture et l'envoi. L'hôte
+EyeLink soustrait cet offset au timestamp de réception (convention SR
+Research, reconnue par DataViewer / edf2asc), ce qui conserve l'instant
+de capture dans l'EDF malgré l'aller-retour réseau.
+"""
+
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class MessageSender:
+    def __init__(self, send, name="EyeLinkMessages"):
+        """
+        Args:
+            send (callable): Envoi bas niveau (ex: pylink.EyeLink.sendMessage)
+        """
+        self._send = send
+        self._queue = queue.SimpleQueue()
+
+        # Statistiques (lues en fin de run)
+        self.n_sent = 0
+        self.n_errors = 0
+        self.max_offset_ms = 0
+        self.total_send_s = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def post(self, msg):
+        """Dépose un message horodaté. Non bloquant."""
+        self._queue.put((time.perf_counter(), msg))
+
+    def flush(self, timeout=2.0):
+        """
+        Attend que tous les messages déposés avant l'appel aient été envoyés.
+        Le marqueur porte son propre Event, posé par le thread d'envoi une fois
+        arrivé à lui (file FIFO : tout ce qui le précède est parti).
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=2.0):
+        self.flush(timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        mean_ms = (self.total_send_s / self.n_sent * 1000) if self.n_sent else 0.0
+        return {
+            'n_sent': self.n_sent,
+            'n_errors': self.n_errors,
+            'max_offset_ms': self.max_offset_ms,
+            'mean_send_ms': mean_ms,
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, threading.Event):
+                # Marqueur de flush : tout ce qui précède est parti
+                item.set()
+                continue
+
+            t_capture, msg = item
+            t0 = time.perf_counter()
+            offset_ms = int(round((t0 - t_capture) * 1000))
+            try:
+                self._send(f"{offset_ms} {msg}" if offset_ms > 0 else msg)
+                self.n_sent += 1
+            except Exception as e:
+                self.n_errors += 1
+                print(f"EyeLink: Erreur envoi message '{msg}' : {e}")
+            self.total_send_s += time.perf_counter() - t0
+            self.max_offset_ms = max(self.max_offset_ms, offset_ms)
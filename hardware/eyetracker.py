@@ -1,47 +1,111 @@
 import pylink
 import os
+import threading
 import time
+from hardware.et_messages import MessageSender
+from hardware.edf_transfer import EdfTransfer
+from hardware.gaze_stream import GazeStream
+
+class LockedLink:
+    """
+    Lien pylink partagé entre threads (messages, flux de regard, transfert EDF,
+    thread principal) : pylink n'est pas thread-safe, chaque appel de méthode
+    passe par un même verrou (réentrant, exposé en .lock pour grouper des appels).
+    """
+
+    def __init__(self, el):
+        self._el = el
+        self.lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._el, name)
+        if not callable(attr):
+            return attr
+        lock = self.lock
+
+        def locked(*args, **kwargs):
+            with lock:
+                return attr(*args, **kwargs)
+        return locked
+
 
 class EyeTracker:
     def __init__(self, sample_rate=1000, dummy_mode=False):
         self.dummy_mode = dummy_mode
+        self.fallback = False  # Dummy subi (échec de connexion), à distinguer du dummy demandé
         self.el = None
         self.filename = "TEST.EDF"
         self.active = False
         self.sample_rate = sample_rate
+        self.messages = None  # MessageSender (thread d'envoi), créé à l'ouverture du fichier
+        self.transfer = None  # Dernier EdfTransfer lancé
+        self.gaze = None      # GazeStream (échantillons du lien), actif pendant l'enregistrement
+        # Persistant : le lien reste ouvert après le transfert (HardwarePool)
+        self.persistent = False
         
     def initialize(self, file_name="TEST.EDF"):
         """
-        Initialise la connexion avec le Eyelink et ouvre le fichier.
+        Initialise la connexion avec le Eyelink (si besoin) et ouvre le fichier.
         file_name : Doit faire 8 caractères max (sans l'extension).
         """
-        # Gestion de la longueur du nom de fichier (Max 8 char pour DOS/Eyelink)
-        base_name = os.path.splitext(file_name)[0]
-        if len(base_name) > 8:
-            print(f"ATTENTION: Nom de fichier Eyelink trop long ({base_name}). Tronqué à 8 char.")
-            base_name = base_name[:8]
-        self.filename = base_name + ".EDF"
+        if not self.is_connected():
+            self.connect()
+        self.open_file(file_name)
 
-        if self.dummy_mode:
+    def connect(self):
+        """Ouvre le lien avec le Host PC."""
+        if self.dummy_mode and not self.fallback:
             print("EyeLink: Mode Dummy activé.")
-            self.el = pylink.EyeLink(None)
+            self.el = LockedLink(pylink.EyeLink(None))
             self.active = True
             return
 
         try:
             # Connexion IP par défaut du Eyelink
-            self.el = pylink.EyeLink("100.1.1.1")
+            self.el = LockedLink(pylink.EyeLink("100.1.1.1"))
             self.active = True
+            self.dummy_mode = False
+            self.fallback = False
             print(f"EyeLink: Connecté (Version {self.el.getTrackerVersion()})")
         except RuntimeError:
             print("EyeLink: Erreur de connexion. Passage en mode Dummy.")
-            self.el = pylink.EyeLink(None)
+            self.el = LockedLink(pylink.EyeLink(None))
             self.dummy_mode = True
+            self.fallback = True
             self.active = False
 
         # Configuration de base
         self.el.sendCommand(f"sample_rate = {self.sample_rate}")
-        
+
+    def is_connected(self):
+        """Vérifie que le lien est ouvert (health-check entre deux runs)."""
+        if self.el is None or self.fallback:
+            return False  # Repli dummy après échec : à reconnecter
+        if self.dummy_mode:
+            return True
+        try:
+            return bool(self.el.isConnected())
+        except Exception:
+            return False
+
+    def open_file(self, file_name="TEST.EDF"):
+        """Ouvre un nouveau fichier EDF sur le lien existant."""
+        # Gestion de la longueur du nom de fichier (Max 8 char pour DOS/Eyelink)
+        base_name = os.path.splitext(file_name)[0]
+        if len(base_name) > 8:
+            print(f"ATTENTION: Nom de fichier Eyelink trop long ({base_name}). Tronqué à 8 char.")
+            base_name = base_name[:8]
+        self.filename = base_name + ".EDF"
+
+        # Mode Dummy demandé explicitement : pas de fichier
+        if self.dummy_mode and self.active:
+            return
+
+        # Le lien ne supporte qu'une opération fichier à la fois
+        if self.transfer is not None and self.transfer.is_alive():
+            print("EyeLink: Attente de la fin du transfert précédent...")
+            self.transfer.wait()
+
         # Ouverture du fichier sur le Eyelink (Disque dur du Host PC)
         self.el.openDataFile(self.filename)
         
@@ -52,6 +116,9 @@ class EyeTracker:
         self.el.sendCommand("link_event_filter = LEFT,RIGHT,FIXATION,SACCADE,BLINK,MESSAGE,BUTTON,INPUT")
         self.el.sendCommand("link_sample_data  = LEFT,RIGHT,GAZE,GAZERES,AREA,STATUS,INPUT")
 
+        # Envoi des messages hors du thread de rendu (offset appliqué par l'hôte)
+        self.messages = MessageSender(self.el.sendMessage)
+
     def start_recording(self):
         """Démarre l'enregistrement des échantillons et événements"""
         if self.el:
@@ -60,35 +127,78 @@ class EyeTracker:
             # Attendre un peu que le mode s'active
             time.sleep(0.1)
 
+            # Lecture des échantillons du lien hors du thread de rendu
+            if not self.dummy_mode:
+                self.gaze = GazeStream(self.el, pylink.SAMPLE_TYPE, missing=pylink.MISSING_DATA)
+                self.gaze.start()
+
     def stop_recording(self):
         """Arrête l'enregistrement"""
         if self.el:
+            if self.gaze:
+                self.gaze.stop()
+            if self.messages:
+                self.messages.flush()
             self.el.stopRecording()
 
-    def send_message(self, msg):
-        """Envoie un marqueur (trigger) dans le fichier EDF"""
-        if self.el:
+    def gaze_within(self, region, window_ms=200, min_fraction=0.8):
+        """
+        Contrôle de fixation rapide (voir GazeStream.gaze_within).
+        Sans flux de regard (dummy, pas d'enregistrement) : retourne True pour ne pas bloquer.
+        """
+        if self.gaze is None or not self.gaze.n_written:
+            return True
+        return self.gaze.gaze_within(region, window_ms, min_fraction)
+
+    def send_message(self, msg, sync=False):
+        """
+        Envoie un marqueur (trigger) dans le fichier EDF.
+        Par défaut le message est horodaté et déposé dans la file d'envoi
+        (non bloquant) ; sync=True force l'envoi direct sur le lien.
+        """
+        if not self.el:
+            return
+        if self.messages and not sync:
+            self.messages.post(msg)
+        else:
             self.el.sendMessage(msg)
 
-    def close_and_transfer_data(self, local_folder="data"):
+    def close_and_transfer_data(self, local_folder="data", background=False):
         """
         Ferme le fichier sur le tracker et le télécharge sur le PC local.
+        background=True : le transfert tourne dans un thread (EdfTransfer) qui
+        est retourné immédiatement ; sinon l'appel bloque jusqu'à la fin.
         """
+        if not self.el:
+            return None
+
+        if self.messages:
+            self.messages.close()
+            st = self.messages.stats()
+            print(f"EyeLink: {st['n_sent']} messages envoyés "
+                  f"(offset max {st['max_offset_ms']} ms, envoi moyen {st['mean_send_ms']:.2f} ms)")
+            self.messages = None
+
+        self.el.closeDataFile()
+
+        local_path = os.path.join(local_folder, self.filename)
+        print(f"EyeLink: Transfert de {self.filename} vers {local_path}...")
+
+        transfer = EdfTransfer(self.el, self.filename, local_path, close_link=not self.persistent)
+        self.transfer = transfer
+        if background:
+            transfer.start()
+        else:
+            transfer.run()
+        return transfer
+
+    def shutdown(self):
+        """Ferme le lien (fin de process) après un éventuel transfert en cours."""
+        if self.transfer is not None and self.transfer.is_alive():
+            self.transfer.wait()
         if self.el:
-            self.el.closeDataFile()
-            
-            # Création du dossier local si inexistant
-            if not os.path.exists(local_folder):
-                os.makedirs(local_folder)
-                
-            local_path = os.path.join(local_folder, self.filename)
-            
-            print(f"EyeLink: Transfert de {self.filename} vers {local_path}...")
             try:
-                # receiveDataFile(nom_distant, nom_local)
-                self.el.receiveDataFile(self.filename, local_path)
-                print("EyeLink: Transfert terminé avec succès.")
-            except Exception as e:
-                print(f"EyeLink: Erreur lors du transfert : {e}")
-            
-            self.el.close()
\ No newline at end of file
+                self.el.close()
+            except Exception:
+                pass
+            self.el = None
@@ -0,0 +1,92 @@
+"""
+fake_eyelink.py
+---------------
+Faux hôte EyeLink local, pour mesurer le débit des messages sans l'appareil.
+
+FakeEyeLink imite pylink.EyeLink.sendMessage avec une latence réseau
+simulée, et reconstruit le timestamp « EDF » en appliquant l'offset
+comme le ferait l'hôte.
+
+Usage :
+    python -m hardware.fake_eyelink --n 2000 --latency-ms 1.0
+"""
+
+import argparse
+import time
+
+from hardware.et_messages import MessageSender
+
+
+class FakeEyeLink:
+    def __init__(self, latency_s=0.001):
+        self.latency_s = latency_s
+        self.received = []  # (timestamp EDF reconstruit, texte)
+
+    def sendMessage(self, msg):
+        # Aller-retour réseau simulé (attente active : time.sleep est trop grossier)
+        end = time.perf_counter() + self.latency_s
+        while time.perf_counter() < end:
+            pass
+        t_host = time.perf_counter()
+
+        head, _, text = msg.partition(' ')
+        if head.lstrip('-').isdigit() and text:
+            t_host -= int(head) / 1000.0
+        else:
+            text = msg
+        self.received.append((t_host, text))
+        return 0
+
+
+def benchmark(n=2000, latency_s=0.001, interval_s=0.0):
+    """
+    Compare l'envoi synchrone et asynchrone de n messages.
+    Retourne un dict : coût côté appelant (µs) et erreur de timestamp (ms).
+    """
+    results = {}
+    for mode in ('sync', 'async'):
+        el = FakeEyeLink(latency_s)
+        sender = MessageSender(el.sendMessage) if mode == 'async' else None
+        captured = []
+        caller_cost = 0.0
+
+        for i in range(n):
+            t0 = time.perf_counter()
+            captured.append(t0)
+            if sender:
+                sender.post(f"MSG_{i}")
+            else:
+                el.sendMessage(f"MSG_{i}")
+            caller_cost += time.perf_counter() - t0
+            if interval_s:
+                time.sleep(interval_s)
+
+        t_end = time.perf_counter()
+        if sender:
+            sender.close(timeout=n * latency_s * 2 + 1)
+        drain_s = time.perf_counter() - t_end
+
+        errors = [(t_host - t_cap) * 1000 for (t_host, _), t_cap in zip(el.received, captured)]
+        results[mode] = {
+            'caller_us_per_msg': caller_cost / n * 1e6,
+            'timestamp_err_ms_mean': sum(errors) / len(errors) if errors else float('nan'),
+            'timestamp_err_ms_max': max(errors) if errors else float('nan'),
+            'drain_s': drain_s,
+            'n_received': len(el.received),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark des messages EyeLink (faux hôte)")
+    parser.add_argument('--n', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=1.0)
+    parser.add_argument('--interval-ms', type=float, default=0.0,
+                        help="Pause entre deux messages (0 = rafale)")
+    args = parser.parse_args()
+
+    res = benchmark(args.n, args.latency_ms / 1000.0, args.interval_ms / 1000.0)
+    for mode, r in res.items():
+        print(f"{mode:>5} | appelant: {r['caller_us_per_msg']:8.1f} µs/msg | "
+              f"erreur timestamp: {r['timestamp_err_ms_mean']:6.2f} ms (max {r['timestamp_err_ms_max']:6.2f}) | "
+              f"vidage: {r['drain_s']:.2f} s | reçus: {r['n_received']}")
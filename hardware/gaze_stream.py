@@ -0,0 +1,149 @@
+"""
+gaze_stream.py
+--------------
+Lecture continue des échantillons du lien EyeLink dans un tampon circulaire NumPy.
+
+Un thread dédié vide la file du lien (getNextData / getFloatData) et
+écrit (temps tracker ms, x, y, pupille) dans un tableau préalloué.
+Le thread de rendu n'appelle jamais pylink : il interroge le tampon
+via des vues sans copie (views / gaze_within).
+
+Le lien est partagé avec l'envoi des messages et le thread principal :
+chaque vidage se fait sous le verrou du lien (el.lock, cf. LockedLink).
+Les coordonnées manquantes (clignements, pylink.MISSING_DATA) sont
+stockées en NaN.
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+# Colonnes du tampon
+T, X, Y, PUPIL = range(4)
+
+# Valeur de pylink.MISSING_DATA (pylink absent : tests hors EyeLink)
+MISSING_DATA = -32768
+
+
+class GazeStream:
+    def __init__(self, el, sample_type, capacity=120000, poll_s=0.001, missing=MISSING_DATA):
+        """
+        Args:
+            el: Connexion pylink.EyeLink (lien déjà en enregistrement)
+            sample_type (int): pylink.SAMPLE_TYPE
+            missing (float): pylink.MISSING_DATA (coordonnée absente)
+            capacity (int): Nombre d'échantillons conservés (120 s à 1 kHz)
+            poll_s (float): Pause entre deux vidages de la file du lien
+        """
+        self.el = el
+        self.sample_type = sample_type
+        self.capacity = int(capacity)
+        self.poll_s = poll_s
+        self.missing = missing
+        self._link_lock = getattr(el, 'lock', None) or nullcontext()
+
+        self.buffer = np.full((self.capacity, 4), np.nan, dtype=np.float64)
+        self.n_written = 0
+        self.n_errors = 0
+
+        self._running = threading.Event()
+        self._thread = None
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.n_written = 0
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="GazeStream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --- Lecture (thread de rendu) ---
+
+    def views(self, n=None):
+        """
+        Retourne les n derniers échantillons sous forme de 1 ou 2 vues (sans copie),
+        dans l'ordre chronologique (2 vues quand la fenêtre chevauche la fin du tampon).
+        """
+        written = self.n_written
+        n = min(written, self.capacity) if n is None else min(int(n), written, self.capacity)
+        if n <= 0:
+            return (self.buffer[:0],)
+        end = written % self.capacity
+        start = end - n
+        if start >= 0:
+            return (self.buffer[start:end],)
+        return (self.buffer[start:], self.buffer[:end])
+
+    def latest(self):
+        """Dernier échantillon (vue d'une ligne) ou None."""
+        if not self.n_written:
+            return None
+        return self.buffer[(self.n_written - 1) % self.capacity]
+
+    def gaze_within(self, region, window_ms=200, min_fraction=0.8):
+        """
+        Vrai si au moins min_fraction des échantillons valides des window_ms
+        dernières ms (temps tracker) tombent dans region.
+        region : (cx, cy, rayon) ou (x0, y0, x1, y1), en pixels écran EyeLink.
+        """
+        last = self.latest()
+        if last is None:
+            return False
+        t_min = last[T] - window_ms
+
+        # Nombre d'échantillons à couvrir : borné par la fréquence max (2 kHz)
+        n = int(window_ms * 2) + 1
+        inside = 0
+        valid = 0
+        for view in self.views(n):
+            sel = view[view[:, T] >= t_min]
+            x, y = sel[:, X], sel[:, Y]
+            ok = np.isfinite(x) & np.isfinite(y)  # Clignements : NaN (cf. _append)
+            x, y = x[ok], y[ok]
+            valid += x.size
+            if len(region) == 3:
+                cx, cy, r = region
+                inside += int(np.count_nonzero((x - cx) ** 2 + (y - cy) ** 2 <= r * r))
+            else:
+                x0, y0, x1, y1 = region
+                inside += int(np.count_nonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)))
+        return valid > 0 and inside >= min_fraction * valid
+
+    # --- Thread ---
+
+    def _append(self, t, x, y, pupil):
+        if x == self.missing or y == self.missing:
+            x = y = np.nan
+        row = self.buffer[self.n_written % self.capacity]
+        row[T] = t
+        row[X] = x
+        row[Y] = y
+        row[PUPIL] = pupil
+        # Incrément après écriture : le lecteur ne voit que des lignes complètes
+        self.n_written += 1
+
+    def _run(self):
+        el = self.el
+        while self._running.is_set():
+            try:
+                with self._link_lock:
+                    item = el.getNextData()
+                    while item:
+                        if item == self.sample_type:
+                            s = el.getFloatData()
+                            eye = s.getRightEye() if s.isRightSample() else s.getLeftEye()
+                            gx, gy = eye.getGaze()
+                            self._append(s.getTime(), gx, gy, eye.getPupilSize())
+                        item = el.getNextData()
+            except Exception:
+                self.n_errors += 1
+            time.sleep(self.poll_s)
@@ -1,8 +1,13 @@
-from psychopy import parallel, core
+from psychopy import parallel
+from hardware.pulse import PulseScheduler
+from hardware.trigger_timeline import TriggerTimeline
 
 class DummyParPort:
     def __init__(self, *args, **kwargs):
-        pass 
+        self.timeline = None
+
+    def attach_clock(self, clock):
+        pass
 
     def send_trigger(self, code, duration=0.03):
         pass 
@@ -10,15 +15,22 @@ class DummyParPort:
     def reset(self):
         pass
 
+    def close(self):
+        pass
+
 # --- CLASSE PRINCIPALE (CONNEXION PHYSIQUE) ---
 class ParPort:
-    def __init__(self, address=0x378):
+    def __init__(self, address=0x378, policy='preempt'):
         """
         Initialise le port parallèle.
+        policy : comportement si un code arrive pendant une impulsion
+                 ('preempt', 'merge' ou 'queue', voir hardware/pulse.py).
         """
         self.address = address
         self.port = None
         self.dummy_mode = False
+        self.scheduler = None
+        self.timeline = None
 
         try:
             parallel.setPortAddress(address)
@@ -26,22 +38,73 @@ class ParPort:
             self.port.setData(0)
         except Exception as e:
             self.dummy_mode = True
+            return
+
+        # Remise à 0 déléguée à un thread : send_trigger ne bloque plus
+        # Chaque écriture est horodatée dans la timeline (task_clock + perf_counter)
+        self.timeline = TriggerTimeline()
+        self.scheduler = PulseScheduler(self.port.setData, policy=policy,
+                                        recorder=self.timeline.record)
+
+    def attach_clock(self, clock):
+        """
+        Associe l'horloge de la tâche aux timestamps de la timeline.
+        Appelé au début de chaque tâche : repart d'une timeline vide (port réutilisé).
+        """
+        if self.timeline is not None:
+            self.timeline.clear()
+            self.timeline.attach_clock(clock)
+        if self.scheduler is not None:
+            self.scheduler.clear_history()
 
     def send_trigger(self, code, duration=0.03):
         """
-        Envoie un trigger (code) et remet à 0 après duration secondes.
+        Lève le code immédiatement et programme la remise à 0 après duration secondes.
+        Non bloquant (retour en quelques µs).
         """
         if self.dummy_mode:
             return
 
         try:
-            self.port.setData(int(code))
-            core.wait(duration)
-            self.port.setData(0)
+            self.scheduler.pulse(code, duration)
         except Exception as e:
             print(f"Erreur envoi trigger {code}: {e}")
 
+    @property
+    def last_pulse_width(self):
+        """Largeur réellement délivrée de la dernière impulsion terminée (s)."""
+        return self.scheduler.last_pulse_width if self.scheduler else None
+
+    @property
+    def can_read_pins(self):
+        """Lecture de broches possible (port réellement ouvert)."""
+        return not self.dummy_mode and self.port is not None
+
+    def read_pin(self, pin=10):
+        """Lit une broche d'entrée (ex: 10 = ACK, impulsions TR du scanner)."""
+        if not self.can_read_pins:
+            raise RuntimeError(f"Port parallèle 0x{self.address:X} non ouvert : lecture de broche impossible")
+        return self.port.readPin(pin)
+
     def reset(self):
         """Force la remise à zéro des pins"""
         if not self.dummy_mode and self.port:
-            self.port.setData(0)
\ No newline at end of file
+            self.scheduler.cancel()
+            self.port.setData(0)
+
+    def is_healthy(self):
+        """Health-check entre deux runs : port accessible et thread de remise à 0 vivant."""
+        if self.dummy_mode or not self.port:
+            return False
+        if not self.scheduler.is_alive():
+            return False
+        try:
+            self.port.readData()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Termine l'impulsion en cours et arrête le thread de remise à 0."""
+        if self.scheduler:
+            self.scheduler.close()
@@ -0,0 +1,240 @@
+"""
+pulse.py
+--------
+Ordonnanceur d'impulsions TTL non bloquant.
+
+Le code est écrit immédiatement sur le port (appel de quelques µs),
+puis un thread dédié remet les pins à 0 à l'échéance. L'appelant
+(boucle de rendu, callOnFlip) ne bloque donc plus pendant la durée
+de l'impulsion.
+
+Politiques si un nouveau code arrive avant la fin de l'impulsion en cours :
+    - 'preempt' (défaut) : le nouveau code remplace immédiatement l'ancien,
+      l'impulsion précédente est enregistrée comme tronquée. Même code que
+      l'impulsion active : remise à 0 puis nouvelle levée (sinon aucun front).
+    - 'merge'   : le nouveau code est combiné (OU binaire) avec le code
+      actif, l'échéance est prolongée si besoin. Les pins ne redescendent
+      pas : une seule impulsion (durée demandée = durée prolongée).
+    - 'queue'   : le nouveau code est mis en file et levé dès que
+      l'impulsion en cours est terminée (décale donc son onset).
+"""
+
+import csv
+import threading
+import time
+from collections import Counter, deque
+
+POLICIES = ('preempt', 'merge', 'queue')
+
+
+class PulseScheduler:
+    def __init__(self, write, default_duration=0.03, policy='preempt',
+                 spin_margin=0.002, history=4096, recorder=None):
+        """
+        Args:
+            write (callable): Fonction d'écriture bas niveau (ex: port.setData)
+            default_duration (float): Durée d'impulsion par défaut (s)
+            policy (str): 'preempt', 'merge' ou 'queue'
+            spin_margin (float): Fin d'attente en boucle active (s), pour
+                                 s'affranchir de la granularité du timer OS
+            history (int): Nombre d'impulsions conservées dans self.pulses
+            recorder (callable): Optionnel, appelé avec (code, perf_t) après
+                                 chaque écriture (ex: TriggerTimeline.record)
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue '{policy}' (attendu : {POLICIES})")
+
+        self._write = write
+        self.default_duration = float(default_duration)
+        self.policy = policy
+        self.spin_margin = float(spin_margin)
+        self.recorder = recorder
+
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._closed = False
+
+        # Impulsion active
+        self._code = 0
+        self._requested = 0.0
+        self._raised_at = None
+        self._deadline = None
+
+        # Historique : (code, durée demandée, durée délivrée, issue)
+        # issue = 'ok' | 'preempted' | 'cancelled'
+        self.pulses = deque(maxlen=history)
+        # (durée demandée, meta) de l'écriture en cours, lisible par `write`
+        # (appelé sous le verrou) ; (None, None) pour une remise à 0
+        self.write_info = (None, None)
+        self.outcomes = Counter()   # Toutes les impulsions (au-delà de l'historique)
+        self.n_merged = 0           # Codes fusionnés dans une impulsion active
+        self.last_pulse_width = None
+        self.n_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="PulseScheduler", daemon=True)
+        self._thread.start()
+
+    # --- API ---
+
+    def pulse(self, code, duration=None, meta=None):
+        """
+        Lève `code` immédiatement et programme la remise à 0. Non bloquant.
+        meta : donnée propre à cette impulsion, transmise à `write` via
+        write_info (même si l'impulsion est mise en file ou fusionnée).
+        """
+        code = int(code)
+        duration = self.default_duration if duration is None else float(duration)
+
+        with self._cond:
+            if self._closed:
+                return
+            if self._deadline is not None:
+                if self.policy == 'queue':
+                    self._pending.append((code, duration, meta))
+                    return
+                if self.policy == 'merge':
+                    # Même impulsion prolongée : pas de fin enregistrée, pas de front descendant
+                    merged = code | self._code
+                    now = time.perf_counter()
+                    self._deadline = max(self._deadline, now + duration)
+                    if merged != self._code:
+                        self._safe_write(merged, self._deadline - now, meta)
+                        self._code = merged
+                    self._requested = self._deadline - self._raised_at
+                    self.n_merged += 1
+                    self._cond.notify()
+                    return
+                if code == self._code:
+                    self._lower('preempted')  # Même valeur : front descendant pour que le code soit vu
+                else:
+                    self._end_pulse('preempted')
+
+            self._raise(code, duration, meta)
+            self._cond.notify()
+
+    def cancel(self):
+        """Remet les pins à 0 tout de suite et vide la file d'attente."""
+        with self._cond:
+            self._pending.clear()
+            if self._deadline is not None:
+                self._lower('cancelled')
+            self._cond.notify()
+
+    def wait_idle(self, timeout=1.0):
+        """Attend la fin de l'impulsion en cours (et de la file). Retourne True si idle."""
+        end = time.perf_counter() + timeout
+        with self._cond:
+            while self._deadline is not None or self._pending:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def is_alive(self):
+        return not self._closed and self._thread.is_alive()
+
+    def clear_history(self):
+        """Nouvelle tâche : historique et compteurs repartent de zéro."""
+        with self._cond:
+            self.pulses.clear()
+            self.outcomes.clear()
+            self.n_merged = 0
+            self.n_errors = 0
+
+    def summary(self):
+        """Largeurs délivrées : {n_pulses, n_ok, n_preempted, n_merged, n_cancelled, n_errors, width_err_ms_mean, width_ms_max}."""
+        with self._cond:
+            pulses = list(self.pulses)
+            outcomes = dict(self.outcomes)
+        out = {'n_pulses': sum(outcomes.values()), 'n_errors': self.n_errors, 'n_merged': self.n_merged}
+        for outcome in ('ok', 'preempted', 'cancelled'):
+            out[f"n_{outcome}"] = outcomes.get(outcome, 0)
+        full = [(req, width) for _, req, width, outcome in pulses if outcome == 'ok']
+        out['width_err_ms_mean'] = (sum(w - r for r, w in full) / len(full) * 1000) if full else float('nan')
+        out['width_ms_max'] = max((w for _, _, w, _ in pulses), default=float('nan')) * 1000
+        return out
+
+    def save(self, path):
+        """Impulsions délivrées (historique) en CSV. Retourne le chemin, ou None si vide."""
+        with self._cond:
+            pulses = list(self.pulses)
+        if not pulses:
+            return None
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['code', 'requested_ms', 'width_ms', 'outcome'])
+            for code, requested, width, outcome in pulses:
+                writer.writerow([code, f"{requested * 1000:.3f}", f"{width * 1000:.3f}", outcome])
+        return path
+
+    def close(self):
+        """Termine l'impulsion en cours et arrête le thread."""
+        self.cancel()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    # --- Interne (appelé sous self._cond) ---
+
+    def _safe_write(self, code, requested=None, meta=None):
+        self.write_info = (requested, meta)
+        try:
+            self._write(code)
+            if self.recorder is not None:
+                self.recorder(code, time.perf_counter())
+            return True
+        except Exception as e:
+            self.n_errors += 1
+            print(f"Erreur écriture port ({code}): {e}")
+            return False
+
+    def _raise(self, code, duration, meta=None):
+        self._raised_at = time.perf_counter()
+        self._safe_write(code, duration, meta)
+        self._code = code
+        self._requested = duration
+        self._deadline = self._raised_at + duration
+
+    def _end_pulse(self, outcome):
+        width = time.perf_counter() - self._raised_at
+        self.pulses.append((self._code, self._requested, width, outcome))
+        self.outcomes[outcome] += 1
+        self.last_pulse_width = width
+        self._deadline = None
+        self._raised_at = None
+
+    def _lower(self, outcome='ok'):
+        self._safe_write(0)
+        self._end_pulse(outcome)
+        self._code = 0
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if self._deadline is None:
+                    if self._pending:
+                        self._raise(*self._pending.popleft())
+                        continue
+                    self._cond.notify_all()  # réveille wait_idle
+                    self._cond.wait()
+                    continue
+
+                remaining = self._deadline - time.perf_counter()
+                if remaining > self.spin_margin:
+                    self._cond.wait(remaining - self.spin_margin)
+                    continue
+
+                # Fin d'attente active hors verrou (sleep(0) libère le GIL)
+                deadline = self._deadline
+                self._cond.release()
+                try:
+                    while time.perf_counter() < deadline:
+                        time.sleep(0)
+                finally:
+                    self._cond.acquire()
+
+                # L'impulsion a pu être remplacée pendant l'attente active
+                if self._deadline == deadline:
+                    self._lower('ok')
@@ -0,0 +1,217 @@
+"""
+serial_trigger.py
+-----------------
+Backend de triggers pour boîtiers TTL USB-série (même interface que ParPort).
+
+send_trigger() ne fait que déposer le code : un thread d'écriture envoie
+l'octet sur le port série puis la remise à 0 après `duration`. Si plusieurs
+codes arrivent avant que le thread ne les ait écrits, seul le plus récent
+est envoyé (coalescence) et les codes écrasés sont comptés. La latence
+réellement obtenue (dépôt -> fin d'écriture) est mesurée pour chaque code.
+
+Test local sans boîtier (Linux/macOS), sur une paire pty :
+    python -m hardware.serial_trigger --selftest
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+from hardware.trigger_timeline import TriggerTimeline
+
+
+class SerialTrigger:
+    def __init__(self, port='COM3', baudrate=115200, reset_after=True):
+        """
+        Args:
+            port (str): Nom du port ('COM3', '/dev/ttyUSB0', pty...)
+            baudrate (int): Débit du boîtier
+            reset_after (bool): Envoie 0 après chaque impulsion (boîtiers non auto-reset)
+        """
+        import serial
+
+        self.port_name = port
+        self.dummy_mode = False
+        self.reset_after = reset_after
+        self.ser = serial.Serial(port, baudrate=baudrate, timeout=0, write_timeout=0.1)
+
+        self.timeline = TriggerTimeline()
+        self.latencies = deque(maxlen=4096)  # s, dépôt -> octet écrit
+        self.last_pulse_width = None
+        self.n_coalesced = 0
+        self.n_errors = 0
+
+        self._cond = threading.Condition()
+        self._pending = None        # (code, duration, t_depot)
+        self._reset_deadline = None
+        self._raised_at = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="SerialTrigger", daemon=True)
+        self._thread.start()
+
+    # --- Interface ParPort ---
+
+    def attach_clock(self, clock):
+        """Nouvelle tâche (port réutilisé) : timeline, latences et compteurs repartent de zéro."""
+        self.timeline.clear()
+        self.timeline.attach_clock(clock)
+        with self._cond:
+            self.latencies.clear()
+            self.n_coalesced = 0
+            self.n_errors = 0
+
+    def send_trigger(self, code, duration=0.03):
+        """Dépose le code pour le thread d'écriture. Non bloquant."""
+        with self._cond:
+            if self._pending is not None:
+                self.n_coalesced += 1
+            self._pending = (int(code) & 0xFF, float(duration), time.perf_counter())
+            self._cond.notify()
+
+    def reset(self):
+        with self._cond:
+            self._pending = (0, 0.0, time.perf_counter())
+            self._cond.notify()
+
+    def is_healthy(self):
+        return not self._closed and self._thread.is_alive() and self.ser.is_open
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+        try:
+            self.ser.write(b'\x00')
+            self.ser.close()
+        except Exception:
+            pass
+
+    def latency_stats(self):
+        """Latence d'écriture obtenue (ms) : moyenne, max, nombre de codes, codes coalescés, erreurs."""
+        lat = list(self.latencies)
+        return {'n': len(lat),
+                'mean_ms': sum(lat) / len(lat) * 1000 if lat else float('nan'),
+                'max_ms': max(lat) * 1000 if lat else float('nan'),
+                'coalesced': self.n_coalesced,
+                'errors': self.n_errors}
+
+    def save_latencies(self, path):
+        """Latence de chaque écriture (ms) en CSV. Retourne le chemin, ou None si vide."""
+        lat = list(self.latencies)
+        if not lat:
+            return None
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("write_idx,latency_ms\n")
+            for i, v in enumerate(lat):
+                f.write(f"{i},{v * 1000:.4f}\n")
+        return path
+
+    # --- Thread d'écriture ---
+
+    def _write(self, code):
+        try:
+            self.ser.write(bytes((code,)))
+            self.ser.flush()
+            t = time.perf_counter()
+            self.timeline.record(code, t)
+            return t
+        except Exception as e:
+            self.n_errors += 1
+            print(f"Erreur écriture série ({code}): {e}")
+            return None
+
+    def _run(self):
+        self._cond.acquire()
+        try:
+            while not self._closed:
+                if self._pending is not None:
+                    code, duration, t_depot = self._pending
+                    self._pending = None
+                    # Écriture hors verrou : send_trigger ne bloque jamais sur l'USB
+                    self._cond.release()
+                    try:
+                        t_written = self._write(code)
+                    finally:
+                        self._cond.acquire()
+                    if t_written is None:
+                        continue
+                    self.latencies.append(t_written - t_depot)
+                    if code and self.reset_after:
+                        self._raised_at = t_written
+                        self._reset_deadline = t_written + duration
+                    else:
+                        self._reset_deadline = None
+                    continue
+
+                if self._reset_deadline is not None:
+                    remaining = self._reset_deadline - time.perf_counter()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                    self._reset_deadline = None
+                    self._cond.release()
+                    try:
+                        t0 = self._write(0)
+                    finally:
+                        self._cond.acquire()
+                    if t0 is not None:
+                        self.last_pulse_width = t0 - self._raised_at
+                    continue
+
+                self._cond.wait()
+        finally:
+            self._cond.release()
+
+
+# =============================================================================
+# AUTO-TEST SUR PAIRE PTY
+# =============================================================================
+
+def selftest(n=200, interval_s=0.005, duration=0.002):
+    """Écrit n codes sur l'esclave d'une paire pty et vérifie ce qui arrive côté maître."""
+    import tty
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    trig = SerialTrigger(os.ttyname(slave), reset_after=True)
+
+    sent = []
+    for i in range(n):
+        code = (i % 254) + 1
+        sent.append(code)
+        trig.send_trigger(code, duration)
+        time.sleep(interval_s)
+    time.sleep(0.05)
+    trig.close()
+
+    received = b''
+    os.set_blocking(master, False)
+    while True:
+        try:
+            chunk = os.read(master, 4096)
+        except (BlockingIOError, OSError):
+            break
+        if not chunk:
+            break
+        received += chunk
+    os.close(master)
+
+    codes = [b for b in received if b]
+    stats = trig.latency_stats()
+    print(f"Codes envoyés : {n} | reçus : {len(codes)} | coalescés : {trig.n_coalesced} | "
+          f"ordre conservé : {codes == [c for c in sent if c in codes]}")
+    print(f"Latence écriture : moyenne {stats['mean_ms']:.3f} ms | max {stats['max_ms']:.3f} ms")
+    return codes, stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backend série de triggers")
+    parser.add_argument('--selftest', action='store_true', help="Test local sur une paire pty")
+    parser.add_argument('--n', type=int, default=200)
+    args = parser.parse_args()
+    if args.selftest:
+        selftest(args.n)
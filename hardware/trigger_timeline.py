@@ -0,0 +1,67 @@
+"""
+trigger_timeline.py
+-------------------
+Enregistreur circulaire des écritures sur le port de triggers.
+
+Chaque écriture (levée d'un code ou remise à 0) est horodatée sur deux
+horloges : task_clock (alignée sur le trigger IRM) et time.perf_counter
+(haute résolution, comparable aux timestamps de flip). Les tableaux sont
+préalloués : l'enregistrement ne fait aucune allocation pendant le run.
+"""
+
+import csv
+import time
+import numpy as np
+
+
+class TriggerTimeline:
+    def __init__(self, capacity=65536):
+        self.capacity = int(capacity)
+        self.codes = np.zeros(self.capacity, dtype=np.int16)
+        self.task_t = np.full(self.capacity, np.nan, dtype=np.float64)
+        self.perf_t = np.zeros(self.capacity, dtype=np.float64)
+        self.n_written = 0
+        self.clock = None
+
+    def attach_clock(self, clock):
+        """Horloge de la tâche (psychopy Clock) utilisée pour la 2e colonne de temps."""
+        self.clock = clock
+
+    def record(self, code, perf_t=None):
+        """Enregistre une écriture. Appelé sous le verrou du PulseScheduler."""
+        i = self.n_written % self.capacity
+        self.perf_t[i] = time.perf_counter() if perf_t is None else perf_t
+        self.task_t[i] = self.clock.getTime() if self.clock is not None else np.nan
+        self.codes[i] = code
+        self.n_written += 1
+
+    def __len__(self):
+        return min(self.n_written, self.capacity)
+
+    def ordered(self):
+        """Retourne (codes, task_t, perf_t) dans l'ordre chronologique."""
+        n = len(self)
+        if self.n_written <= self.capacity:
+            sl = slice(0, n)
+            return self.codes[sl], self.task_t[sl], self.perf_t[sl]
+        start = self.n_written % self.capacity
+        idx = np.r_[start:self.capacity, 0:start]
+        return self.codes[idx], self.task_t[idx], self.perf_t[idx]
+
+    def clear(self):
+        self.n_written = 0
+
+    def flush(self, path):
+        """Écrit la timeline en CSV. Retourne le chemin, ou None si vide."""
+        if not len(self):
+            return None
+        codes, task_t, perf_t = self.ordered()
+        first = self.n_written - len(self)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['write_idx', 'code', 'event', 'task_time_s', 'perf_time_s'])
+            for k in range(len(codes)):
+                code = int(codes[k])
+                writer.writerow([first + k, code, 'reset' if code == 0 else 'set',
+                                 f"{task_t[k]:.6f}", f"{perf_t[k]:.6f}"])
+        return path
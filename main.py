@@ -4,6 +4,8 @@ import signal
 from PyQt6.QtWidgets import QApplication
 from gui.menu import ExperimentMenu
 from utils.logger import get_logger
+from utils.hardware_manager import HardwarePool
+from utils.hardware_probe import get_hardware_probe
 
 # Permet de quitter proprement avec Ctrl+C dans le terminal si besoin
 signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -24,10 +26,11 @@ def show_menu_and_get_config(app, last_config=None):
     
     return config
 
-def run_task_logic(config):
+def run_task_logic(config, hardware_pool=None):
     """
     Lance la tâche PsychoPy.
     Nettoyé : La sauvegarde est désormais déléguée à la tâche elle-même via BaseTask.
+    hardware_pool : connexions LPT / EyeLink réutilisées d'une tâche à l'autre.
     """
     logger = get_logger()
     
@@ -53,7 +56,7 @@ def run_task_logic(config):
 
     # Instanciation de la tâche via la Factory
     # Assure-toi que create_task passe bien **config au constructeur !
-    task = create_task(config, win)
+    task = create_task(config, win, hardware_pool=hardware_pool)
     
     if not task:
         logger.err(f"Factory Error: Could not create task '{config.get('tache')}'")
@@ -74,6 +77,13 @@ def run_task_logic(config):
         
     finally:
         win.close()
+        task.close()
+        # Le transfert EDF continue pendant le retour au menu : seule la prochaine
+        # tâche avec EyeTracker l'attend (lien EyeLink occupé), cf. HardwarePool
+        if hardware_pool is not None:
+            hardware_pool.track_transfer(task.et_transfer)
+        else:
+            task.wait_background_io()
 
 def main():
     """
@@ -83,6 +93,10 @@ def main():
     app = QApplication(sys.argv)
     last_config = None
 
+    # Connexions matérielles ouvertes une fois pour toute la session
+    hardware_pool = HardwarePool()
+    get_hardware_probe().attach_pool(hardware_pool)  # Détection LPT via le port du pool
+
     while True:
         # 1. Phase Menu (PyQt)
         config = show_menu_and_get_config(app, last_config)
@@ -96,7 +110,10 @@ def main():
         try:
             logger.log(f"Lancement de la tâche : {config.get('tache', 'Unknown')}...")
             
-            run_task_logic(config)
+            run_task_logic(config, hardware_pool)
+
+            # Vérifie les connexions avant le prochain run
+            hardware_pool.health_check()
             
             # On garde la config en mémoire pour pré-remplir le menu au prochain tour
             last_config = config
@@ -106,6 +123,7 @@ def main():
             pass # On continue la boucle pour permettre de relancer
 
     # Arrêt propre
+    hardware_pool.close()
     logger.log("Application shutdown.")
     app.quit() 
     sys.exit(0)
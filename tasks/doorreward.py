@@ -16,10 +16,10 @@ Date : Janvier 2026
 
 import random
 import os
-import glob
 
-from psychopy import visual, event, core
+from psychopy import visual, core
 from utils.base_task import BaseTask
+from utils.timeline import TimelineBuilder, balanced_jitter
 from tasks.qc.qc_doorreward import qc_doorreward
 
 
@@ -35,6 +35,17 @@ class DoorReward(BaseTask):
         5. ITI variable
     """
 
+    # Colonnes typées des évènements (CSV ordonné + Parquet, cf. utils/columnar.py).
+    # Une ligne par évènement : seules les colonnes de l'évènement sont renseignées.
+    RECORD_SCHEMA = {
+        'participant': 'str', 'session': 'str', 'trial': 'int', 'time_s': 'float',
+        'event_type': 'str', 'total_gain': 'int',
+        'onset_planned': 'float', 'onset_goal': 'float', 'drift_ms': 'float',
+        'key': 'str', 'choice_idx': 'int', 'rt': 'float',
+        'is_win': 'bool', 'gain': 'int', 'choice': 'int',
+        'iti_duration': 'float', 'dropped_frames': 'int',
+    }
+
     def __init__(self, win, nom, session, n_trials=40, reward_probability=0.5, 
                  mode="fmri", enregistrer=True, eyetracker_actif=False, 
                  parport_actif=False, **kwargs):
@@ -61,7 +72,8 @@ class DoorReward(BaseTask):
             eyetracker_actif=eyetracker_actif,
             parport_actif=parport_actif,
             enregistrer=enregistrer,
-            et_prefix='DR'  # Préfixe pour l'EyeTracker
+            et_prefix='DR',  # Préfixe pour l'EyeTracker
+            **kwargs
         )
 
         # --- Paramètres Spécifiques de la Tâche ---
@@ -94,9 +106,21 @@ class DoorReward(BaseTask):
         self.keys_quit = ['escape', 'q']
         self.logger.log(f"Mapping touches ({self.mode}): {self.keys_choices}")
 
+        # --- Durées fixes du slot d'essai (s) ---
+        self.response_window = 4.0
+        self.feedback_dur = 1.5
+        self.pre_fb_range = (1.0, 2.0)
+        self.iti_range = (1.0, 2.5)
+        self.timeline = None     # Compilée après validation du frame rate (cf. build_design)
+        self.pre_fb = []         # Jitter pré-feedback par essai
+        self.run_end_s = 0.0     # Fin du dernier slot, relative à l'origine
+
         # --- Préchargement des Stimuli Visuels ---
         self._setup_task_stimuli()
 
+        # Période d'écran (cache) pour quantifier la timeline à la frame
+        self.measure_frame_rate()
+
         self.logger.ok(f"DoorReward initialisée : {self.n_trials} essais, p(win)={self.reward_prob}")
 
         self.global_records = []
@@ -195,11 +219,44 @@ class DoorReward(BaseTask):
         
         self.global_records.append(entry)
 
+    # =========================================================================
+    # DESIGN (Onsets absolus)
+    # =========================================================================
+
+    def build_design(self):
+        """
+        Slot fixe par essai : fenêtre de réponse + pré-feedback + feedback + ITI.
+        Les jitters sont à somme fixe (balanced_jitter) : la durée du run ne
+        dépend ni des tirages ni des RT (l'ITI absorbe le temps non utilisé).
+        Après le premier show_instructions (frame rate en cache validé).
+        """
+        self.pre_fb = balanced_jitter(*self.pre_fb_range, self.n_trials)
+        itis = balanced_jitter(*self.iti_range, self.n_trials)
+
+        builder = TimelineBuilder()
+        t = 0.0
+        for pre_fb, iti in zip(self.pre_fb, itis):
+            builder.add(t, self.response_window, 'doors', self.codes['doors_onset'])
+            t += self.response_window + pre_fb + self.feedback_dur + iti
+        self.timeline = builder.compile(1.0 / self.frame_rate)
+        self.run_end_s = round(t / self.timeline.frame_period) * self.timeline.frame_period
+        self.logger.log(f"Timeline compilée : {self.timeline.describe()}")
+
+    def _finish_trial(self, end_planned):
+        """Fixation jusqu'à l'ancre de fin d'essai (= onset de l'essai suivant)."""
+        self.fixation.draw()
+        t_fix = self.flip_and_stamp()
+        t_end = self.schedule_onset(end_planned)
+        self.gc.collect_idle(t_end)
+        self.wait_until(t_end, frame_aligned=True)
+        dropped = self.frames.end_trial(f"T{self.current_trial_idx}")
+        self.log_trial_event('iti_end', iti_duration=round(t_end - t_fix, 4), dropped_frames=dropped)
+
     # =========================================================================
     # CORE TASK LOGIC (Logique Métier)
     # =========================================================================
 
-    def run_trial(self, trial_num):
+    def run_trial(self, trial_num, onset_planned, end_planned):
         """
         Exécute un essai complet de la Door Reward Task.
         
@@ -208,41 +265,49 @@ class DoorReward(BaseTask):
             2. Attente de la réponse (Max 4s)
             3. Ouverture de la porte choisie
             4. Feedback (Gain ou Neutre)
-            5. ITI (Fixation)
+            5. ITI (Fixation) jusqu'à l'ancre de fin
         
         Args:
             trial_num (int): Numéro de l'essai courant
+            onset_planned (float): Onset absolu des portes (temps planifié)
+            end_planned (float): Fin du slot = onset de l'essai suivant
         
         Returns:
             bool: True si l'essai s'est terminé normalement, False si interruption
         """
         self.current_trial_idx = trial_num
+
+        # Onset absolu (recalé sur les TR en mode tr_locked) : pas de cumul des retards
+        onset_goal = self.schedule_onset(onset_planned)
         
         # =====================================================================
         # PHASE 1 : AFFICHAGE DES PORTES FERMEES
         # =====================================================================
-        for door in self.doors_closed_stim:
-            door.opacity = 1
-            door.draw()
-        
-        self.score_stim.draw()
-        self.win.flip()
-        
-        onset_time = self.task_clock.getTime()
-        self.ParPort.send_trigger(self.codes['doors_onset'])
-        self.log_trial_event('stim_onset_doors')
+        with self.profiler.span('draw'):
+            for door in self.doors_closed_stim:
+                door.opacity = 1
+                door.draw()
+            
+            self.score_stim.draw()
+        self.wait_until(onset_goal, frame_aligned=True)
+        onset_time = self.flip_and_stamp(trigger=self.codes['doors_onset'])
+        self.frames.add_late(onset_time, onset_goal)
+        self.log_trial_event('stim_onset_doors',
+                             onset_planned=round(float(onset_planned), 5),
+                             onset_goal=round(float(onset_goal), 5),
+                             drift_ms=round((onset_time - onset_goal) * 1000.0, 3))
 
         # =====================================================================
         # PHASE 2 : COLLECTE DE LA REPONSE
         # =====================================================================
-        event.clearEvents()
+        self.kb.clear()
         wait_keys = self.keys_choices + self.keys_quit
         
-        keys = event.waitKeys(
-            maxWait=4.0,  # Fenêtre de réponse de 4 secondes
-            keyList=wait_keys,
-            timeStamped=self.task_clock
-        )
+        with self.profiler.span('dr.response'):
+            keys = self.kb.wait(
+                keyList=wait_keys,
+                max_wait=self.response_window  # Fenêtre de réponse de 4 secondes
+            )
         
         # --- TIMEOUT (Aucune réponse) ---
         if not keys:
@@ -253,10 +318,11 @@ class DoorReward(BaseTask):
             self.feedback_stim.color = 'red'
             self.feedback_stim.pos = (0, 0)
             self.feedback_stim.draw()
-            self.win.flip()
+            t_fb = self.flip_and_stamp()
             
-            core.wait(1.5)
+            self.wait_until(t_fb + self.feedback_dur, frame_aligned=True)
             self.logger.warn(f"Trial {trial_num}: Timeout")
+            self._finish_trial(end_planned)
             return True  # Passe à l'essai suivant
         
         # --- GESTION DE LA REPONSE ---
@@ -275,6 +341,7 @@ class DoorReward(BaseTask):
         
         if choice_idx == -1:
             self.logger.warn(f"Touche invalide: {key_pressed}")
+            self._finish_trial(end_planned)
             return True
         
         self.ParPort.send_trigger(self.codes['choice_made'])
@@ -290,12 +357,10 @@ class DoorReward(BaseTask):
                 self.doors_closed_stim[i].draw()  # Autres fermées
         
         self.score_stim.draw()
-        self.win.flip()
+        t_open = self.flip_and_stamp(trigger=self.codes['door_open'])
         
-        self.ParPort.send_trigger(self.codes['door_open'])
-        
-        # Délai pré-feedback (Jitter 1-2s pour découplage temporel)
-        core.wait(random.uniform(1.0, 2.0))
+        # Délai pré-feedback (Jitter 1-2s à somme fixe, pour découplage temporel)
+        self.wait_until(t_open + self.pre_fb[trial_num - 1], frame_aligned=True)
 
         # =====================================================================
         # PHASE 4 : FEEDBACK DE RECOMPENSE
@@ -310,7 +375,6 @@ class DoorReward(BaseTask):
         color = 'lime' if is_win else 'grey'
         trigger_code = self.codes['feedback_win'] if is_win else self.codes['feedback_neutral']
 
-        self.ParPort.send_trigger(trigger_code)
         self.log_trial_event('feedback_outcome', is_win=is_win, gain=gain, choice=choice_idx)
 
         # Affichage du feedback sur la porte choisie
@@ -327,24 +391,17 @@ class DoorReward(BaseTask):
         
         self.score_stim.text = f"Total: {self.total_gain} €"
         self.score_stim.draw()
-        self.win.flip()
+        t_fb = self.flip_and_stamp(trigger=trigger_code)  # Trigger calé sur l'affichage du feedback
 
         self.logger.log(f"Trial {trial_num} | Choice: {choice_idx} | Win: {is_win} | RT: {rt:.3f}s")
 
         # Durée affichage feedback
-        core.wait(1.5)
+        self.wait_until(t_fb + self.feedback_dur, frame_aligned=True)
 
         # =====================================================================
-        # PHASE 5 : ITI (Inter-Trial Interval)
+        # PHASE 5 : ITI (Inter-Trial Interval) jusqu'à l'ancre de fin
         # =====================================================================
-        self.fixation.draw()
-        self.win.flip()
-        
-        # ITI variable (Jitter 1-2.5s)
-        iti_duration = random.uniform(1.0, 2.5)
-        core.wait(iti_duration)
-        
-        self.log_trial_event('iti_end', iti_duration=iti_duration)
+        self._finish_trial(end_planned)
 
         return True
 
@@ -380,6 +437,10 @@ class DoorReward(BaseTask):
             )
             
             self.show_instructions(instructions_text)
+
+            # Timeline sur la période validée pendant le premier écran
+            self.build_design()
+            self.announce_run_length(5.0 + 0.5 + self.run_end_s + 5.0)
             
             # Instructions détaillées (2e écran)
             detailed_instr = (
@@ -409,8 +470,12 @@ class DoorReward(BaseTask):
             # =================================================================
             # 4. BOUCLE D'ESSAIS
             # =================================================================
+            origin = self.planned_now() + 0.5
+            onsets = self.timeline.onset_s
             for trial_num in range(1, self.n_trials + 1):
-                continue_exp = self.run_trial(trial_num)
+                end_rel = onsets[trial_num] if trial_num < self.n_trials else self.run_end_s
+                with self.profiler.span('trial'):
+                    continue_exp = self.run_trial(trial_num, origin + onsets[trial_num - 1], origin + end_rel)
                 
                 if not continue_exp:
                     raise KeyboardInterrupt  # Interruption propre
@@ -450,14 +515,11 @@ class DoorReward(BaseTask):
             # =================================================================
             self.logger.log("Nettoyage et sauvegarde...")
             
-            # 1. Arrêt EyeTracker
-            if self.eyetracker_actif:
-                self.EyeTracker.stop_recording()
-                self.EyeTracker.send_message("END_EXP")
-                self.EyeTracker.close_and_transfer_data(self.data_dir)
+            # 1. Arrêt EyeTracker (transfert EDF en arrière-plan)
+            self.stop_eyetracker()
             
             # 2. Sauvegarde des données (utilise la méthode de BaseTask)
-            self.save_data(
+            data_path = self.save_data(
                 data_list=self.global_records,
                 filename_suffix=""  # Pas de suffixe additionnel
             )
@@ -468,13 +530,11 @@ class DoorReward(BaseTask):
             else:
                 self.logger.warn("Expérience terminée prématurément.")
 
-            # QC auto sur dernier csv
-            list_of_files = glob.glob(os.path.join(self.data_dir, '*.csv'))
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
+            # QC auto sur le csv écrit
+            if data_path:
                 try:
-                    print(f"Lancement du QC sur : {latest_file}")
-                    qc_doorreward(latest_file)
+                    print(f"Lancement du QC sur : {data_path}")
+                    qc_doorreward(data_path)
                 except Exception as e:
                     print(f"Erreur lors du QC automatique : {e}")
 
@@ -1,14 +1,13 @@
 import os
 import sys
 import random
-import gc
-import glob
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from psychopy import visual, event, core
+from psychopy import visual
 from utils.base_task import BaseTask
 from utils.utils import should_quit
+from utils.timeline import TimelineBuilder
 from tasks.qc.qc_flanker import qc_flanker
 
 
@@ -22,6 +21,14 @@ class Flanker(BaseTask):
     - Logs courts par trial (congruent/incongruent + bon/mauvais + RT)
     """
 
+    # Colonnes typées des enregistrements (CSV ordonné + Parquet, cf. utils/columnar.py)
+    RECORD_SCHEMA = {
+        'trial_idx': 'int', 'condition': 'str', 'target': 'str', 'n_flank': 'int',
+        'stimulus': 'str',
+        'onset_planned': 'float', 'onset_goal': 'float', 'onset_time': 'float',
+        'rt': 'float', 'acc': 'int', 'isi_jitter': 'float', 'dropped_frames': 'int',
+    }
+
     def __init__(self, win, nom, session='01', enregistrer=True,
                  mode='fmri', n_trials=80,
                  stim_dur=0.75,              # <- augmenté (avant 0.5)
@@ -41,7 +48,8 @@ class Flanker(BaseTask):
             eyetracker_actif=eyetracker_actif,
             parport_actif=(mode == 'fmri' and parport_actif),
             enregistrer=enregistrer,
-            et_prefix="FLK"
+            et_prefix="FLK",
+            **kwargs
         )
 
         self.n_trials = n_trials
@@ -74,8 +82,12 @@ class Flanker(BaseTask):
 
         self.quit_key = 'escape'
         self.trials_design = []
+        self.timeline = None     # Compilée par compile_timeline (après validation du frame rate)
         self.global_records = []
 
+        # Période d'écran (cache) pour quantifier la timeline à la frame
+        self.measure_frame_rate()
+
     # ---------- Stimulus helpers (ASCII only) ----------
     def _build_flanker_string(self, target, condition):
         symbols = {'left': '<', 'right': '>'}
@@ -127,95 +139,105 @@ class Flanker(BaseTask):
                 'n_flank': 3
             })
 
-        # Warm cache (évite coût inattendu en run)
-        for s in {t['stimulus'] for t in self.trials_design}:
-            _ = self._get_stim(s)
-
-    def _wait_until(self, t_goal, relax=0.001):
-        while self.task_clock.getTime() < t_goal:
-            dt = t_goal - self.task_clock.getTime()
-            core.wait(min(relax, dt))
-
-    def run_trial(self, trial_idx, trial_data, onset_goal):
+    def compile_timeline(self):
+        """
+        Timeline figée : onsets relatifs quantifiés à la frame. À appeler après
+        show_instructions (validate_frame_rate a pu corriger le frame rate en cache).
+        """
+        builder = TimelineBuilder()
+        t = 0.0
+        for trial in self.trials_design:
+            builder.add(t, self.stim_dur, trial['stimulus'], self.codes[f"stim_{trial['condition']}"])
+            t += self.resp_window + trial['isi']
+        self.timeline = builder.compile(1.0 / self.frame_rate)
+        self.logger.log(f"Timeline compilée : {self.timeline.describe()}")
+
+        # Warm cache (évite coût inattendu en run), indexé par stim_id
+        self._stims = [self._get_stim(s) for s in self.timeline.stimuli]
+
+    def run_trial(self, trial_idx, trial_data, onset_planned):
         should_quit(self.win)
-        gc.disable()
-        event.clearEvents(eventType='keyboard')
-
-        trig_stim = self.codes[f"stim_{trial_data['condition']}"]
+        with self.gc.critical(), self.profiler.span('trial'):  # GC coupé pendant l'essai, rétabli même sur exception
+            self.kb.clear()
 
-        self._wait_until(onset_goal - 0.012)
+            tl = self.timeline
+            trig_stim = int(tl.code[trial_idx])
 
-        stim_obj = self._get_stim(trial_data['stimulus'])
+            # Onset recalé sur les TR reçus en mode tr_locked (sinon identique)
+            onset_goal = self.schedule_onset(onset_planned)
+            self.wait_until(onset_goal, frame_aligned=True)
 
-        # STIM ONSET
-        stim_obj.draw()
-        self.win.callOnFlip(self.ParPort.send_trigger, trig_stim)
-        self.win.flip()
-        onset_time = self.task_clock.getTime()
+            stim_obj = self._stims[tl.stim_id[trial_idx]]
 
-        t_stim_off = onset_time + self.stim_dur
-        t_resp_end = onset_time + self.resp_window
-        next_onset_anchor = onset_goal + self.resp_window + trial_data['isi']
-
-        resp_key = None
-        rt = None
-
-        while self.task_clock.getTime() < t_resp_end:
-            now = self.task_clock.getTime()
-
-            if now < t_stim_off:
+            # STIM ONSET
+            with self.profiler.span('draw'):
                 stim_obj.draw()
-            else:
-                self.fixation.draw()
-
-            self.win.flip()
-
-            if resp_key is None:
-                keys = event.getKeys(
-                    keyList=[self.keys['left'], self.keys['right'], self.quit_key],
-                    timeStamped=self.task_clock
-                )
-                if keys:
-                    k, t = keys[0]
-                    if k == self.quit_key:
-                        should_quit(self.win, quit=True)
-                    resp_key = k
-                    rt = t - onset_time
-                    self.ParPort.send_trigger(
-                        self.codes[f"resp_{'left' if k == self.keys['left'] else 'right'}"]
-                    )
-
-        correct_key = self.keys[trial_data['target']]
-        acc = 1 if resp_key == correct_key else 0
-
-        # ---- Petit log “style demandé” adapté au Flanker ----
-        if self.show_trial_logs:
-            trial_type = trial_data['condition']  # congruent / incongruent
-            # "word/ink" n'existe pas ici; on mappe vers stimulus/target
-            word = trial_data['stimulus']
-            ink = trial_data['target']
-            cong_str = "congruent" if trial_data['condition'] == "congruent" else "incongruent"
-            status = "bon" if acc == 1 else "mauvais"
-            rt_str = "NA" if rt is None else f"{rt:.3f}s"
-
-            log_msg = f"T{trial_idx+1}: {trial_type} | {word}/{ink} ({cong_str}) -> {status} [{rt_str}]"
-            print(log_msg)  # volontairement simple et court (console)
-
-        self.global_records.append({
-            'trial_idx': trial_idx + 1,
-            'condition': trial_data['condition'],
-            'target': trial_data['target'],
-            'n_flank': 3,
-            'stimulus': trial_data['stimulus'],
-            'onset_goal': onset_goal,
-            'onset_time': onset_time,
-            'rt': rt,
-            'acc': acc,
-            'isi_jitter': trial_data['isi']
-        })
-
-        gc.enable()
-        return next_onset_anchor
+            onset_time = self.flip_and_stamp(trigger=trig_stim)
+            self.frames.add_late(onset_time, onset_goal)
+            self.frames.begin()  # Boucle de réponse : rendu à chaque frame
+
+            t_stim_off = onset_time + tl.dur_s[trial_idx]
+            t_resp_end = onset_time + self.resp_window
+
+            resp_key = None
+            rt = None
+
+            while self.task_clock.getTime() < t_resp_end:
+                with self.profiler.span('flanker.response_frame'):
+                    now = self.task_clock.getTime()
+
+                    if now < t_stim_off:
+                        stim_obj.draw()
+                    else:
+                        self.fixation.draw()
+
+                    self.win.flip()
+
+                    if resp_key is None:
+                        # Temps d'appui horodaté par le clavier (indépendant du rythme de la boucle)
+                        keys = self.kb.get(keyList=[self.keys['left'], self.keys['right'], self.quit_key])
+                        if keys:
+                            k, t = keys[0]
+                            if k == self.quit_key:
+                                should_quit(self.win, quit=True)
+                            resp_key = k
+                            rt = t - onset_time
+                            self.ParPort.send_trigger(
+                                self.codes[f"resp_{'left' if k == self.keys['left'] else 'right'}"]
+                            )
+
+            dropped = self.frames.end_trial(f"T{trial_idx+1}")
+
+            correct_key = self.keys[trial_data['target']]
+            acc = 1 if resp_key == correct_key else 0
+
+            # ---- Petit log “style demandé” adapté au Flanker ----
+            if self.show_trial_logs:
+                trial_type = trial_data['condition']  # congruent / incongruent
+                # "word/ink" n'existe pas ici; on mappe vers stimulus/target
+                word = trial_data['stimulus']
+                ink = trial_data['target']
+                cong_str = "congruent" if trial_data['condition'] == "congruent" else "incongruent"
+                status = "bon" if acc == 1 else "mauvais"
+                rt_str = "NA" if rt is None else f"{rt:.3f}s"
+
+                log_msg = f"T{trial_idx+1}: {trial_type} | {word}/{ink} ({cong_str}) -> {status} [{rt_str}]"
+                print(log_msg)  # volontairement simple et court (console)
+
+            self.global_records.append({
+                'trial_idx': trial_idx + 1,
+                'condition': trial_data['condition'],
+                'target': trial_data['target'],
+                'n_flank': 3,
+                'stimulus': trial_data['stimulus'],
+                'onset_planned': float(onset_planned),
+                'onset_goal': onset_goal,
+                'onset_time': onset_time,
+                'rt': rt,
+                'acc': acc,
+                'isi_jitter': trial_data['isi'],
+                'dropped_frames': dropped
+            })
 
     def run(self):
         try:
@@ -232,23 +254,28 @@ class Flanker(BaseTask):
                 "Appuyez sur une touche pour commencer."
             )
             self.show_instructions(instr)
+            self.compile_timeline()  # Frame rate validé
 
             self.wait_for_trigger()
             self.show_resting_state(5.0)
 
-            next_onset = self.task_clock.getTime() + 0.5
+            # Origine de la timeline : la boucle ne fait qu'indexer les onsets compilés
+            origin = self.planned_now() + 0.5
+            onsets = self.timeline.onset_s
 
             for i, trial_data in enumerate(self.trials_design):
-                next_onset = self.run_trial(i, trial_data, next_onset)
+                self.run_trial(i, trial_data, origin + onsets[i])
+                # ITI : collecte GC gén. 0/1 si la marge avant le prochain onset le permet
+                if i + 1 < len(onsets):
+                    self.gc.collect_idle(self.schedule_onset(origin + onsets[i + 1]))
 
             self.show_resting_state(5.0)
 
         finally:
-            self.save_data(self.global_records)
-            list_of_files = glob.glob(os.path.join(self.data_dir, '*.csv'))
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
+            self.stop_eyetracker()  # Transfert EDF en arrière-plan
+            data_path = self.save_data(self.global_records)
+            if data_path:
                 try:
-                    qc_flanker(latest_file)
+                    qc_flanker(data_path)
                 except Exception:
                     pass
\ No newline at end of file
@@ -1,14 +1,13 @@
 import os
 import sys
 import random
-import gc
-import glob
 
 # Import relatif si exécuté depuis tasks/
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from psychopy import visual, event, core
+from psychopy import visual, core
 from utils.base_task import BaseTask
+from utils.timeline import TimelineBuilder
 from utils.utils import should_quit
 
 # QC
@@ -31,6 +30,17 @@ class NBack(BaseTask):
     - Timing: ancrage par onset_goal (drift control) conservé
     """
 
+    # Colonnes typées des enregistrements (CSV ordonné + Parquet, cf. utils/columnar.py)
+    RECORD_SCHEMA = {
+        'participant': 'str', 'session': 'str', 'task_name': 'str', 'mode': 'str',
+        'trial_number': 'int', 'block_N_level': 'int', 'is_increm': 'bool',
+        'letter': 'str', 'is_target': 'bool',
+        'onset_planned': 'float', 'onset_goal': 'float', 'onset_time': 'float',
+        'dropped_frames': 'int', 'stim_dur': 'float', 'isi': 'float',
+        'rt': 'float', 'resp_key': 'str', 'accuracy': 'int', 'status': 'str',
+        'trigger_stim': 'int', 'trigger_resp': 'int',
+    }
+
     def __init__(self, win, nom, session='01', enregistrer=True,
                  mode='fmri', N=2, n_trials=30, target_ratio=0.3,
                  stim_dur=0.5, isi=1.5,
@@ -46,7 +56,8 @@ class NBack(BaseTask):
             eyetracker_actif=eyetracker_actif,
             parport_actif=(mode == 'fmri' and parport_actif),
             enregistrer=enregistrer,
-            et_prefix="NBK"
+            et_prefix="NBK",
+            **kwargs
         )
 
         # ----------------------------
@@ -86,6 +97,7 @@ class NBack(BaseTask):
             self.win, text='', color='white',
             height=0.18, font='Arial'
         )
+        self._letter_stims = {}  # Une TextStim par lettre (créées à la compilation)
 
         # Réponses
         if self.mode == 'fmri':
@@ -99,16 +111,16 @@ class NBack(BaseTask):
         # ----------------------------
         # TIMING GLOBAL (figé)
         # ----------------------------
-        # Mesuré UNE SEULE FOIS pour éviter toute instabilité pendant la tâche
-        try:
-            fr = self.win.getActualFrameRate()
-            if fr is None or fr <= 0:
-                raise RuntimeError("Frame rate non mesurable")
-            self.frame_rate = float(round(fr))
-        except Exception:
-            # fallback sûr IRMf
-            self.frame_rate = 60.0
+        # Mesuré UNE SEULE FOIS (ou lu dans le cache) pour éviter toute instabilité pendant la tâche
+        self.measure_frame_rate(default=60.0)  # fallback sûr IRMf
 
+    # ======================================================================
+    # TIMING UTIL
+    # ======================================================================
+
+    def _apply_frame_rate(self, rate):
+        """Frame rate arrondi et grandeurs dérivées (appelé par BaseTask)."""
+        super()._apply_frame_rate(float(round(rate)))
         self.frame_duration = 1.0 / self.frame_rate
         self.frame_tolerance = self.frame_duration / 2.0
 
@@ -117,19 +129,6 @@ class NBack(BaseTask):
             f"frame_duration={self.frame_duration*1000:.2f} ms"
         )
 
-    # ======================================================================
-    # TIMING UTIL
-    # ======================================================================
-
-    def _wait_until(self, t_goal, relax=0.002):
-        """Attente active légère jusqu'à t_goal (horloge task_clock)."""
-        while True:
-            now = self.task_clock.getTime()
-            dt = t_goal - now
-            if dt <= 0:
-                return
-            core.wait(min(relax, dt))
-
     def _send_trigger_safe(self, code):
         """Envoie un trigger si ParPort disponible/actif."""
         if getattr(self, "ParPort", None) is None:
@@ -140,15 +139,6 @@ class NBack(BaseTask):
             # On évite de planter une séance si le port parallèle bugge
             pass
 
-    def _record_onset(self):
-        """Fonction appelée via win.callOnFlip pour marquer précisément l'onset."""
-        # on lit l'horloge de la tâche juste après le flip
-        self._last_onset_time = self.task_clock.getTime()
-
-    
-
-
-
     # ======================================================================
     # GENERATION SEQUENCE
     # ======================================================================
@@ -212,126 +202,135 @@ class NBack(BaseTask):
     # TRIAL EXECUTION
     # ======================================================================
 
-    def run_trial(self, trial_idx_global, letter, is_target, current_N, onset_goal):
+    def compile_block(self, block_sequence):
+        """
+        Timeline du bloc (onsets relatifs à l'origine du bloc, quantifiés à la frame)
+        et TextStim préconstruites pour chaque lettre utilisée.
+        """
+        builder = TimelineBuilder()
+        trial_len = self.stim_dur + self.isi
+        for i, (letter, is_target) in enumerate(block_sequence):
+            code = self.codes['stim_target'] if is_target else self.codes['stim_nontarget']
+            builder.add(i * trial_len, self.stim_dur, letter, code)
+        timeline = builder.compile(self.frame_duration)
+
+        for letter in timeline.stimuli:
+            if letter not in self._letter_stims:
+                self._letter_stims[letter] = visual.TextStim(
+                    self.win, text=letter, color='white',
+                    height=self.letter_stim.height, font=self.letter_stim.font
+                )
+        return timeline
+
+    def run_trial(self, trial_idx_global, letter, is_target, current_N, onset_planned,
+                  stim_dur=None, trig_stim=None):
         should_quit(self.win)
-        gc.disable()
-        event.clearEvents(eventType='keyboard')
-
-        trig_stim = self.codes['stim_target'] if is_target else self.codes['stim_nontarget']
-
-        wait_target = onset_goal - self.frame_tolerance
-        if self.advance_frame:
-            wait_target -= self.frame_duration
-
-
-        # attente active jusqu'au moment calculé
-        self._wait_until(wait_target)
-
-        # --- Stim onset ---
-        self.letter_stim.text = letter
-        self.letter_stim.draw()
-
-        # Préparer l'envoi de trigger ET la capture d'onset au moment du flip
-        # callOnFlip exécute juste après le buffer swap (très précis).
-        if getattr(self, "ParPort", None) is not None:
-            self.win.callOnFlip(self._send_trigger_safe, trig_stim)
-
-        # Marquer l'onset sur l'horloge de la tâche au flip
-        self.win.callOnFlip(self._record_onset)
-
-        # flip: le _record_onset sera appelé au moment du swap
-        self.win.flip()
-
-        # Récupère le timestamp que _record_onset a stocké ; sinon fallback immédiat
-        onset_time = getattr(self, '_last_onset_time', None)
-        if onset_time is None:
-            onset_time = self.task_clock.getTime()
-
-        t_stim_end = onset_time + self.stim_dur
-        t_trial_end_absolute = onset_goal + self.stim_dur + self.isi
-
-        resp_key = None
-        rt = None
-
-        # Réponse pendant le stimulus
-        while self.task_clock.getTime() < t_stim_end and resp_key is None:
-            keys = event.getKeys(
-                keyList=self.response_keys + [self.quit_key],
-                timeStamped=self.task_clock
-            )
-            if keys:
-                k, t = keys[0]
-                if k == self.quit_key:
-                    should_quit(self.win, quit=True)
-                resp_key = k
-                rt = t - onset_time
-
-        # Fixation
-        self.fixation.draw()
-        if getattr(self, "ParPort", None) is not None:
-            self.win.callOnFlip(self._send_trigger_safe, self.codes['fixation'])
-        self.win.flip()
-
-        # Réponse pendant ISI
-        while self.task_clock.getTime() < t_trial_end_absolute and resp_key is None:
-            keys = event.getKeys(
-                keyList=self.response_keys + [self.quit_key],
-                timeStamped=self.task_clock
-            )
-            if keys:
-                k, t = keys[0]
-                if k == self.quit_key:
-                    should_quit(self.win, quit=True)
-                resp_key = k
-                rt = t - onset_time
-
-        # Si réponse, on attend la fin stricte du trial pour coller à l'onset_goal
-        if resp_key is not None:
-            self._wait_until(t_trial_end_absolute)
-
-        # Scoring
-        if resp_key is None:
-            acc = 0 if is_target else 1
-            status = "MISS" if is_target else "CR"
-            trig_resp = 0
-        else:
-            acc = 1 if is_target else 0
-            status = "HIT" if is_target else "FA"
-            trig_resp = self.codes['resp']
-            self._send_trigger_safe(trig_resp)
+        with self.gc.critical(), self.profiler.span('trial'):  # GC coupé pendant l'essai, rétabli même sur exception
+            self.kb.clear()
+
+            if trig_stim is None:
+                trig_stim = self.codes['stim_target'] if is_target else self.codes['stim_nontarget']
+            stim_dur = self.stim_dur if stim_dur is None else stim_dur
+
+            # Onset recalé sur les TR reçus en mode tr_locked (sinon identique)
+            onset_goal = self.schedule_onset(onset_planned)
+            wait_target = onset_goal - self.frame_duration if self.advance_frame else onset_goal
+
+            # attente (sommeil + attente active) jusqu'à une demi-frame avant l'onset
+            self.wait_until(wait_target, frame_aligned=True)
+
+            # --- Stim onset ---
+            stim = self._letter_stims.get(letter)
+            if stim is None:
+                stim = self.letter_stim
+                stim.text = letter
+            with self.profiler.span('draw'):
+                stim.draw()
+
+            # Trigger envoyé au swap, onset = timestamp du flip (task_clock)
+            onset_time = self.flip_and_stamp(trigger=trig_stim)
+            self.frames.add_late(onset_time, onset_goal)
+
+            t_stim_end = onset_time + stim_dur
+            t_trial_end_absolute = onset_goal + stim_dur + self.isi
+
+            resp_key = None
+            rt = None
+
+            # Réponse pendant le stimulus
+            with self.profiler.span('nback.stim_response'):
+                while self.task_clock.getTime() < t_stim_end and resp_key is None:
+                    keys = self.kb.get(keyList=self.response_keys + [self.quit_key])
+                    if keys:
+                        k, t = keys[0]
+                        if k == self.quit_key:
+                            should_quit(self.win, quit=True)
+                        resp_key = k
+                        rt = t - onset_time
+
+            # Fixation
+            self.fixation.draw()
+            self.flip_and_stamp(trigger=self.codes['fixation'])
+
+            # Réponse pendant ISI
+            while self.task_clock.getTime() < t_trial_end_absolute and resp_key is None:
+                keys = self.kb.get(keyList=self.response_keys + [self.quit_key])
+                if keys:
+                    k, t = keys[0]
+                    if k == self.quit_key:
+                        should_quit(self.win, quit=True)
+                    resp_key = k
+                    rt = t - onset_time
+
+            # Si réponse, on attend la fin stricte du trial pour coller à l'onset_goal
+            if resp_key is not None:
+                self.wait_until(t_trial_end_absolute)
+
+            # Scoring
+            if resp_key is None:
+                acc = 0 if is_target else 1
+                status = "MISS" if is_target else "CR"
+                trig_resp = 0
+            else:
+                acc = 1 if is_target else 0
+                status = "HIT" if is_target else "FA"
+                trig_resp = self.codes['resp']
+                self._send_trigger_safe(trig_resp)
 
-        rt_str = f"{rt:.3f}s" if rt is not None else "---"
-        self.logger.log(f"T{trial_idx_global:03d} (N={current_N}) | {letter} | {status} | RT:{rt_str}")
+            dropped = self.frames.end_trial(f"T{trial_idx_global:03d}")
 
-        self.global_records.append({
-            'participant': self.nom,
-            'session': self.session,
-            'task_name': self.task_name,
-            'mode': self.mode,
+            rt_str = f"{rt:.3f}s" if rt is not None else "---"
+            self.logger.log(f"T{trial_idx_global:03d} (N={current_N}) | {letter} | {status} | RT:{rt_str}")
 
-            'trial_number': trial_idx_global,
-            'block_N_level': current_N,
-            'is_increm': self.increm,
+            self.global_records.append({
+                'participant': self.nom,
+                'session': self.session,
+                'task_name': self.task_name,
+                'mode': self.mode,
 
-            'letter': letter,
-            'is_target': bool(is_target),
+                'trial_number': trial_idx_global,
+                'block_N_level': current_N,
+                'is_increm': self.increm,
 
-            'onset_goal': float(onset_goal),
-            'onset_time': float(onset_time),
+                'letter': letter,
+                'is_target': bool(is_target),
 
-            'stim_dur': float(self.stim_dur),
-            'isi': float(self.isi),
+                'onset_planned': float(onset_planned),
+                'onset_goal': float(onset_goal),
+                'onset_time': float(onset_time),
+                'dropped_frames': int(dropped),
 
-            'rt': None if rt is None else float(rt),
-            'resp_key': resp_key,
-            'accuracy': int(acc),
-            'status': status,
+                'stim_dur': float(stim_dur),
+                'isi': float(self.isi),
 
-            'trigger_stim': int(trig_stim),
-            'trigger_resp': int(trig_resp) if trig_resp else 0
-        })
+                'rt': None if rt is None else float(rt),
+                'resp_key': resp_key,
+                'accuracy': int(acc),
+                'status': status,
 
-        gc.enable()
+                'trigger_stim': int(trig_stim),
+                'trigger_resp': int(trig_resp) if trig_resp else 0
+            })
 
 
     # ======================================================================
@@ -362,40 +361,59 @@ class NBack(BaseTask):
 
             global_trial_counter = 1
 
+            # A) Séquences de tous les blocs, tirées avant le trigger
+            blocks = [(n_level, self.generate_block_sequence(n_level, trials_per_block))
+                      for n_level in levels]
+            timelines = []
+
             # Boucle sur blocs
-            for i_block, n_level in enumerate(levels):
-                # A) Séquence bloc
-                block_sequence = self.generate_block_sequence(n_level, trials_per_block)
+            for i_block, (n_level, block_sequence) in enumerate(blocks):
 
-                # B) Instructions auto (3s)
+                # B) Instructions auto (3s), mises à profit pour vérifier le frame rate en cache
                 self.instr_stim.text = self.get_instruction_for_level(n_level)
                 self.instr_stim.draw()
                 self.win.flip()
-                core.wait(self.instr_dur)
+                t_instr_end = core.getTime() + self.instr_dur
+                self.validate_frame_rate(draw=self.instr_stim.draw)
+                if i_block == 0:
+                    # Timelines de tous les blocs compilées sur la période validée,
+                    # pendant l'écran d'instructions du 1er bloc (avant le trigger)
+                    timelines = [self.compile_block(seq) for _, seq in blocks]
+                    for k, tl in enumerate(timelines):
+                        self.logger.log(f"Timeline bloc {k + 1} : {tl.describe()}")
+                timeline = timelines[i_block]
+                if timeline.frame_period != self.frame_duration:
+                    # Période modifiée depuis la compilation : recompilation du bloc
+                    timeline = timelines[i_block] = self.compile_block(block_sequence)
+                    self.logger.warn(f"Timeline bloc {i_block + 1} recompilée : {timeline.describe()}")
+                core.wait(max(0.0, t_instr_end - core.getTime()))
 
                 # C) Sync IRMf: seulement au début du 1er bloc
                 if i_block == 0 and self.mode == 'fmri':
                     self.wait_for_trigger()  # reset clock + start_exp trigger + ET start
+                elif i_block == 0:
+                    self.start_record_stream()  # Sans trigger : flux démarré ici
 
                 # D) Baseline avant bloc (si tu veux garder)
                 self.show_resting_state(duration_s=5.0, code_start_key='rest_start', code_end_key='rest_end')
 
-                # E) Initialisation timing bloc
-                start_anchor = self.task_clock.getTime() + 0.5
-                trial_len = self.stim_dur + self.isi
+                # E) Origine de la timeline du bloc
+                start_anchor = self.planned_now() + 0.5
+                onsets, durs, codes = timeline.onset_s, timeline.dur_s, timeline.code
 
                 self.fixation.draw()
                 self.win.flip()
 
                 # F) Trials
-                for i, (letter, is_target) in enumerate(block_sequence, 1):
-                    onset_goal = start_anchor + (i - 1) * trial_len
+                for i, (letter, is_target) in enumerate(block_sequence):
                     self.run_trial(
                         trial_idx_global=global_trial_counter,
                         letter=letter,
                         is_target=is_target,
                         current_N=n_level,
-                        onset_goal=onset_goal
+                        onset_planned=start_anchor + onsets[i],
+                        stim_dur=durs[i],
+                        trig_stim=int(codes[i])
                     )
                     global_trial_counter += 1
 
@@ -407,15 +425,14 @@ class NBack(BaseTask):
             raise
 
         finally:
+            self.stop_eyetracker()  # Transfert EDF en arrière-plan
             # Sauvegarde
-            self.save_data(self.global_records)
+            data_path = self.save_data(self.global_records)
 
-            # QC auto sur dernier csv
-            list_of_files = glob.glob(os.path.join(self.data_dir, '*.csv'))
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
+            # QC auto sur le csv écrit
+            if data_path:
                 try:
-                    print(f"Lancement du QC sur : {latest_file}")
-                    qc_nback(latest_file)
+                    print(f"Lancement du QC sur : {data_path}")
+                    qc_nback(data_path)
                 except Exception as e:
                     print(f"Erreur lors du QC automatique : {e}")
\ No newline at end of file
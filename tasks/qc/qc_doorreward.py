@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from tasks.qc.qc_frames import qc_frames
+from utils.columnar import read_records
 
 def qc_doorreward(csv_path):
     """
@@ -24,7 +26,7 @@ def qc_doorreward(csv_path):
     print(f"[QC] Lancement QC DoorReward : {os.path.basename(csv_path)}")
 
     try:
-        df = pd.read_csv(csv_path)
+        df = read_records(csv_path)  # Parquet typé si présent, sinon CSV
     except Exception as e:
         print(f"[QC] Erreur lecture CSV : {e}")
         return
@@ -141,6 +143,7 @@ def qc_doorreward(csv_path):
     save_path = os.path.join(qc_dir, png_name)
     plt.savefig(save_path, dpi=100)
     plt.close()
+    qc_frames(csv_path)  # Histogramme des frames (si présent)
 
     # ------------------------------------------------------------------
     # RÉSUMÉ RAPIDE CONSOLE
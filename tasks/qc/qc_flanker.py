@@ -3,6 +3,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from tasks.qc.qc_frames import qc_frames
+from utils.columnar import read_records
 
 def qc_flanker(csv_path):
     """
@@ -21,7 +23,7 @@ def qc_flanker(csv_path):
     print(f"--- Lancement du QC sur {os.path.basename(csv_path)} ---")
 
     try:
-        df = pd.read_csv(csv_path)
+        df = read_records(csv_path)  # Parquet typé si présent, sinon CSV
     except Exception as e:
         print(f"QC Error: Impossible de lire le CSV. {e}")
         return
@@ -41,6 +43,12 @@ def qc_flanker(csv_path):
     # Calcul du drift temporel
     df['drift_ms'] = (df['onset_time'] - df['onset_goal']) * 1000
 
+    # Mode TR-lock : correction appliquée aux onsets planifiés (dérive PC/scanner)
+    if 'onset_planned' in df.columns:
+        corr_ms = (df['onset_goal'] - df['onset_planned']) * 1000
+        print(f"QC Info: Correction TR-lock {corr_ms.iloc[0]:+.1f} -> {corr_ms.iloc[-1]:+.1f} ms, "
+              f"erreur résiduelle {df['drift_ms'].abs().mean():.1f} ms")
+
     # --- 2. MÉTRIQUES ---
     # Taux de réponse correcte par condition
     response_summary = df.groupby('condition')['acc'].agg(['mean', 'count'])
@@ -104,5 +112,6 @@ def qc_flanker(csv_path):
     save_path = os.path.join(qc_dir, png_name)
     plt.savefig(save_path, dpi=100)
     plt.close()
+    qc_frames(csv_path)  # Histogramme des frames (si présent)
 
     print(f"QC Réussi : {save_path}")
@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+import matplotlib.pyplot as plt
+import numpy as np
+
+def qc_frames(csv_path):
+    """
+    QC Frames - commun à toutes les tâches.
+    Lit l'histogramme <stem>_frames.csv écrit à côté du CSV principal
+    (cf. BaseTask / FrameMonitor) et produit <stem>_frames_QC.png.
+    Retourne le nombre de frames perdues (None si pas d'histogramme).
+    """
+    frames_path = os.path.splitext(csv_path)[0] + '_frames.csv'
+    if not os.path.exists(frames_path):
+        return None
+
+    try:
+        with open(frames_path, 'r', encoding='utf-8') as f:
+            header = f.readline().lstrip('# ').split()
+        meta = dict(item.split('=') for item in header if '=' in item)
+        period_ms = float(meta.get('frame_period_ms', 'nan'))
+        n_late = int(meta.get('n_late_frames', 0))
+        hist = pd.read_csv(frames_path, comment='#')
+    except Exception as e:
+        print(f"QC Warning: Histogramme frames illisible. {e}")
+        return None
+
+    if hist.empty:
+        return None
+
+    centers = (hist['bin_start_ms'] + hist['bin_end_ms']) / 2.0
+    counts = hist['count'].to_numpy()
+    n_total = int(counts.sum())
+
+    # Frames perdues : intervalles > 1.5 frame (cf. FrameMonitor)
+    n_dropped = 0
+    if np.isfinite(period_ms):
+        slow = centers > 1.5 * period_ms
+        n_dropped = int(np.sum((np.round(centers[slow] / period_ms) - 1) * counts[slow]))
+
+    qc_dir = os.path.join(os.path.dirname(csv_path), 'qc')
+    os.makedirs(qc_dir, exist_ok=True)
+
+    fig, ax = plt.subplots(figsize=(9, 5))
+    ax.bar(centers, counts, width=(hist['bin_end_ms'] - hist['bin_start_ms']), color='slateblue')
+    if np.isfinite(period_ms):
+        ax.axvline(period_ms, color='green', linestyle='--', label=f"1 frame ({period_ms:.2f} ms)")
+        ax.axvline(1.5 * period_ms, color='red', linestyle=':', label="Seuil frame perdue")
+        ax.legend()
+    ax.set_yscale('log')
+    ax.set_title(f"Intervalles entre frames (n={n_total}) | perdues: {n_dropped} | flips en retard: {n_late}")
+    ax.set_xlabel("Intervalle (ms)")
+    ax.set_ylabel("Nombre (log)")
+
+    plt.tight_layout()
+    png_name = os.path.basename(csv_path).replace('.csv', '_frames_QC.png')
+    save_path = os.path.join(qc_dir, png_name)
+    plt.savefig(save_path, dpi=100)
+    plt.close()
+
+    print(f"QC Frames : {n_dropped} frame(s) perdue(s) sur {n_total} intervalles, "
+          f"{n_late} flip(s) en retard -> {save_path}")
+    return n_dropped
@@ -4,6 +4,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from tasks.qc.qc_frames import qc_frames
+from utils.columnar import read_records
 
 
 print("QC NBACK LOADED FROM:", __file__)
@@ -65,7 +67,7 @@ def qc_nback(csv_path):
 
         print(f"--- QC N-Back (Post-Proc): {os.path.basename(csv_path)} ---")
 
-        df = pd.read_csv(csv_path)
+        df = read_records(csv_path)  # Parquet typé si présent, sinon CSV
 
         qc_dir = os.path.join(os.path.dirname(csv_path), 'qc')
         os.makedirs(qc_dir, exist_ok=True)
@@ -88,32 +90,21 @@ def qc_nback(csv_path):
             is_inc = False
         mode_str = "Progressif (Blocs)" if is_inc else "Fixe"
 
-        # drift
+        # drift (colonnes déjà typées par read_records)
         if 'onset_time' in df.columns and 'onset_goal' in df.columns:
-            df['onset_time'] = pd.to_numeric(df['onset_time'], errors='coerce')
-            df['onset_goal'] = pd.to_numeric(df['onset_goal'], errors='coerce')
             df['drift_ms'] = (df['onset_time'] - df['onset_goal']) * 1000.0
             print("QC Info: Drift calculé avec succès.")
+            # Mode TR-lock : correction appliquée aux onsets planifiés (dérive PC/scanner)
+            if 'onset_planned' in df.columns:
+                corr_ms = (df['onset_goal'] - df['onset_planned']) * 1000.0
+                print(f"QC Info: Correction TR-lock {corr_ms.iloc[0]:+.1f} -> {corr_ms.iloc[-1]:+.1f} ms, "
+                      f"erreur résiduelle {df['drift_ms'].abs().mean():.1f} ms")
         else:
             df['drift_ms'] = np.nan
 
-        # types
-        if 'trial_number' in df.columns:
-            df['trial_number'] = pd.to_numeric(df['trial_number'], errors='coerce')
-
-        if 'rt' in df.columns:
-            df['rt'] = pd.to_numeric(df['rt'], errors='coerce')
-
         if 'is_target' in df.columns:
-            if df['is_target'].dtype != bool:
-                df['is_target'] = df['is_target'].astype(str).str.lower().map(
-                    {'true': True, 'false': False, '1': True, '0': False}
-                )
             df['is_target'] = df['is_target'].fillna(False).astype(bool)
 
-        if 'accuracy' in df.columns:
-            df['accuracy'] = pd.to_numeric(df['accuracy'], errors='coerce')
-
         if 'status' not in df.columns:
             df['status'] = "NA"
 
@@ -265,6 +256,7 @@ def qc_nback(csv_path):
         save_path = os.path.join(qc_dir, png_name)
         plt.savefig(save_path, dpi=120)
         plt.close()
+        qc_frames(csv_path)  # Histogramme des frames (si présent)
         print(f"QC Terminé. Image sauvegardée : {save_path}")
 
     except Exception as e:
@@ -1,8 +1,9 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from tasks.qc.qc_frames import qc_frames
+from utils.columnar import read_records
 
 def qc_stroop(csv_path):
     """
@@ -21,7 +22,7 @@ def qc_stroop(csv_path):
     print(f"--- Lancement du QC sur {os.path.basename(csv_path)} ---")
 
     try:
-        df = pd.read_csv(csv_path)
+        df = read_records(csv_path)  # Parquet typé si présent, sinon CSV
     except Exception as e:
         print(f"QC Error: Impossible de lire le CSV. {e}")
         return
@@ -79,9 +80,10 @@ def qc_stroop(csv_path):
 
     # FIG 4: DISTRIBUTION DES ISI/JITTER
     ax = axes[1, 0]
-    # Supposons que l'ISI est calculé comme la différence entre les onsets (à adapter selon ton CSV)
-    if 'onset_time' in df.columns:
-        df['isi'] = df['onset_time'].diff().dropna()
+    # ISI enregistré par essai (design) ; sinon différence entre onsets (anciens CSV)
+    if 'isi' not in df.columns and 'onset_time' in df.columns:
+        df['isi'] = df['onset_time'].diff()
+    if 'isi' in df.columns:
         sns.histplot(df['isi'].dropna(), kde=True, ax=ax, color='purple')
         ax.set_title(f"4. Distribution ISI\nMoyenne: {df['isi'].mean():.2f}s")
         ax.set_xlabel("ISI (s)")
@@ -104,10 +106,17 @@ def qc_stroop(csv_path):
     ax.set_xlabel("Code Trigger")
     ax.set_ylabel("Nombre d'Essais")
 
+    # Dérive onset réel vs onset absolu visé
+    if 'onset_goal' in df.columns and 'onset_time' in df.columns:
+        drift_ms = (df['onset_time'] - df['onset_goal']) * 1000.0
+        print(f"QC Stroop : dérive d'onset moyenne {drift_ms.mean():.1f} ms, "
+              f"max {drift_ms.abs().max():.1f} ms")
+
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
     png_name = os.path.basename(csv_path).replace('.csv', '_QC.png')
     save_path = os.path.join(qc_dir, png_name)
     plt.savefig(save_path, dpi=100)
     plt.close()
+    qc_frames(csv_path)  # Histogramme des frames (si présent)
 
     print(f"QC Réussi : {save_path}")
@@ -3,6 +3,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from tasks.qc.qc_frames import qc_frames
+from utils.columnar import read_records
 
 def qc_temporaljudgement(csv_path):
     """
@@ -21,7 +23,7 @@ def qc_temporaljudgement(csv_path):
     print(f"--- Lancement du QC sur {os.path.basename(csv_path)} ---")
     
     try:
-        df = pd.read_csv(csv_path)
+        df = read_records(csv_path)  # Parquet typé si présent, sinon CSV
     except Exception as e:
         print(f"QC Error: Impossible de lire le CSV. {e}")
         return
@@ -105,5 +107,6 @@ def qc_temporaljudgement(csv_path):
     save_path = os.path.join(qc_dir, png_name)
     plt.savefig(save_path, dpi=100)
     plt.close()
+    qc_frames(csv_path)  # Histogramme des frames (si présent)
     
     print(f"QC Réussi : {save_path}")
\ No newline at end of file
@@ -11,15 +11,14 @@ Date : Janvier 2026
 import random
 import sys
 import os
-import gc
-import glob
 
 # Astuce pour importer utils depuis le sous-dossier tasks/
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from psychopy import visual, event, core
+from psychopy import visual
 from utils.base_task import BaseTask
 from utils.utils import should_quit
+from utils.timeline import TimelineBuilder, balanced_jitter
 from tasks.qc.qc_stroop import qc_stroop
 
 class Stroop(BaseTask):
@@ -27,6 +26,15 @@ class Stroop(BaseTask):
     Tâche Stroop héritant de BaseTask.
     """
 
+    # Colonnes typées des enregistrements (CSV ordonné + Parquet, cf. utils/columnar.py)
+    RECORD_SCHEMA = {
+        'participant': 'str', 'session': 'str', 'trial_number': 'int',
+        'onset_planned': 'float', 'onset_goal': 'float', 'onset_time': 'float', 'isi': 'float',
+        'trial_type': 'str', 'word': 'str', 'ink': 'str', 'congruent': 'bool',
+        'response_key': 'str', 'rt': 'float', 'accuracy': 'int', 'status': 'str',
+        'trigger_stim': 'int', 'trigger_resp': 'int', 'dropped_frames': 'int',
+    }
+
     def __init__(self, win, nom, session='01', enregistrer=True, 
                  mode='fmri', n_trials=80, n_choices=4, go_nogo=False,
                  stim_dur=2.0, isi_range=(1500, 2500),
@@ -42,7 +50,8 @@ class Stroop(BaseTask):
             et_prefix="STR",
             eyetracker_actif=eyetracker_actif,
             parport_actif=(mode == 'fmri' and parport_actif), # Sécurité si pas fMRI
-            enregistrer=enregistrer
+            enregistrer=enregistrer,
+            **kwargs
         )
 
         # 2. PARAMÈTRES SPÉCIFIQUES STROOP
@@ -92,7 +101,12 @@ class Stroop(BaseTask):
         self._setup_keys()
 
         # Stimuli Spécifiques (Fixation et Instructions sont gérés par BaseTask)
-        self.stroop_stim = visual.TextStim(self.win, text='', height=0.15, bold=True)
+        self._stims = []         # Une TextStim par (mot, encre), indexée par stim_id
+        self.timeline = None     # Compilée après validation du frame rate (cf. compile_timeline)
+        self.run_end_s = 0.0     # Fin du dernier ISI, relative à l'origine
+
+        # Période d'écran (cache) pour quantifier la timeline à la frame
+        self.measure_frame_rate()
         
         # Liste pour stockage
         self.global_records = [] 
@@ -113,9 +127,11 @@ class Stroop(BaseTask):
     # LOGIQUE ESSAI (TRIAL)
     # =========================================================================
 
-    def run_trial(self, trial_idx, trial_data):
-        """Exécute un essai unique."""
+    def run_trial(self, trial_idx, trial_data, onset_planned):
+        """Exécute un essai unique, à l'onset absolu onset_planned."""
         
+        idx = trial_idx - 1
+        tl = self.timeline
         word = trial_data['word']
         ink = trial_data['ink']
         congruent = trial_data['congruent']
@@ -123,103 +139,106 @@ class Stroop(BaseTask):
 
         # Préparation
         should_quit(self.win)
-        gc.disable() 
-        
-        self.stroop_stim.text = word
-        self.stroop_stim.color = self.colors_hex[ink]
-        
-        trig_stim = self.codes['stim_congruent'] if congruent else self.codes['stim_incongruent']
-
-        # 1. Fixation
-        self.fixation.draw()
-        self.win.flip()
-
-        # 2. Stimulus Onset
-        self.stroop_stim.draw()
-        self.win.callOnFlip(self.ParPort.send_trigger, trig_stim)
-        
-        if self.eyetracker_actif:
-             self.win.callOnFlip(self.EyeTracker.send_message, f"TRIAL_{trial_idx}_STIM")
-
-        self.win.flip() 
-        onset_time = self.task_clock.getTime() 
-        
-        # 3. Réponse
-        keys = event.waitKeys(maxWait=self.stim_dur, keyList=self.response_keys + [self.quit_key], timeStamped=self.task_clock)
-        
-        resp_key = None
-        rt = None
-        
-        # Feedback immédiat
-        self.fixation.draw()
-        self.win.flip()
+        with self.gc.critical(), self.profiler.span('trial'):  # GC coupé pendant l'essai, rétabli même sur exception
+            stim = self._stims[tl.stim_id[idx]]
+            trig_stim = int(tl.code[idx])
+
+            # Onset absolu (recalé sur les TR en mode tr_locked) : pas de cumul des retards
+            onset_goal = self.schedule_onset(onset_planned)
+
+            # 1. Fixation, une frame avant l'onset
+            self.wait_until(onset_goal - tl.frame_period, frame_aligned=True)
+            self.fixation.draw()
+            self.win.flip()
+
+            # 2. Stimulus Onset
+            with self.profiler.span('stroop.stim'):
+                self.kb.clear()
+                with self.profiler.span('draw'):
+                    stim.draw()
+                onset_time = self.flip_and_stamp(trigger=trig_stim, et_msg=f"TRIAL_{trial_idx}_STIM")
+                self.frames.add_late(onset_time, onset_goal)  # Seule source des frames perdues de l'onset
+
+                # 3. Réponse (fenêtre ancrée sur l'onset réel)
+                t_resp_end = onset_time + tl.dur_s[idx]
+                keys = self.kb.wait(keyList=self.response_keys + [self.quit_key],
+                                    max_wait=max(0.0, t_resp_end - self.task_clock.getTime()))
+
+            resp_key = None
+            rt = None
+
+            # Feedback immédiat
+            self.fixation.draw()
+            self.win.flip()
+
+            if keys:
+                k, t = keys[0] 
+                if k == self.quit_key: should_quit(self.win, quit=True)
+                resp_key = k
+                rt = t - onset_time 
+
+            # 4. Analyse Réponse (Scoring)
+            acc = 0
+            status = "UNKNOWN"
+            trig_resp = 0
+
+            if trial_type == 'GO':
+                if resp_key:
+                    user_color = self.key_mapping.get(resp_key)
+                    if user_color == ink:
+                        acc = 1; status = "HIT"; trig_resp = self.codes['resp_correct']
+                    else:
+                        acc = 0; status = "ERROR"; trig_resp = self.codes['resp_error']
+                else:
+                    acc = 0; status = "MISS"; trig_resp = self.codes['resp_miss']
 
-        if keys:
-            k, t = keys[0] 
-            if k == self.quit_key: should_quit(self.win, quit=True)
-            resp_key = k
-            rt = t - onset_time 
-        
-        # 4. Analyse Réponse (Scoring)
-        acc = 0
-        status = "UNKNOWN"
-        trig_resp = 0
-
-        if trial_type == 'GO':
-            if resp_key:
-                user_color = self.key_mapping.get(resp_key)
-                if user_color == ink:
-                    acc = 1; status = "HIT"; trig_resp = self.codes['resp_correct']
+            elif trial_type == 'NOGO':
+                if resp_key:
+                    acc = 0; status = "FALSE_ALARM"; trig_resp = self.codes['resp_false_alarm']
                 else:
-                    acc = 0; status = "ERROR"; trig_resp = self.codes['resp_error']
-            else:
-                acc = 0; status = "MISS"; trig_resp = self.codes['resp_miss']
+                    acc = 1; status = "CORRECT_REJ"; trig_resp = self.codes['resp_correct_rej']
 
-        elif trial_type == 'NOGO':
-            if resp_key:
-                acc = 0; status = "FALSE_ALARM"; trig_resp = self.codes['resp_false_alarm']
-            else:
-                acc = 1; status = "CORRECT_REJ"; trig_resp = self.codes['resp_correct_rej']
+            # Envoi Trigger Réponse
+            self.ParPort.send_trigger(trig_resp)
+            if self.eyetracker_actif: self.EyeTracker.send_message(f"RESP_{status}")
 
-        # Envoi Trigger Réponse
-        self.ParPort.send_trigger(trig_resp)
-        if self.eyetracker_actif: self.EyeTracker.send_message(f"RESP_{status}")
+            dropped = self.frames.end_trial(f"T{trial_idx}")
 
-        rt_str = f"{rt:.3f}s" if rt else "---"
-        cong_str = "CONG" if congruent else "INCONG"
-        log_msg = f"T{trial_idx}: {trial_type} | {word}/{ink} ({cong_str}) -> {status} [{rt_str}]"
-        
-        if status in ["HIT", "CORRECT_REJ"]:
-            self.logger.log(log_msg) # En blanc/info standard
-        else:
-            self.logger.log(log_msg) # En jaune/orange pour les erreurs (plus visible)
-        # -----------------------------
-
-        self.global_records.append({
-            'participant': self.nom,
-            'session': self.session,
-            'trial_number': trial_idx,
-            'onset_time': onset_time,
-            'trial_type': trial_type,
-            'word': word,
-            'ink': ink,
-            'congruent': congruent,
-            'response_key': resp_key,
-            'rt': rt,
-            'accuracy': acc,
-            'status': status,
-            'trigger_stim': trig_stim,
-            'trigger_resp': trig_resp
-        })
-        
-        gc.enable()
+            rt_str = f"{rt:.3f}s" if rt else "---"
+            cong_str = "CONG" if congruent else "INCONG"
+            log_msg = f"T{trial_idx}: {trial_type} | {word}/{ink} ({cong_str}) -> {status} [{rt_str}]"
 
-        # 6. ISI Jittered
-        isi = random.uniform(*self.isi_range)
+            if status in ["HIT", "CORRECT_REJ"]:
+                self.logger.log(log_msg) # En blanc/info standard
+            else:
+                self.logger.log(log_msg) # En jaune/orange pour les erreurs (plus visible)
+            # -----------------------------
+
+            self.global_records.append({
+                'participant': self.nom,
+                'session': self.session,
+                'trial_number': trial_idx,
+                'onset_planned': float(onset_planned),
+                'onset_goal': float(onset_goal),
+                'onset_time': onset_time,
+                'isi': trial_data['isi'],
+                'trial_type': trial_type,
+                'word': word,
+                'ink': ink,
+                'congruent': congruent,
+                'response_key': resp_key,
+                'rt': rt,
+                'accuracy': acc,
+                'status': status,
+                'trigger_stim': trig_stim,
+                'trigger_resp': trig_resp,
+                'dropped_frames': dropped
+            })
+
+        # 6. ISI Jittered : fixation jusqu'à l'onset suivant (attendu par l'essai suivant)
         self.fixation.draw()
-        self.win.callOnFlip(self.ParPort.send_trigger, self.codes['fixation'])
-        self.win.flip()
-        core.wait(isi)
+        self.flip_and_stamp(trigger=self.codes['fixation'])
+        self.gc.collect_idle(self.schedule_onset(onset_planned + tl.dur_s[idx] + trial_data['isi']))
 
     # =========================================================================
     # LOGIQUE GÉNÉRALE
@@ -250,12 +269,36 @@ class Stroop(BaseTask):
                 })
         
         # Duplication pour atteindre n_trials
-        full_trials = base_trials * (self.n_trials // len(base_trials) + 1)
+        full_trials = [dict(t) for t in base_trials * (self.n_trials // len(base_trials) + 1)]
         full_trials = full_trials[:self.n_trials]
         random.shuffle(full_trials)
+
+        # ISI jitterés à somme fixe : durée de run identique d'un run à l'autre
+        for trial, isi in zip(full_trials, balanced_jitter(*self.isi_range, len(full_trials))):
+            trial['isi'] = round(isi, 3)
         
         return full_trials
 
+    def compile_timeline(self, trials):
+        """
+        Onsets absolus (stim_dur + ISI cumulés) quantifiés à la frame. Après
+        show_instructions (frame rate en cache validé), avant le trigger.
+        """
+        builder = TimelineBuilder()
+        t = 0.0
+        for trial in trials:
+            code = self.codes['stim_congruent'] if trial['congruent'] else self.codes['stim_incongruent']
+            builder.add(t, self.stim_dur, (trial['word'], trial['ink']), code)
+            t += self.stim_dur + trial['isi']
+        self.timeline = builder.compile(1.0 / self.frame_rate)
+        self.run_end_s = round(t / self.timeline.frame_period) * self.timeline.frame_period
+
+        self._stims = [
+            visual.TextStim(self.win, text=word, color=self.colors_hex[ink], height=0.15, bold=True)
+            for word, ink in self.timeline.stimuli
+        ]
+        self.logger.log(f"Timeline compilée : {self.timeline.describe()}")
+
     def get_instruction_text(self):
         """Génère le texte des consignes."""
         cibles_txt = " / ".join([i['word'] for i in self.active_config])
@@ -280,6 +323,10 @@ class Stroop(BaseTask):
 
             # 2. Instructions (Utilise BaseTask)
             self.show_instructions(self.get_instruction_text())
+
+            # Timeline sur la période validée pendant les instructions
+            self.compile_timeline(trials)
+            self.announce_run_length(10.0 + 0.5 + self.run_end_s + 10.0)
             
             # 3. Wait Trigger (Utilise BaseTask - Lance EyeTracker & Clock)
             self.wait_for_trigger()
@@ -287,9 +334,14 @@ class Stroop(BaseTask):
             # 4. Baseline Début
             self.show_resting_state(duration_s=10.0, code_start_key='rest_start')
             
-            # 5. Boucle Principale
+            # 5. Boucle Principale : onsets absolus depuis l'origine
+            origin = self.planned_now() + 0.5
+            onsets = self.timeline.onset_s
             for i, trial_data in enumerate(trials, 1):
-                self.run_trial(i, trial_data)
+                self.run_trial(i, trial_data, origin + onsets[i - 1])
+
+            # Fin du dernier ISI
+            self.wait_until(self.schedule_onset(origin + self.run_end_s), frame_aligned=True)
             
             # 6. Baseline Fin
             self.show_resting_state(duration_s=10.0, code_start_key='rest_end')
@@ -300,16 +352,14 @@ class Stroop(BaseTask):
             self.logger.err(f"Erreur critique Stroop: {e}")
             raise e
         finally:
+            self.stop_eyetracker()  # Transfert EDF en arrière-plan
             # 7. Sauvegarde (Utilise BaseTask)
-            self.save_data(self.global_records)
+            data_path = self.save_data(self.global_records)
 
-            # Astuce pour trouver le dernier fichier créé si on ne connait pas le nom exact
-            list_of_files = glob.glob(os.path.join(self.data_dir, '*.csv')) 
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
-                
+            # QC sur le fichier écrit (chemin retourné par save_data)
+            if data_path:
                 # --- LANCEMENT DU QC ---
                 try:
-                    qc_stroop(latest_file)
+                    qc_stroop(data_path)
                 except Exception as e:
                     self.logger.warn(f"Echec génération QC: {e}")
\ No newline at end of file
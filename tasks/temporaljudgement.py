@@ -5,9 +5,8 @@ Correction du bug de mesure du framerate pendant les trials.
 """
 
 import random
-import gc, os
-import glob
-from psychopy import visual, event, core
+import os
+from psychopy import visual, core
 from utils.base_task import BaseTask
 from utils.utils import should_quit
 from tasks.qc.qc_temporal import qc_temporaljudgement
@@ -18,6 +17,18 @@ class TemporalJudgement(BaseTask):
     Tâche de jugement de délai temporel entre une action et un stimulus visuel.
     """
 
+    # Colonnes typées des évènements (CSV ordonné + Parquet, cf. utils/columnar.py).
+    # Une ligne par évènement : seules les colonnes de l'évènement sont renseignées.
+    RECORD_SCHEMA = {
+        'participant': 'str', 'session': 'str', 'phase': 'str', 'trial': 'int',
+        'time_s': 'float', 'event_type': 'str',
+        'condition': 'str', 'delay_target_ms': 'int', 'feedback_mode': 'bool',
+        'action_key': 'str', 'actual_delay_ms': 'float', 'error_ms': 'float',
+        'dropped_frames': 'int', 'response_key': 'str', 'response_ms': 'int',
+        'rt_s': 'float', 'isi_duration': 'float', 'block_name': 'str',
+        'trigger_key': 'str', 'end_key': 'str', 'result': 'str', 'key': 'str', 'choice': 'str',
+    }
+
     def __init__(self, win, nom, session='01', mode='fmri', run_type='base',
                  n_trials_base=72, n_trials_block=24, n_trials_training=12,
                  delays_ms=(200, 300, 400, 500, 600, 700),
@@ -36,7 +47,8 @@ class TemporalJudgement(BaseTask):
             eyetracker_actif=eyetracker_actif,
             parport_actif=parport_actif,
             enregistrer=enregistrer,
-            et_prefix='TJ'
+            et_prefix='TJ',
+            **kwargs
         )
 
         # --- Paramètres Expérimentaux Spécifiques ---
@@ -85,18 +97,13 @@ class TemporalJudgement(BaseTask):
     def _measure_frame_rate(self):
         """
         ✅ MESURE LE FRAME RATE UNE SEULE FOIS AU DÉMARRAGE.
-        Critique pour le timing sub-millisecondes.
+        Critique pour le timing sub-millisecondes. Valeur lue dans le cache
+        par écran si disponible (cf. BaseTask.measure_frame_rate).
         """
-        self.logger.log("Mesure du frame rate en cours...")
-        
-        self.frame_rate = self.win.getActualFrameRate(nIdentical=10, nMaxFrames=100, threshold=1)
-        
-        if self.frame_rate is None:
-            self.frame_rate = 60.0
-            self.logger.warn("Frame rate non détecté, valeur par défaut : 60.0 Hz")
-        else:
-            self.logger.ok(f"Frame rate mesuré : {self.frame_rate:.2f} Hz")
-        
+        self.measure_frame_rate(default=60.0)
+
+    def _apply_frame_rate(self, rate):
+        super()._apply_frame_rate(rate)
         # Précalcul de la tolérance frame (utilisé dans run_trial)
         self.frame_tolerance_s = (0.75 / self.frame_rate)
         self.logger.log(f"Frame tolerance : {self.frame_tolerance_s*1000:.2f} ms")
@@ -255,201 +262,189 @@ class TemporalJudgement(BaseTask):
         # =====================================================================
         # CRITICAL TIMING START: DISABLE GARBAGE COLLECTOR
         # =====================================================================
-        gc.disable()
+        with self.gc.critical(), self.profiler.span('trial'):  # GC coupé pendant l'essai, rétabli même sur exception
+            self.current_trial_idx = trial_index
+            base_color = '#00FF00' if condition == 'active' else '#FF0000'
 
-        self.current_trial_idx = trial_index
-        base_color = '#00FF00' if condition == 'active' else '#FF0000'
+            # --- Phase 1: Début de Trial ---
+            self.log_trial_event('trial_start', condition=condition, delay_target_ms=delay_ms, feedback_mode=feedback)
+            trigger_code = self.codes['trial_active'] if condition == 'active' else self.codes['trial_passive']
 
-        # --- Phase 1: Début de Trial ---
-        self.log_trial_event('trial_start', condition=condition, delay_target_ms=delay_ms, feedback_mode=feedback)
-        trigger_code = self.codes['trial_active'] if condition == 'active' else self.codes['trial_passive']
-        
-        # Fixation initiale
-        self.fixation.draw()
-        self.win.callOnFlip(self.ParPort.send_trigger, trigger_code)
-        self.win.flip()
-        core.wait(0.5)
+            # Fixation initiale
+            self.fixation.draw()
+            self.flip_and_stamp(trigger=trigger_code)
+            core.wait(0.5)
 
-        # --- Phase 2: Attente Action (Condition Active) ---
-        self.draw_lightbulb(base_color=base_color, bulb_on=False)
-        self.win.flip()
-        
-        event.clearEvents(eventType='keyboard')
-        keys = []
-        action_time = 0
-        
-        while not keys:
-            keys = event.getKeys(
-                keyList=[self.key_action] + self.keys_quit,
-                timeStamped=self.task_clock
-            )
-            
-            if keys:
-                key_name, t_down = keys[0]
-                if key_name in self.keys_quit:
-                    should_quit(self.win, quit=True)
-                action_time = t_down
-                self.ParPort.send_trigger(self.codes['action_bulb'])
-                break
-            
-            core.wait(0.0005)
+            # --- Phase 2: Attente Action (Condition Active) ---
+            self.draw_lightbulb(base_color=base_color, bulb_on=False)
+            self.win.flip()
 
-        self.log_trial_event('action_performed', action_key=keys[0][0])
+            self.kb.clear()
 
-        # --- Phase 3: Délai Précis (Timing Critique) ---
-        target_light_time = action_time + (delay_ms / 1000.0)
-        
-        # ✅ UTILISE LA TOLÉRANCE PRÉCALCULÉE (pas de mesure pendant le trial)
-        while self.task_clock.getTime() < (target_light_time - self.frame_tolerance_s):
-            core.wait(0.001)
+            # Temps d'appui horodaté par le clavier : le délai part de l'appui réel
+            keys = self.kb.wait(keyList=[self.key_action] + self.keys_quit)
+            key_name, t_down = keys[0]
+            if key_name in self.keys_quit:
+                should_quit(self.win, quit=True)
+            action_time = t_down
+            self.ParPort.send_trigger(self.codes['action_bulb'])
 
-        # --- Phase 4: Allumage de l'Ampoule (Synchronized Flip) ---
-        self.draw_lightbulb(base_color=base_color, bulb_on=True)
-        self.win.callOnFlip(self.ParPort.send_trigger, self.codes['bulb_on'])
-        self.win.flip()
-        
-        bulb_on_time = self.task_clock.getTime()
-        actual_delay = (bulb_on_time - action_time) * 1000
-        error_ms = actual_delay - delay_ms
-        
-        self.log_trial_event('bulb_lit', actual_delay_ms=actual_delay, error_ms=error_ms)
+            self.log_trial_event('action_performed', action_key=keys[0][0])
 
-        # Affichage ampoule allumée (durée variable)
-        wait_duration = random.uniform(1.2, 1.8)
-        core.wait(wait_duration)
-        self.win.flip()
+            # --- Phase 3: Délai Précis (Timing Critique) ---
+            target_light_time = action_time + (delay_ms / 1000.0)
 
-        # --- Phase 5: Prompt de Réponse ---
-        t0_response = self.task_clock.getTime()
-        self.log_trial_event('response_prompt_shown')
-        self.ParPort.send_trigger(self.codes['response_prompt'])
-        
-        self.response_title.draw()
-        self.response_options_text.draw()
-        self.response_instr.draw()
-        self.win.flip()
+            with self.profiler.span('tj.delay'):
+                # ✅ UTILISE LA TOLÉRANCE PRÉCALCULÉE (pas de mesure pendant le trial)
+                self.wait_until(target_light_time - self.frame_tolerance_s)
 
-        event.clearEvents(eventType='keyboard')
-        resp_keys = event.waitKeys(
-            maxWait=5.0,
-            keyList=self.keys_responses + self.keys_quit,
-            timeStamped=self.task_clock
-        )
+                # --- Phase 4: Allumage de l'Ampoule (Synchronized Flip) ---
+                with self.profiler.span('draw'):
+                    self.draw_lightbulb(base_color=base_color, bulb_on=True)
+                bulb_on_time = self.flip_and_stamp(trigger=self.codes['bulb_on'])
+            actual_delay = (bulb_on_time - action_time) * 1000
+            error_ms = actual_delay - delay_ms
+            self.frames.add_late(bulb_on_time, target_light_time)
+            dropped = self.frames.end_trial(f"T{trial_index}")
 
-        rt = None
-        response_ms = None
+            self.log_trial_event('bulb_lit', actual_delay_ms=actual_delay, error_ms=error_ms,
+                                 dropped_frames=dropped)
 
-        # --- Gestion de la Réponse ou Timeout ---
-        if resp_keys:
-            resp_key, timestamp_key = resp_keys[0]
-            
-            if resp_key in self.keys_quit:
-                should_quit(self.win, quit=True)
-            
-            self.ParPort.send_trigger(self.codes['response_given'])
-            
-            rt = timestamp_key - t0_response
-            response_ms = self.response_key_to_ms.get(resp_key)
-            idx_user = self.keys_responses.index(resp_key)
-
-            # --- Feedback Visuel (Training Mode) ---
-            if feedback:
-                is_correct = (response_ms == delay_ms)
-                user_bar_color = 'green' if is_correct else 'yellow'
-                msg_text = "Bonne réponse !" if is_correct else f"Réponse correcte : {delay_ms} ms"
-                msg_color = 'green' if is_correct else 'red'
-                
-                # Redessiner les options
-                self.response_title.draw()
-                self.response_options_text.draw()
-                
-                # Soulignement du choix utilisateur
-                current_line_width = 5 * self.pixel_scale
-                user_line = visual.Line(
-                    self.win,
-                    start=(self.underline_x_positions[idx_user] - 0.04, self.underline_y_line),
-                    end=(self.underline_x_positions[idx_user] + 0.04, self.underline_y_line),
-                    lineColor=user_bar_color,
-                    lineWidth=current_line_width
-                )
-                user_line.draw()
-                
-                # Si incorrect, montrer la bonne réponse
-                if not is_correct:
-                    try:
-                        idx_correct = self.response_values_ms.index(delay_ms)
-                        thick_line_width = 6 * self.pixel_scale
-                        correct_line = visual.Line(
-                            self.win,
-                            start=(self.underline_x_positions[idx_correct] - 0.04, self.underline_y_line),
-                            end=(self.underline_x_positions[idx_correct] + 0.04, self.underline_y_line),
-                            lineColor='red',
-                            lineWidth=thick_line_width
-                        )
-                        correct_line.draw()
-                    except ValueError:
-                        pass
-                
-                # Message textuel
-                fb_text = visual.TextStim(
-                    self.win, text=msg_text, color=msg_color, height=0.05, pos=(0, -0.2)
+            # Affichage ampoule allumée (durée variable)
+            wait_duration = random.uniform(1.2, 1.8)
+            core.wait(wait_duration)
+            self.win.flip()
+
+            # --- Phase 5: Prompt de Réponse ---
+            t0_response = self.task_clock.getTime()
+            self.log_trial_event('response_prompt_shown')
+            self.ParPort.send_trigger(self.codes['response_prompt'])
+
+            self.response_title.draw()
+            self.response_options_text.draw()
+            self.response_instr.draw()
+            self.win.flip()
+
+            self.kb.clear()
+            resp_keys = self.kb.wait(
+                keyList=self.keys_responses + self.keys_quit,
+                max_wait=5.0
+            )
+
+            rt = None
+            response_ms = None
+
+            # --- Gestion de la Réponse ou Timeout ---
+            if resp_keys:
+                resp_key, timestamp_key = resp_keys[0]
+
+                if resp_key in self.keys_quit:
+                    should_quit(self.win, quit=True)
+
+                self.ParPort.send_trigger(self.codes['response_given'])
+
+                rt = timestamp_key - t0_response
+                response_ms = self.response_key_to_ms.get(resp_key)
+                idx_user = self.keys_responses.index(resp_key)
+
+                # --- Feedback Visuel (Training Mode) ---
+                if feedback:
+                    is_correct = (response_ms == delay_ms)
+                    user_bar_color = 'green' if is_correct else 'yellow'
+                    msg_text = "Bonne réponse !" if is_correct else f"Réponse correcte : {delay_ms} ms"
+                    msg_color = 'green' if is_correct else 'red'
+
+                    # Redessiner les options
+                    self.response_title.draw()
+                    self.response_options_text.draw()
+
+                    # Soulignement du choix utilisateur
+                    current_line_width = 5 * self.pixel_scale
+                    user_line = visual.Line(
+                        self.win,
+                        start=(self.underline_x_positions[idx_user] - 0.04, self.underline_y_line),
+                        end=(self.underline_x_positions[idx_user] + 0.04, self.underline_y_line),
+                        lineColor=user_bar_color,
+                        lineWidth=current_line_width
+                    )
+                    user_line.draw()
+
+                    # Si incorrect, montrer la bonne réponse
+                    if not is_correct:
+                        try:
+                            idx_correct = self.response_values_ms.index(delay_ms)
+                            thick_line_width = 6 * self.pixel_scale
+                            correct_line = visual.Line(
+                                self.win,
+                                start=(self.underline_x_positions[idx_correct] - 0.04, self.underline_y_line),
+                                end=(self.underline_x_positions[idx_correct] + 0.04, self.underline_y_line),
+                                lineColor='red',
+                                lineWidth=thick_line_width
+                            )
+                            correct_line.draw()
+                        except ValueError:
+                            pass
+
+                    # Message textuel
+                    fb_text = visual.TextStim(
+                        self.win, text=msg_text, color=msg_color, height=0.05, pos=(0, -0.2)
+                    )
+                    fb_text.draw()
+                    self.win.flip()
+                    core.wait(1.0)
+
+                else:
+                    # Mode sans feedback : simple soulignement jaune
+                    underline = visual.Line(
+                        self.win,
+                        start=(self.underline_x_positions[idx_user] - 0.04, self.underline_y_line),
+                        end=(self.underline_x_positions[idx_user] + 0.04, self.underline_y_line),
+                        lineColor='yellow',
+                        lineWidth=5 * self.pixel_scale
+                    )
+                    self.response_title.draw()
+                    self.response_options_text.draw()
+                    self.response_instr.draw()
+                    underline.draw()
+                    self.win.flip()
+                    core.wait(0.6)
+
+                self.log_trial_event('response_given', response_key=resp_key, response_ms=response_ms, rt_s=rt)
+
+                fb_str = f"| FB: {'Yes' if feedback else 'No':<3}"
+                self.logger.log(
+                    f"Trial {trial_index:>2}/{total_trials:<2} | {condition.upper():<7} | "
+                    f"Target: {delay_ms:>3}ms | Answer: {str(response_ms):>4}ms | RT: {rt:.3f}s {fb_str}"
                 )
-                fb_text.draw()
-                self.win.flip()
-                core.wait(1.0)
-            
+
             else:
-                # Mode sans feedback : simple soulignement jaune
-                underline = visual.Line(
-                    self.win,
-                    start=(self.underline_x_positions[idx_user] - 0.04, self.underline_y_line),
-                    end=(self.underline_x_positions[idx_user] + 0.04, self.underline_y_line),
-                    lineColor='yellow',
-                    lineWidth=5 * self.pixel_scale
+                # --- TIMEOUT ---
+                self.ParPort.send_trigger(self.codes['timeout'])
+                self.log_trial_event('response_timeout')
+
+                too_slow = visual.TextStim(
+                    self.win, text="Temps de réponse écoulé", color='red', height=0.1
                 )
-                self.response_title.draw()
-                self.response_options_text.draw()
-                self.response_instr.draw()
-                underline.draw()
+                too_slow.draw()
                 self.win.flip()
-                core.wait(0.6)
-
-            self.log_trial_event('response_given', response_key=resp_key, response_ms=response_ms, rt_s=rt)
-            
-            fb_str = f"| FB: {'Yes' if feedback else 'No':<3}"
-            self.logger.log(
-                f"Trial {trial_index:>2}/{total_trials:<2} | {condition.upper():<7} | "
-                f"Target: {delay_ms:>3}ms | Answer: {str(response_ms):>4}ms | RT: {rt:.3f}s {fb_str}"
-            )
+                core.wait(0.8)
 
-        else:
-            # --- TIMEOUT ---
-            self.ParPort.send_trigger(self.codes['timeout'])
-            self.log_trial_event('response_timeout')
-            
-            too_slow = visual.TextStim(
-                self.win, text="Temps de réponse écoulé", color='red', height=0.1
-            )
-            too_slow.draw()
-            self.win.flip()
-            core.wait(0.8)
-            
-            self.logger.warn(
-                f"Trial {trial_index:>2}/{total_trials:<2} | {condition.upper():<7} | "
-                f"Target: {delay_ms:>3}ms | TIMEOUT"
-            )
+                self.logger.warn(
+                    f"Trial {trial_index:>2}/{total_trials:<2} | {condition.upper():<7} | "
+                    f"Target: {delay_ms:>3}ms | TIMEOUT"
+                )
 
         # =====================================================================
-        # CRITICAL TIMING END: RE-ENABLE GARBAGE COLLECTOR
+        # CRITICAL TIMING END: GC RÉACTIVÉ (sortie du bloc with)
         # =====================================================================
-        gc.enable()
-        gc.collect()
 
         # --- Phase 7: ITI (Inter-Trial Interval) ---
         isi = random.uniform(*self.stim_isi_range)
         self.fixation.draw()
         self.win.flip()
-        core.wait(isi)
+        t_iti_end = self.task_clock.getTime() + isi
+        self.gc.collect_idle(t_iti_end)  # Gén. 0/1 seulement, si la marge le permet
+        self.wait_until(t_iti_end)
         
         self.log_trial_event('trial_end', isi_duration=isi)
         
@@ -603,19 +598,78 @@ class TemporalJudgement(BaseTask):
         random.shuffle(pool)
         return pool
 
-    def run_trial_block(self, n_trials, block_name, phase_tag, feedback):
-        """Exécute un bloc complet d'essais."""
+    def build_design(self):
+        """
+        Plan du run (phases dans l'ordre) et séquences d'essais, générés une fois
+        et journalisés. Étapes rejouables : chaque essai + la fenêtre de crise.
+        Retourne (plan, nombre d'étapes).
+        """
+        def block(n_trials, name, phase_tag, feedback):
+            trials = self.build_trials(n_trials, training=(phase_tag == 'training'))
+            return {'kind': 'block', 'name': name, 'phase_tag': phase_tag,
+                    'feedback': feedback, 'trials': [[c, int(d)] for c, d in trials]}
+
+        if self.run_type == 'training':
+            plan = [{'kind': 'rest', 'duration_s': 10.0},
+                    block(self.n_trials_training, "TRAINING", 'training', True)]
+        elif self.run_type == 'base':
+            plan = [{'kind': 'rest', 'duration_s': 10.0},
+                    block(self.n_trials_base, "BASELINE", 'base', False),
+                    {'kind': 'crisis'},
+                    block(self.n_trials_block, "POST_CRISIS", 'run_standard', False)]
+        else:
+            plan = [{'kind': 'rest', 'duration_s': 150.0},
+                    {'kind': 'crisis'},
+                    block(self.n_trials_block, "STANDARD_BLOCK", 'run_standard', False)]
+
+        n_steps = sum(len(p['trials']) if p['kind'] == 'block' else 1
+                      for p in plan if p['kind'] != 'rest')
+        return plan, n_steps
+
+    def run_plan(self, plan):
+        """Exécute le plan ; en reprise, saute les self.resume_at premières étapes."""
+        step = 0
+        for part in plan:
+            if part['kind'] == 'rest':
+                self.show_resting_state(duration_s=part['duration_s'])
+
+            elif part['kind'] == 'crisis':
+                step += 1
+                if step > self.resume_at:
+                    self.show_crisis_validation_window()
+                    self.journal_step(step)
+                else:
+                    self.logger.log("Reprise : fenêtre de crise déjà validée.")
+
+            else:
+                n_done = min(max(0, self.resume_at - step), len(part['trials']))
+                if n_done < len(part['trials']):
+                    self.run_trial_block(part['trials'], part['name'], part['phase_tag'],
+                                         part['feedback'], first_step=step, n_done=n_done)
+                step += len(part['trials'])
+
+    def run_trial_block(self, trials, block_name, phase_tag, feedback, first_step=0, n_done=0):
+        """
+        Exécute un bloc d'essais (trials = [(condition, délai_ms), ...]).
+        first_step : étapes du run avant ce bloc ; n_done : essais déjà faits (reprise).
+        """
         self.current_phase = phase_tag
-        self.log_trial_event('block_start', block_name=block_name, feedback_mode=feedback)
-        self.logger.log(f"--- Bloc Start: {block_name} ({n_trials} essais) ---")
+        self.log_trial_event('block_start', block_name=block_name, feedback_mode=feedback,
+                             resumed_at=n_done + 1 if n_done else None)
+        self.logger.log(f"--- Bloc Start: {block_name} ({len(trials)} essais) ---")
+        if n_done:
+            self.logger.warn(f"Reprise du bloc {block_name} à l'essai {n_done + 1}")
         
-        trials = self.build_trials(n_trials, training=(phase_tag == 'training'))
         total_trials = len(trials)
         
         for i, (cond, delay) in enumerate(trials, start=1):
+            if i <= n_done:
+                continue
             self.run_trial(i, total_trials, cond, delay, feedback=feedback)
+            self.journal_step(first_step + i)  # Hors section critique (ITI déjà écoulé)
         
         self.log_trial_event('block_end', block_name=block_name)
+        self.sync_records()
         self.logger.log(f"--- Bloc End: {block_name} ---")
 
     # =========================================================================
@@ -641,8 +695,8 @@ class TemporalJudgement(BaseTask):
             self.log_trial_event('crisis_prompt_start')
             self.ParPort.send_trigger(self.codes['crisis_prompt'])
             
-            event.clearEvents()
-            keys = event.waitKeys(keyList=self.keys_responses + self.keys_quit)
+            self.kb.clear()
+            keys = [k for k, _ in self.kb.wait(keyList=self.keys_responses + self.keys_quit)]
             
             if keys[0] in self.keys_quit:
                 should_quit(self.win, quit=True)
@@ -655,8 +709,8 @@ class TemporalJudgement(BaseTask):
             self.win.flip()
             core.wait(0.5)
             
-            event.clearEvents()
-            keys = event.waitKeys(keyList=self.keys_responses + self.keys_quit)
+            self.kb.clear()
+            keys = [k for k, _ in self.kb.wait(keyList=self.keys_responses + self.keys_quit)]
             
             if keys[0] in self.keys_quit:
                 should_quit(self.win, quit=True)
@@ -677,8 +731,8 @@ class TemporalJudgement(BaseTask):
             self.ParPort.send_trigger(self.codes['crisis_valid_prompt'])
             
             core.wait(0.2)
-            event.clearEvents()
-            keys = event.waitKeys(keyList=self.keys_responses + self.keys_quit)
+            self.kb.clear()
+            keys = [k for k, _ in self.kb.wait(keyList=self.keys_responses + self.keys_quit)]
             
             if keys[0] in self.keys_quit:
                 should_quit(self.win, quit=True)
@@ -712,7 +766,7 @@ class TemporalJudgement(BaseTask):
                 retry_text.draw()
                 self.win.flip()
                 
-                keys = event.waitKeys(keyList=self.keys_responses + self.keys_quit)
+                keys = [k for k, _ in self.kb.wait(keyList=self.keys_responses + self.keys_quit)]
                 idx_retry = self.keys_responses.index(keys[0])
                 
                 if idx_retry >= 4:
@@ -757,50 +811,23 @@ class TemporalJudgement(BaseTask):
                     "Appuyez sur ESPACE pour continuer..."
                 )
             
+            # Plan du run : généré et journalisé, ou relu du journal en reprise
+            plan = self.begin_journal(self.build_design, config={
+                'run_type': self.run_type,
+                'n_trials': [self.n_trials_base, self.n_trials_block, self.n_trials_training],
+            })
+
             self.show_instructions(instructions)
 
             # Trigger
             self.wait_for_trigger()
 
             # Exécution selon le mode
-            if self.run_type == 'training':
-                self.logger.log(f"Lancement : TRAINING ({self.n_trials_training} essais)")
-                self.show_resting_state(duration_s=10.0)
-                self.run_trial_block(
-                    self.n_trials_training,
-                    block_name="TRAINING",
-                    phase_tag='training',
-                    feedback=True
-                )
-            
-            elif self.run_type == 'base':
-                self.logger.log(f"Lancement : PROTOCOLE COMPLET")
-                self.show_resting_state(duration_s=10.0)
-                self.run_trial_block(
-                    self.n_trials_base,
-                    block_name="BASELINE",
-                    phase_tag='base',
-                    feedback=False
-                )
-                self.show_crisis_validation_window()
-                self.run_trial_block(
-                    self.n_trials_block,
-                    block_name="POST_CRISIS",
-                    phase_tag='run_standard',
-                    feedback=False
-                )
-            
-            else:
-                self.logger.log(f"Lancement : BLOC COURT")
-                self.show_resting_state(duration_s=150.0)
-                self.show_crisis_validation_window()
-                self.run_trial_block(
-                    self.n_trials_block,
-                    block_name="STANDARD_BLOCK",
-                    phase_tag='run_standard',
-                    feedback=False
-                )
+            labels = {'training': f"TRAINING ({self.n_trials_training} essais)", 'base': "PROTOCOLE COMPLET"}
+            self.logger.log(f"Lancement : {labels.get(self.run_type, 'BLOC COURT')}")
+            self.run_plan(plan)
 
+            self.end_journal(completed=True)
             finished_naturally = True
             self.logger.ok("Expérience terminée avec succès.")
 
@@ -816,24 +843,19 @@ class TemporalJudgement(BaseTask):
         finally:
             self.logger.log("Sauvegarde finale...")
             
-            if self.eyetracker_actif:
-                self.EyeTracker.stop_recording()
-                self.EyeTracker.send_message("END_EXP")
-                self.EyeTracker.close_and_transfer_data(self.data_dir)
+            # Transfert EDF en arrière-plan pendant la sauvegarde et le QC
+            self.stop_eyetracker()
 
-            self.save_data(
+            data_path = self.save_data(
                 data_list=self.global_records,
                 filename_suffix=f"_{self.run_type}"
             )
             
-            # Astuce pour trouver le dernier fichier créé si on ne connait pas le nom exact
-            list_of_files = glob.glob(os.path.join(self.data_dir, '*.csv')) 
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
-                
+            # QC sur le fichier écrit (chemin retourné par save_data)
+            if data_path:
                 # --- LANCEMENT DU QC ---
                 try:
-                    qc_temporaljudgement(latest_file)
+                    qc_temporaljudgement(data_path)
                 except Exception as e:
                     self.logger.warn(f"Echec génération QC: {e}")
             
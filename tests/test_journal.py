@@ -0,0 +1,102 @@
+"""
+Reprise après crash : journal laissé par un run interrompu -> menu (session
+proposée) -> reprise (design, étape et état RNG relus).
+"""
+
+import random
+
+from utils.catalog import register_run, last_session
+from utils.journal import (RunJournal, journal_path, load_journal, next_session,
+                           resumable_sessions)
+
+
+def _crashed_run(root, nom='P01', task='TemporalJudgement', session='02', n_steps=97, done=40):
+    """Run interrompu après `done` étapes : journal fermé sans finish(). Retourne les tirages suivants."""
+    design = {'config': {'run_type': 'base'}, 'design': [{'kind': 'crisis'}]}
+    journal = RunJournal(journal_path(root, nom, task, session))
+    journal.begin(design, n_steps)
+    for step in range(1, done + 1):
+        random.random()
+        journal.commit(step)
+    expected = [random.random() for _ in range(3)]
+    journal.close()  # Crash : le journal reste sur disque
+    return expected
+
+
+def test_crash_keeps_session_and_resumes_at_next_step(tmp_path):
+    root = str(tmp_path)
+    expected = _crashed_run(root)
+
+    # Retour au menu : last_config = run crashé (session 02), pas d'incrément
+    assert resumable_sessions(root, 'P01') == ['02']
+    assert next_session(root, 'P01', 2) == 2
+
+    # offer_resume : journal de la même session
+    state = load_journal(journal_path(root, 'P01', 'TemporalJudgement', '02'))
+    assert state.resumable
+    assert state.last_completed == 40 and state.n_steps == 97
+    assert state.design['design'] == [{'kind': 'crisis'}]
+
+    # begin_journal en reprise : mêmes tirages qu'un run non interrompu
+    random.seed(0)
+    random.setstate(state.rng_state)
+    assert [random.random() for _ in range(3)] == expected
+
+
+def test_partial_csv_in_catalog_does_not_skip_resumable_session(tmp_path):
+    root = str(tmp_path)
+    _crashed_run(root)
+    # Le finally du run crashé a sauvegardé (et catalogué) le CSV partiel
+    register_run(root, str(tmp_path / 'data' / 'tj' / 'P01_TJ_base.csv'), 'P01', '02', 'TemporalJudgement')
+    assert last_session(root, 'P01') == 2
+
+    assert next_session(root, 'P01', last_session(root, 'P01'), current=2) == 2
+    # Session choisie par l'opérateur sans journal : pas de retour vers la 02
+    assert next_session(root, 'P01', last_session(root, 'P01'), current=4) == 3
+
+
+def test_stale_journal_of_other_task_does_not_pin_session(tmp_path):
+    root = str(tmp_path)
+    _crashed_run(root, task='Stroop', session='01')
+    assert resumable_sessions(root, 'P01') == ['01']
+    assert resumable_sessions(root, 'P01', 'TemporalJudgement') == []
+    assert next_session(root, 'P01', 4, task_key='TemporalJudgement') == 5
+    assert next_session(root, 'P01', 4, task_key='Stroop') == 1
+
+
+def test_finished_run_moves_to_next_session(tmp_path):
+    root = str(tmp_path)
+    journal = RunJournal(journal_path(root, 'P01', 'Stroop', '02'))
+    journal.begin({'config': None, 'design': []}, 10)
+    journal.commit(10)
+    journal.finish()
+
+    assert resumable_sessions(root, 'P01') == []
+    assert next_session(root, 'P01', 2) == 3
+    assert next_session(root, 'P01', None) is None
+
+
+def test_other_participant_with_longer_name_is_ignored(tmp_path):
+    root = str(tmp_path)
+    _crashed_run(root, nom='P01_B', session='05')
+    assert resumable_sessions(root, 'P01') == []
+    assert resumable_sessions(root, 'P01_B') == ['05']
+
+
+def test_training_run_does_not_overwrite_crashed_base_journal(tmp_path):
+    root = str(tmp_path)
+    base = journal_path(root, 'P01', 'TemporalJudgement', '02', run_type='base')
+    crashed = RunJournal(base)
+    crashed.begin({'config': {'run_type': 'base'}, 'design': []}, 97)
+    crashed.commit(40)
+    crashed.close()
+
+    training = RunJournal(journal_path(root, 'P01', 'TemporalJudgement', '02', run_type='training'))
+    training.begin({'config': {'run_type': 'training'}, 'design': []}, 10)
+    training.commit(10)
+    training.finish()
+
+    state = load_journal(base)
+    assert state.resumable and state.last_completed == 40
+    assert resumable_sessions(root, 'P01') == ['02']
+    assert resumable_sessions(root, 'P01', 'TemporalJudgement') == ['02']
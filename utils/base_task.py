@@ -10,16 +10,36 @@ Date : Janvier 2026
 
 import os
 import sys
+import random
 from datetime import datetime
-from psychopy import visual, event, core
+from psychopy import visual, core, logging
 from utils.logger import get_logger
 from utils.hardware_manager import setup_hardware
 from utils.utils import should_quit
+from utils.tr_counter import TRListener, TRClock
+from utils.timing import DeadlineScheduler
+from utils.frame_monitor import FrameMonitor
+from utils.key_queue import KeyQueue
+from utils.gc_policy import GCPolicy
+from utils.refresh_cache import RefreshCache, display_key, measure_full, measure_quick
+from utils.realtime import RealtimeMode
+from utils.profiler import Profiler
+from utils.record_sink import RecordSink, RecordList
+from utils.columnar import order_columns, write_parquet
+from utils.journal import RunJournal, journal_path, load_journal
+from utils.catalog import register_run
 
 class BaseTask:
+    # Types des colonnes enregistrées (cf. utils/columnar.py), à déclarer par tâche
+    RECORD_SCHEMA = None
+
     def __init__(self, win, nom, session, task_name, folder_name, 
                  eyetracker_actif=False, parport_actif=False, 
-                 enregistrer=True, et_prefix='TSK'):
+                 enregistrer=True, et_prefix='TSK', hardware_pool=None,
+                 parport_backend='lpt', serial_port=None,
+                 tr_s=None, tr_source='keyboard', tr_locked=False,
+                 spin_margin=0.002, frame_budget=0, realtime=False, profile=False,
+                 stream_records=True, fsync_policy='trial', resume=False, **kwargs):
         """
         Args:
             win: Fenêtre PsychoPy
@@ -28,6 +48,22 @@ class BaseTask:
             task_name (str): Nom affiché (ex: "Door Reward")
             folder_name (str): Nom du dossier de data (ex: "doorreward")
             et_prefix (str): Préfixe 2-3 lettres pour le fichier Eyelink (ex: 'DR')
+            hardware_pool (HardwarePool): Connexions persistantes fournies par main.py
+                                          (None = connexions propres à la tâche)
+            parport_backend (str): Port de triggers : 'lpt', 'serial' ou 'emulated' (sans matériel)
+            serial_port (str): Port du boîtier TTL série (backend 'serial')
+            tr_s (float): TR nominal du scanner (s), None = estimé depuis les impulsions
+            tr_source (str): Écoute des TR : 'keyboard' (touche trigger) ou 'port' (broche LPT)
+            tr_locked (bool): Onsets exprimés en TR et recalés sur les impulsions reçues
+                              (voir schedule_onset, nécessite tr_s)
+            spin_margin (float): Fin d'attente en boucle active de wait_until (s)
+            frame_budget (int): Frames perdues tolérées par essai avant avertissement
+            realtime (bool): Priorité maximale + cœur CPU dédié au rendu pendant le run
+            profile (bool): Chronométrage des phases d'essai et des appels du chemin critique
+            stream_records (bool): Écriture en continu des enregistrements (<stem>_records.jsonl)
+            fsync_policy: Passage sur disque du flux : 'trial', 'block' ou période (s)
+            resume (bool): Reprendre un run interrompu depuis son journal (cf. begin_journal)
+            **kwargs: Reste de la config (ignoré ici)
         """
         self.win = win
         self.nom = str(nom)
@@ -39,9 +75,28 @@ class BaseTask:
         self.eyetracker_actif = eyetracker_actif
         self.parport_actif = parport_actif
         self.enregistrer = enregistrer
+        self.hardware_pool = hardware_pool
+        self.parport_backend = parport_backend
+        self.serial_port = serial_port
+        self.tr_s = tr_s
+        self.tr_source = tr_source
+        self.tr_listener = None  # Démarré par wait_for_trigger
+        self.tr_locked = bool(tr_locked)
+        self.tr_clock = None     # Modèle de recalage (mode tr_locked)
+        self.et_transfer = None  # Transfert EDF en arrière-plan (voir stop_eyetracker)
+        self.stream_records = stream_records
+        self.fsync_policy = fsync_policy
+        self.record_sink = None  # Démarré par wait_for_trigger
+        self._run_timestamp = None  # Horodatage commun au flux et au CSV final
+        self.resume = bool(resume)
+        self.journal = None      # Journal de reprise (cf. begin_journal)
+        self.resume_at = 0       # Étapes déjà faites lors d'une reprise
 
         # Logger
         self.logger = get_logger()
+        if self.tr_locked and not self.tr_s:
+            self.logger.warn("TR-lock demandé sans TR nominal : onsets sur task_clock seul.")
+            self.tr_locked = False
         
         # 1. Gestion des Chemins (Encapsulée)
         self._init_paths(folder_name)
@@ -56,6 +111,37 @@ class BaseTask:
         self.task_clock = core.Clock()
         self.codes = {} # À définir dans les classes enfants
 
+        # Timeline des triggers horodatée sur task_clock (+ perf_counter)
+        self.ParPort.attach_clock(self.task_clock)
+
+        # Attentes d'échéance communes (cf. wait_until). Période d'écran
+        # nominale ici, remplacée par la mesure (cf. measure_frame_rate).
+        frame_period = getattr(self.win, 'monitorFramePeriod', None) or 1.0 / 60.0
+        self.scheduler = DeadlineScheduler(self.task_clock, spin_margin=spin_margin,
+                                           frame_period=frame_period)
+
+        # Ramasse-miettes : gel avant le trigger, coupé dans les essais, collecté aux ITI
+        self.gc = GCPolicy(self.task_clock)
+
+        # Clavier horodaté par le périphérique (thread PTB), partagé avec le compteur TR
+        self.kb = KeyQueue(self.task_clock)
+        self.kb.start()
+
+        # Frames perdues par essai (fenêtres de rendu continu + flips en retard)
+        self.frames = FrameMonitor(self.win, frame_period, budget=frame_budget,
+                                   warn=self.logger.warn)
+
+        # Mode temps réel (opt-in) : appliqué avant le trigger, relâché avant la sauvegarde
+        self.realtime = RealtimeMode(enabled=realtime)
+
+        # Profilage opt-in : phases (profiler.span) + appels élémentaires instrumentés
+        self.profiler = Profiler(enabled=profile)
+        self.profiler.instrument(self.win, 'flip', 'flip')
+        self.profiler.instrument(self.ParPort, 'send_trigger', 'send_trigger')
+        self.profiler.instrument(self.kb, 'get', 'kb.get')
+        self.profiler.instrument(self.scheduler, 'wait_until', 'wait_until')
+        self.profiler.instrument(self.logger, '_print', 'logger')
+
     def _init_paths(self, folder_name):
         """Détecte la racine et crée le dossier de données."""
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -83,11 +169,14 @@ class BaseTask:
         self.logger.log(f"Setup Hardware pour {self.task_name}...")
         
         try:
-            # Appel au hardware_manager qui renvoie les instances
-            self.ParPort, self.EyeTracker = setup_hardware(
+            # Appel au hardware_manager (ou au pool persistant) qui renvoie les instances
+            acquire = self.hardware_pool.acquire if self.hardware_pool else setup_hardware
+            self.ParPort, self.EyeTracker = acquire(
                 self.parport_actif, 
                 self.eyetracker_actif, 
-                self.win
+                self.win,
+                parport_backend=self.parport_backend,
+                serial_port=self.serial_port
             )
             
             # Configuration EyeTracker spécifique
@@ -126,8 +215,12 @@ class BaseTask:
         self.win.flip()
         
         # Petite pause pour éviter de passer l'écran trop vite si l'utilisateur martèle les touches
-        core.wait(0.5) 
-        event.waitKeys()
+        # (mise à profit pour vérifier le frame rate en cache)
+        t_ready = core.getTime() + 0.5
+        self.validate_frame_rate(draw=self.instr_stim.draw)
+        core.wait(max(0.0, t_ready - core.getTime()))
+        self.kb.clear()
+        self.kb.wait()
 
     def wait_for_trigger(self, trigger_key='t'):
         """
@@ -138,13 +231,32 @@ class BaseTask:
         self.instr_stim.draw()
         self.win.flip()
         
+        # Stimuli et design prêts : gel des objets existants (hors des collectes)
+        n_frozen = self.gc.freeze()
+        self.logger.log(f"GC: {n_frozen} objets gelés.")
+
+        # Enregistrements écrits en continu à partir d'ici
+        self.start_record_stream()
+
+        if self.realtime.enabled:
+            report = self.realtime.apply()
+            msg = self.realtime.describe()
+            if report['rush'] and report['render_cpu'] is not None:
+                self.logger.ok(msg)
+            else:
+                self.logger.warn(msg)
+
         self.logger.log("Waiting for trigger...")
         
         # Attente bloquante
-        event.waitKeys(keyList=[trigger_key])
+        self.kb.clear()
+        self.kb.wait(keyList=[trigger_key])
         
         # Démarrage immédiat
         self.task_clock.reset() 
+
+        # Comptage de tous les TR suivants (le 1er est à t=0)
+        self._start_tr_listener(trigger_key)
         
         # Envoi marker start si défini
         start_code = self.codes.get('start_exp', 255)
@@ -154,8 +266,258 @@ class BaseTask:
             self.EyeTracker.start_recording()
             self.EyeTracker.send_message(f"START_{self.task_name.upper()}")
 
+        # Threads démarrés ci-dessus (TR, EyeLink) : hors du cœur de rendu
+        self.realtime.pin_threads()
+
         self.logger.log(f"Trigger reçu. Start Code: {start_code}")
 
+    def start_record_stream(self):
+        """
+        global_records devient une RecordList : chaque append part aussi vers
+        le thread d'écriture (JSONL) et est chronométré (phase 'record').
+        Appelé par wait_for_trigger ; à appeler directement sans trigger. Idempotent.
+        """
+        records = getattr(self, 'global_records', None)
+        if not isinstance(records, list) or isinstance(records, RecordList):
+            return
+        if self.enregistrer and self.stream_records:
+            try:
+                self.record_sink = RecordSink(f"{self._data_stem()}_records.jsonl",
+                                              fsync=self.fsync_policy)
+                for record in records:  # Enregistrés avant le trigger
+                    self.record_sink.push(record)
+                self.logger.log(f"Flux d'enregistrements : {self.record_sink.path} "
+                                f"(fsync {self.fsync_policy})")
+            except (OSError, ValueError) as e:
+                self.logger.err(f"Flux d'enregistrements impossible ({e}) : sauvegarde en fin de run seulement.")
+                self.record_sink = None
+        self.global_records = RecordList(records, sink=self.record_sink,
+                                         span=self.profiler.span('record'))
+
+    def sync_records(self):
+        """Point de synchronisation (fin de bloc, repos) : flux (fsync en politique 'block') + journal."""
+        if self.record_sink is not None:
+            self.record_sink.sync()
+        if self.journal is not None:
+            self.journal.sync()
+
+    def begin_journal(self, build_design, config=None):
+        """
+        Design du run, journalisé pour la reprise après crash (cf. utils/journal.py).
+        build_design() -> (design JSON-sérialisable, nombre d'étapes).
+        config : paramètres qui doivent être identiques pour reprendre (ex: run_type).
+
+        En reprise (resume=True), design et état de `random` sont relus du journal
+        et self.resume_at donne le nombre d'étapes déjà faites.
+        """
+        if not self.enregistrer:
+            return build_design()[0]
+
+        path = journal_path(self.root_dir, self.nom, type(self).__name__, self.session,
+                            run_type=getattr(self, 'run_type', None))
+        self.journal = RunJournal(path)
+
+        if self.resume:
+            state = load_journal(path)
+            if state is None or not state.resumable:
+                self.logger.warn("Reprise demandée mais aucun journal valide : nouveau run.")
+            elif state.design.get('config') != config:
+                self.logger.warn("Reprise refusée : paramètres différents du run interrompu. Nouveau run.")
+            else:
+                if state.rng_state is not None:
+                    random.setstate(state.rng_state)
+                else:
+                    self.logger.warn("Journal : état RNG illisible, tirages non reproduits.")
+                self.journal.attach()
+                self.resume_at = state.last_completed
+                self.logger.warn(f"Reprise : {state.last_completed}/{state.n_steps} étapes déjà faites.")
+                return state.design['design']
+
+        design, n_steps = build_design()
+        try:
+            self.journal.begin({'config': config, 'design': design}, n_steps)
+        except OSError as e:
+            self.logger.err(f"Journal de reprise impossible ({e})")
+            self.journal = None
+        return design
+
+    def journal_step(self, step):
+        """Étape `step` (1..n) terminée : état RNG + index dans le journal (quelques µs)."""
+        if self.journal is not None:
+            self.journal.commit(step)
+
+    def end_journal(self, completed=False):
+        """Run terminé : journal supprimé ; sinon (interruption) conservé pour une reprise."""
+        if self.journal is None:
+            return
+        if completed:
+            self.journal.finish()
+        else:
+            self.journal.close()
+            self.logger.warn(f"Journal de reprise conservé : {self.journal.path}")
+        self.journal = None
+
+    def _close_record_stream(self, data_path=None):
+        """Vide et ferme le flux ; le renomme sur le CSV final si data_path est donné."""
+        sink = self.record_sink
+        if sink is None:
+            return None
+        self.record_sink = None
+        if isinstance(getattr(self, 'global_records', None), RecordList):
+            self.global_records.sink = None
+        if not sink.close():
+            self.logger.warn("Flux d'enregistrements : écriture non terminée à la fermeture.")
+        if data_path:
+            try:
+                sink.rename(os.path.splitext(data_path)[0] + '_records.jsonl')
+            except OSError as e:
+                self.logger.warn(f"Flux d'enregistrements non renommé ({e})")
+        st = sink.stats()
+        self.logger.log(f"Flux d'enregistrements : {st['n_written']} lignes, {st['n_fsync']} fsync, "
+                        f"latence max {st['max_lag_ms']:.1f} ms, erreurs {st['n_errors']} -> {sink.path}")
+        return sink.path
+
+    def _data_stem(self, filename_suffix=""):
+        """Chemin sans extension des fichiers du run (horodatage fixé au premier appel)."""
+        if self._run_timestamp is None:
+            self._run_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        fname = f"{self.nom}_{self.task_name.replace(' ', '')}{filename_suffix}_{self._run_timestamp}"
+        return os.path.join(self.data_dir, fname)
+
+    def _start_tr_listener(self, trigger_key):
+        source = self.tr_source
+        read_pin = getattr(self.ParPort, 'read_pin', None)
+        # Backend sans lecture de broche, ou port non ouvert (mode dummy)
+        if source == 'port' and (read_pin is None or not getattr(self.ParPort, 'can_read_pins', False)):
+            self.logger.warn("TR: lecture de broche indisponible sur ce port, écoute clavier.")
+            source = 'keyboard'
+        try:
+            self.tr_listener = TRListener(self.task_clock, tr_s=self.tr_s, source=source,
+                                          key=trigger_key, read_pin=read_pin, key_queue=self.kb)
+            self.tr_listener.start(first_pulse_time=0.0)
+            if self.tr_locked:
+                self.tr_clock = TRClock(self.tr_listener, self.tr_s)
+        except Exception as e:
+            self.logger.err(f"TR: écoute impossible ({e})")
+            self.tr_listener = None
+
+    def flip_and_stamp(self, trigger=None, et_msg=None):
+        """
+        Flip + horodatage de l'onset sur task_clock, à partir du timestamp
+        renvoyé par le flip lui-même (pris juste après le swap) : pas de
+        latence Python entre le flip et la lecture de l'horloge.
+        trigger / et_msg : envoyés via callOnFlip, au même instant.
+        """
+        if trigger:
+            # Backends mesurant la latence flip -> trigger : instant du flip relevé juste avant
+            mark_flip = getattr(self.ParPort, 'mark_flip', None)
+            if mark_flip:
+                self.win.callOnFlip(mark_flip)
+            self.win.callOnFlip(self.ParPort.send_trigger, trigger)
+        if et_msg and self.eyetracker_actif:
+            self.win.callOnFlip(self.EyeTracker.send_message, et_msg)
+
+        t_flip = self.win.flip()
+        if t_flip is None:
+            return self.task_clock.getTime()
+        # win.flip() date sur logging.defaultClock : changement de base vers task_clock
+        return t_flip + logging.defaultClock.getLastResetTime() - self.task_clock.getLastResetTime()
+
+    def wait_until(self, t_goal, frame_aligned=False):
+        """
+        Attend l'instant t_goal (task_clock) : sommeil OS puis attente active.
+        frame_aligned=True : t_goal est l'onset visé du prochain flip (rend la
+        main une demi-frame avant). Retourne le dépassement (s).
+        """
+        return self.scheduler.wait_until(t_goal, frame_aligned=frame_aligned)
+
+    def set_frame_period(self, frame_period):
+        """Transmet la période d'écran mesurée au planificateur et au moniteur de frames."""
+        self.scheduler.set_frame_period(frame_period)
+        self.frames.set_frame_period(frame_period)
+
+    # --- FRÉQUENCE D'ÉCRAN (cache par écran / résolution / driver) ---
+
+    def measure_frame_rate(self, default=60.0):
+        """
+        Frame rate de la fenêtre : valeur en cache si valide (à confirmer par
+        validate_frame_rate), mesure complète sinon. Appelle _apply_frame_rate.
+        """
+        self._refresh_cache = RefreshCache(os.path.join(self.root_dir, 'data', 'refresh_cache.json'))
+        self._refresh_key = display_key(self.win)
+        self._refresh_pending = False
+
+        rate = self._refresh_cache.get(self._refresh_key)
+        if rate:
+            self._refresh_pending = True
+            self.logger.ok(f"Frame rate (cache) : {rate:.2f} Hz")
+        else:
+            self.logger.log("Mesure du frame rate en cours...")
+            rate = measure_full(self.win)
+            if rate:
+                self._refresh_cache.put(self._refresh_key, rate)
+                self.logger.ok(f"Frame rate mesuré : {rate:.2f} Hz")
+            else:
+                rate = default
+                self.logger.warn(f"Frame rate non détecté, valeur par défaut : {default:.1f} Hz")
+
+        self._apply_frame_rate(float(rate))
+        return self.frame_rate
+
+    def validate_frame_rate(self, draw=None, tolerance=0.02):
+        """
+        Vérification rapide (20 frames) d'une valeur issue du cache, à lancer sur
+        un écran statique (draw redessine l'écran courant). Si l'écart relatif
+        dépasse tolerance, nouvelle mesure complète et mise à jour du cache.
+        """
+        if not getattr(self, '_refresh_pending', False):
+            return
+        self._refresh_pending = False
+        try:
+            quick = measure_quick(self.win, n_frames=20, draw=draw)
+        except Exception as e:
+            self.logger.warn(f"Vérification frame rate impossible : {e}")
+            return
+        if quick and abs(quick - self.frame_rate) / self.frame_rate <= tolerance:
+            return
+
+        self.logger.warn(f"Frame rate en cache ({self.frame_rate:.2f} Hz) contredit "
+                         f"par la vérification ({quick or 0:.2f} Hz) : nouvelle mesure.")
+        rate = measure_full(self.win)
+        if rate:
+            self._refresh_cache.put(self._refresh_key, rate)
+            self.logger.ok(f"Frame rate mesuré : {rate:.2f} Hz")
+            self._apply_frame_rate(float(rate))
+
+    def _apply_frame_rate(self, rate):
+        """Fixe self.frame_rate. Les tâches surchargent pour leurs grandeurs dérivées."""
+        self.frame_rate = rate
+        self.set_frame_period(1.0 / rate)
+
+    def schedule_onset(self, planned_s):
+        """
+        Onset à viser sur task_clock pour un onset planifié planned_s.
+        Mode tr_locked : planned_s est en temps scanner nominal (volume x TR) et
+        ré-ancré sur les TR reçus (dérive PC/scanner corrigée). Sinon : inchangé.
+        """
+        if self.tr_clock is None:
+            return planned_s
+        return self.tr_clock.to_task_time(planned_s)
+
+    def planned_now(self):
+        """Temps courant dans le référentiel des onsets planifiés (cf. schedule_onset)."""
+        now = self.task_clock.getTime()
+        if self.tr_clock is None:
+            return now
+        return self.tr_clock.to_planned(now)
+
+    def announce_run_length(self, total_s):
+        """Log la durée totale (déterministe) du run et le nombre de volumes à programmer."""
+        msg = f"Durée du run planifiée : {total_s:.2f} s"
+        if self.tr_s:
+            msg += f" -> {int(-(-total_s // self.tr_s))} volumes (TR {self.tr_s:.3f} s)"
+        self.logger.log(msg)
+
     def show_resting_state(self, duration_s=10.0, code_start_key='rest_start', code_end_key='rest_end'):
         """
         Affiche la croix de fixation pour une durée précise (Baseline).
@@ -171,9 +533,14 @@ class BaseTask:
         # Affichage
         self.fixation.draw()
         self.win.flip()
-        
+        t_end = self.task_clock.getTime() + duration_s
+
+        # Repos : moment idéal pour une collecte GC gén. 0/1 et un fsync du flux
+        self.gc.collect_idle(t_end)
+        self.sync_records()
+
         # Attente précise
-        core.wait(duration_s)
+        self.wait_until(t_end)
         
         # Trigger Fin Repos (optionnel, parfois on enchaîne direct sur un essai)
         if code_end_key:
@@ -181,36 +548,221 @@ class BaseTask:
             self.ParPort.send_trigger(c_end)
             if self.eyetracker_actif: self.EyeTracker.send_message("REST_END")
 
+    def gaze_within(self, region, window_ms=200, min_fraction=0.8):
+        """
+        Vérifie que le regard est resté dans region (pixels EyeLink) sur les
+        window_ms dernières ms. Lit le tampon du GazeStream : aucun appel pylink.
+        Toujours vrai sans EyeTracker actif.
+        """
+        if not self.eyetracker_actif:
+            return True
+        return self.EyeTracker.gaze_within(region, window_ms, min_fraction)
+
+    def stop_eyetracker(self):
+        """
+        Arrête l'enregistrement EyeLink et lance le transfert EDF en arrière-plan.
+        À appeler en début de bloc finally : le transfert tourne pendant la
+        sauvegarde CSV et le QC au lieu de les précéder.
+        """
+        if not self.eyetracker_actif or self.et_transfer is not None:
+            return
+        try:
+            self.EyeTracker.stop_recording()
+            self.EyeTracker.send_message("END_EXP")
+            self.et_transfer = self.EyeTracker.close_and_transfer_data(self.data_dir, background=True)
+        except Exception as e:
+            self.logger.err(f"Erreur arrêt EyeTracker : {e}")
+
+    def wait_background_io(self, timeout=None):
+        """
+        Attend la fin des tâches de fond (transfert EDF) en affichant la progression.
+        Sans HardwarePool seulement : sinon main.py confie le transfert au pool
+        (HardwarePool.track_transfer) et rend la main au menu sans attendre.
+        """
+        if self.et_transfer is None:
+            return True
+        ok = self.et_transfer.wait(timeout=timeout, report=self.logger.log)
+        if ok:
+            self.logger.ok(f"EDF transféré : {self.et_transfer.local_path}")
+        else:
+            self.logger.warn(self.et_transfer.progress_str())
+        return ok
+
+    def close(self):
+        """Libère les ressources propres à la tâche (lecteur clavier, compteur TR)."""
+        if self.tr_listener is not None:
+            self.tr_listener.stop()
+        self.kb.stop()
+        self.gc.close()
+        self.realtime.release()
+        self.profiler.restore()
+        self._close_record_stream()
+        self.end_journal()
+
+    def _save_sidecars(self, data_path):
+        """
+        Écrit les fichiers annexes (même nom que le CSV + suffixe).
+        Appelé AVANT l'écriture du CSV principal pour qu'il reste le plus récent.
+        """
+        stem = os.path.splitext(data_path)[0]
+
+        if self.tr_listener is not None:
+            self.tr_listener.stop()
+            try:
+                out = self.tr_listener.save(f"{stem}_tr.csv")
+                if out:
+                    self.logger.log(f"TR table saved: {out}")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde table TR : {e}")
+
+        stats = self.scheduler.stats()
+        if stats['n_waits']:
+            self.logger.log(
+                f"Attentes : {stats['n_waits']} | dépassement moyen {stats['overshoot_ms_mean']:.3f} ms, "
+                f"p99 {stats['overshoot_ms_p99']:.3f} ms, max {stats['overshoot_ms_max']:.3f} ms | "
+                f"attente active {stats['spin_fraction'] * 100:.1f} %"
+            )
+            try:
+                self.scheduler.save(f"{stem}_waits.csv")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde attentes : {e}")
+
+        gcs = self.gc.summary()
+        if gcs['n_collections']:
+            self.logger.log(
+                f"GC : {gcs['n_collections']} collectes ({gcs['n_idle']} en ITI) | "
+                f"pause max {gcs['max_pause_ms']:.2f} ms | pendant un essai : {gcs['n_in_critical']}"
+            )
+            try:
+                self.gc.save(f"{stem}_gc.csv")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde journal GC : {e}")
+
+        frames = self.frames.summary()
+        if frames['n_intervals'] or frames['n_late']:
+            self.logger.log(
+                f"Frames : {frames['n_intervals']} intervalles (médiane {frames['median_ms']:.2f} ms, "
+                f"max {frames['max_ms']:.2f} ms) | perdues {frames['n_dropped']} | "
+                f"flips en retard {frames['n_late']}"
+            )
+            try:
+                self.frames.save(f"{stem}_frames.csv")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde histogramme frames : {e}")
+
+        if self.profiler.enabled:
+            top = ", ".join(f"{name} {total:.0f} ms" for name, total in self.profiler.top())
+            self.logger.log(f"Profil : {self.profiler.n} mesures | phases dominantes : {top}")
+            try:
+                self.profiler.save(f"{stem}_profile.csv")
+                self.profiler.save_histograms(f"{stem}_profile_hist.csv")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde profil : {e}")
+
+        timeline = getattr(self.ParPort, 'timeline', None)
+        if timeline is not None:
+            try:
+                out = timeline.flush(f"{stem}_triggers.csv")
+                if out:
+                    self.logger.log(f"Trigger timeline saved: {out} ({len(timeline)} écritures)")
+            except Exception as e:
+                self.logger.err(f"Erreur sauvegarde timeline triggers : {e}")
+
+        # Latence d'écriture obtenue (backend série)
+        latency_stats = getattr(self.ParPort, 'latency_stats', None)
+        if latency_stats is not None:
+            ls = latency_stats()
+            if ls['n'] or ls['coalesced'] or ls['errors']:
+                self.logger.log(
+                    f"Triggers série : {ls['n']} écritures | latence moyenne {ls['mean_ms']:.3f} ms, "
+                    f"max {ls['max_ms']:.3f} ms | coalescés {ls['coalesced']} | erreurs {ls['errors']}"
+                )
+                try:
+                    self.ParPort.save_latencies(f"{stem}_trigger_latency.csv")
+                except Exception as e:
+                    self.logger.err(f"Erreur sauvegarde latences triggers : {e}")
+
+        # Largeurs d'impulsion réellement délivrées (backends à PulseScheduler)
+        pulses = getattr(self.ParPort, 'scheduler', None)
+        if pulses is not None and hasattr(pulses, 'summary'):
+            ps = pulses.summary()
+            if ps['n_pulses']:
+                self.logger.log(
+                    f"Impulsions : {ps['n_pulses']} | écart de largeur moyen {ps['width_err_ms_mean']:.3f} ms, "
+                    f"largeur max {ps['width_ms_max']:.3f} ms | tronquées {ps['n_preempted']}, "
+                    f"fusionnées {ps['n_merged']}, annulées {ps['n_cancelled']} | erreurs {ps['n_errors']}"
+                )
+                try:
+                    pulses.save(f"{stem}_pulses.csv")
+                except Exception as e:
+                    self.logger.err(f"Erreur sauvegarde largeurs d'impulsion : {e}")
+
+    def _save_parquet(self, data_path, data_list):
+        """Copie typée du CSV (<stem>.parquet) si la tâche déclare RECORD_SCHEMA et si pyarrow est installé."""
+        if not self.RECORD_SCHEMA:
+            return None
+        try:
+            out = write_parquet(data_list, os.path.splitext(data_path)[0] + '.parquet', self.RECORD_SCHEMA)
+        except Exception as e:
+            self.logger.err(f"Erreur sauvegarde Parquet : {e}")
+            return None
+        if out is None:
+            self.logger.warn("pyarrow absent : pas de sortie Parquet (CSV seulement).")
+        else:
+            self.logger.log(f"Parquet saved: {out}")
+        return out
+
+    def _register_run(self, data_path, n_records):
+        """Inscrit le CSV écrit dans le catalogue des runs (cf. utils/catalog.py)."""
+        try:
+            register_run(self.root_dir, data_path, nom=self.nom, session=self.session,
+                         task=type(self).__name__, run_type=getattr(self, 'run_type', None),
+                         mode=getattr(self, 'mode', None), timestamp=self._run_timestamp,
+                         n_records=n_records)
+        except Exception as e:
+            self.logger.warn(f"Catalogue des runs non mis à jour ({e})")
+
     def save_data(self, data_list=None, filename_suffix=""):
         """
         Sauvegarde générique CSV.
         Si data_list est None, tente de sauvegarder self.global_records.
+        Retourne le chemin du fichier écrit (None si rien n'a été sauvegardé).
         """
+        # Fin du run : sauvegarde et QC à priorité normale, sur tous les cœurs
+        self.realtime.release()
+
         # 1. Gestion automatique de la liste de données
         if data_list is None:
             data_list = getattr(self, 'global_records', [])
 
         if not self.enregistrer or not data_list:
+            self._close_record_stream()
             self.logger.warn("Aucune donnée à sauvegarder (ou enregistrement désactivé).")
-            return
+            return None
+
+        path = self._data_stem(filename_suffix) + ".csv"
 
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        fname = f"{self.nom}_{self.task_name.replace(' ', '')}{filename_suffix}_{timestamp}.csv"
-        path = os.path.join(self.data_dir, fname)
+        # Flux déjà complet sur disque : il ne reste qu'à le renommer comme le CSV
+        self._close_record_stream(path)
+        self._save_sidecars(path)
+        self._save_parquet(path, data_list)
         
         try:
             import csv
-            # On récupère toutes les clés possibles (au cas où certaines lignes n'ont pas toutes les colonnes)
-            keys = set().union(*(d.keys() for d in data_list))
+            # Colonnes du schéma de la tâche d'abord, puis les autres (au cas où certaines lignes n'ont pas toutes les colonnes)
+            keys = order_columns(data_list, self.RECORD_SCHEMA)
             
             with open(path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=sorted(list(keys))) # Sorted pour l'ordre
+                writer = csv.DictWriter(f, fieldnames=keys)
                 writer.writeheader()
                 writer.writerows(data_list)
             self.logger.log(f"Data saved: {path}")
+            self._register_run(path, len(data_list))
+            return path
             
         except Exception as e:
             self.logger.err(f"CRITICAL SAVE ERROR: {e}")
             # Sauvegarde brute de secours
             with open(path + '.bak', 'w') as f:
-                f.write(str(data_list))
\ No newline at end of file
+                f.write(str(data_list))
+            return None
\ No newline at end of file
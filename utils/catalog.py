@@ -0,0 +1,120 @@
+"""
+catalog.py
+----------
+Catalogue local des runs sauvegardés (SQLite, data/catalog.sqlite).
+
+save_data() enregistre chaque CSV écrit avec participant, session, tâche,
+type de run et horodatage. Le QC, les scripts d'analyse et le menu
+interrogent le catalogue (requêtes indexées) au lieu de parcourir les
+dossiers de données :
+
+    path = latest_run(root_dir, task='TemporalJudgement', nom='P01', session='02')
+
+Les chemins sont stockés relativement à la racine du projet (dossier data
+déplaçable). Les fichiers antérieurs au catalogue n'y figurent pas.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    nom         TEXT NOT NULL,
+    session     TEXT NOT NULL,
+    task        TEXT NOT NULL,
+    run_type    TEXT,
+    mode        TEXT,
+    timestamp   TEXT NOT NULL,
+    path        TEXT NOT NULL UNIQUE,
+    n_records   INTEGER,
+    created     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (nom, session, task, run_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_task ON runs (task, timestamp);
+"""
+
+
+def catalog_path(root_dir):
+    return os.path.join(root_dir, 'data', 'catalog.sqlite')
+
+
+def _connect(root_dir):
+    path = catalog_path(root_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = sqlite3.connect(path, timeout=5.0)
+    con.executescript(_SCHEMA)
+    return con
+
+
+def _rel(root_dir, path):
+    return os.path.relpath(os.path.abspath(path), root_dir).replace(os.sep, '/')
+
+
+def register_run(root_dir, path, nom, session, task, run_type=None, mode=None,
+                 timestamp=None, n_records=None):
+    """Ajoute (ou met à jour) un run sauvegardé. Retourne son id."""
+    now = datetime.now().strftime('%Y%m%d_%H%M%S')
+    con = _connect(root_dir)
+    try:
+        with con:
+            cur = con.execute(
+                "INSERT INTO runs (nom, session, task, run_type, mode, timestamp, path, n_records, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET n_records = excluded.n_records, created = excluded.created",
+                (nom, str(session), task, run_type, mode, timestamp or now,
+                 _rel(root_dir, path), n_records, now))
+            return cur.lastrowid
+    finally:
+        con.close()
+
+
+def find_runs(root_dir, task=None, nom=None, session=None, run_type=None, limit=None):
+    """
+    Runs correspondant aux critères (None = pas de filtre), du plus récent au
+    plus ancien. Retourne une liste de dicts (path absolu).
+    """
+    if not os.path.exists(catalog_path(root_dir)):
+        return []
+    clauses, params = [], []
+    for col, value in (('task', task), ('nom', nom), ('session', session), ('run_type', run_type)):
+        if value is not None:
+            clauses.append(f"{col} = ?")
+            params.append(str(value))
+    sql = "SELECT nom, session, task, run_type, mode, timestamp, path, n_records FROM runs"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY timestamp DESC, id DESC"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+
+    con = _connect(root_dir)
+    try:
+        con.row_factory = sqlite3.Row
+        rows = [dict(r) for r in con.execute(sql, params)]
+    finally:
+        con.close()
+    for r in rows:
+        r['path'] = os.path.join(root_dir, *r['path'].split('/'))
+    return rows
+
+
+def latest_run(root_dir, **criteria):
+    """Chemin du CSV le plus récent correspondant aux critères (cf. find_runs), ou None."""
+    rows = find_runs(root_dir, limit=1, **criteria)
+    return rows[0]['path'] if rows else None
+
+
+def last_session(root_dir, nom):
+    """Dernière session enregistrée pour un participant (int), ou None."""
+    if not os.path.exists(catalog_path(root_dir)):
+        return None
+    con = _connect(root_dir)
+    try:
+        row = con.execute("SELECT MAX(CAST(session AS INTEGER)) FROM runs WHERE nom = ?",
+                          (nom,)).fetchone()
+    finally:
+        con.close()
+    return row[0] if row and row[0] is not None else None
+
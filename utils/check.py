@@ -1,20 +1,25 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
 from pathlib import Path
-import glob
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.catalog import latest_run
 
 # ============================================================================
 # CHARGER LES DONNÉES
 # ============================================================================
-# Remplacez par le chemin de votre fichier CSV
-data_files = glob.glob('data/temporal_judgement/*.csv')
-if not data_files:
-    print("❌ Aucun fichier CSV trouvé dans data/temporal_judgement/")
+# Dernier run TemporalJudgement du catalogue (optionnel : python utils/check.py <nom> [session])
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+nom = sys.argv[1] if len(sys.argv) > 1 else None
+session = f"{int(sys.argv[2]):02d}" if len(sys.argv) > 2 else None
+
+csv_path = latest_run(ROOT_DIR, task='TemporalJudgement', nom=nom, session=session)
+if csv_path is None or not Path(csv_path).exists():
+    print("❌ Aucun run TemporalJudgement dans le catalogue (data/catalog.sqlite)")
     exit(1)
 
-# Charger le dernier fichier généré
-csv_path = max(data_files, key=lambda f: Path(f).stat().st_mtime)
 print(f"📂 Chargement : {csv_path}")
 df = pd.read_csv(csv_path)
 
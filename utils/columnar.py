@@ -0,0 +1,127 @@
+"""
+columnar.py
+-----------
+Sortie typée des enregistrements : schéma déclaré par tâche + Parquet.
+
+Chaque tâche déclare RECORD_SCHEMA (colonne -> type) :
+
+    RECORD_SCHEMA = {'trial_number': 'int', 'rt': 'float', 'is_target': 'bool', ...}
+
+Types : 'int' (int64), 'float' (float64), 'bool', 'str'. Toutes les
+colonnes sont nullables (RT absent, évènements sans essai...).
+
+    - ordre des colonnes (CSV et Parquet) : celui du schéma, puis les
+      colonnes non déclarées par ordre alphabétique ;
+    - Parquet (<stem>.parquet, zstd) si pyarrow est installé : colonnes
+      typées relues sans aucun parsing ;
+    - read_records() : lecture côté QC / analyse, Parquet en priorité, CSV
+      sinon (booléens et numériques reconvertis).
+"""
+
+import math
+import os
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+ARROW_TYPES = {
+    'int': 'int64',
+    'float': 'float64',
+    'bool': 'bool_',
+    'str': 'string',
+}
+
+
+def order_columns(records, schema=None):
+    """Colonnes déclarées (ordre du schéma) présentes dans les données, puis les autres triées."""
+    keys = set().union(*(r.keys() for r in records)) if records else set()
+    declared = [c for c in (schema or {}) if c in keys]
+    return declared + sorted(keys.difference(declared))
+
+
+def arrow_schema(schema, columns):
+    """pyarrow.Schema pour `columns` (colonnes non déclarées : type inféré, None)."""
+    import pyarrow as pa
+    fields = []
+    for col in columns:
+        kind = (schema or {}).get(col)
+        if kind is not None:
+            fields.append(pa.field(col, getattr(pa, ARROW_TYPES[kind])()))
+    return pa.schema(fields)
+
+
+def _column(values, arrow_type, name=None):
+    import pyarrow as pa
+    if arrow_type is None:
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    # Valeur hors type (ex: 3.0 ou NaN dans une colonne int) : NaN -> null,
+    # puis conversion stricte (aucune troncature silencieuse)
+    values = [None if isinstance(v, float) and math.isnan(v) else v for v in values]
+    try:
+        return pa.array(values).cast(arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        logger.warn(f"Parquet : colonne '{name}' non convertible en {arrow_type} "
+                    f"(valeurs fractionnaires ou hors type), type inféré conservé.")
+        return _column(values, None)
+
+
+def write_parquet(records, path, schema=None):
+    """
+    Écrit les enregistrements en Parquet typé. Retourne le chemin, ou None
+    si pyarrow n'est pas installé.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+
+    columns = order_columns(records, schema)
+    declared = arrow_schema(schema, columns)
+    arrays = []
+    for col in columns:
+        arrow_type = declared.field(col).type if col in declared.names else None
+        arrays.append(_column([r.get(col) for r in records], arrow_type, col))
+
+    table = pa.Table.from_arrays(arrays, names=columns)
+    pq.write_table(table, path, compression='zstd')
+    return path
+
+
+def _coerce_csv(df):
+    """CSV (non typé) : colonnes 'True'/'False' -> booléen, texte numérique -> nombre."""
+    import pandas as pd
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].dropna().astype(str)
+        if len(values) and values.isin(['True', 'False']).all():
+            df[col] = df[col].map({'True': True, 'False': False, True: True, False: False}).astype('boolean')
+            continue
+        numeric = pd.to_numeric(df[col], errors='coerce')
+        if numeric.notna().sum() == df[col].notna().sum():
+            df[col] = numeric
+    return df
+
+
+def read_records(csv_path):
+    """
+    DataFrame d'un run à partir du chemin du CSV : <stem>.parquet s'il existe
+    (et si pyarrow est installé), sinon le CSV avec reconversion des types.
+    """
+    import pandas as pd
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if os.path.exists(parquet_path):
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
+    return _coerce_csv(pd.read_csv(csv_path))
@@ -0,0 +1,134 @@
+"""
+frame_monitor.py
+----------------
+Comptage des frames perdues, par essai.
+
+Deux sources :
+    - fenêtres de rendu continu (begin / pause) : win.recordFrameIntervals
+      est activé, les intervalles sont vidés dans un tableau préalloué et
+      tout intervalle > 1.5 frame compte round(iv / période) - 1 frames perdues ;
+    - flips isolés visant une échéance (add_late) : retard du flip sur
+      l'onset visé, en frames entières.
+
+Seuls les intervalles pris dans une fenêtre sont gardés : un écran statique
+(core.wait entre deux flips) n'est pas une frame perdue.
+"""
+
+import numpy as np
+
+
+class FrameMonitor:
+    def __init__(self, win, frame_period, capacity=262144, budget=0, warn=print):
+        """
+        Args:
+            win: Fenêtre PsychoPy
+            frame_period (float): Période d'écran mesurée (s)
+            capacity (int): Nombre d'intervalles conservés (préalloués)
+            budget (int): Frames perdues tolérées par essai avant avertissement console
+            warn (callable): Sortie des avertissements (ex: logger.warn)
+        """
+        self.win = win
+        self.frame_period = float(frame_period)
+        self.capacity = int(capacity)
+        self.budget = int(budget)
+        self.warn = warn
+
+        self._iv = np.zeros(self.capacity)
+        self.n = 0              # intervalles stockés
+        self.n_overflow = 0     # intervalles ignorés (tampon plein)
+        self.n_late = 0         # frames de retard sur les flips isolés
+        self._trial_dropped = 0
+        self._recording = False
+
+    def set_frame_period(self, frame_period):
+        self.frame_period = float(frame_period)
+
+    # --- Fenêtres de rendu continu ---
+
+    def begin(self):
+        """À appeler juste APRÈS un flip : les intervalles suivants sont enregistrés."""
+        self.win.recordFrameIntervals = True  # PsychoPy remet lastFrameT à maintenant
+        del self.win.frameIntervals[:]
+        self._recording = True
+
+    def pause(self):
+        """Ferme la fenêtre courante et ajoute ses frames perdues à l'essai courant."""
+        if not self._recording:
+            return 0
+        self.win.recordFrameIntervals = False
+        dropped = self._drain()
+        self._recording = False
+        self._trial_dropped += dropped
+        return dropped
+
+    def _drain(self):
+        intervals = self.win.frameIntervals
+        k = len(intervals)
+        if k == 0:
+            return 0
+        iv = np.asarray(intervals[:k], dtype=float)
+        del intervals[:k]
+
+        room = self.capacity - self.n
+        if room < k:
+            self.n_overflow += k - room
+        kept = iv[:max(room, 0)]
+        self._iv[self.n:self.n + len(kept)] = kept
+        self.n += len(kept)
+        return self._count_dropped(iv)
+
+    def _count_dropped(self, iv):
+        late = iv[iv > 1.5 * self.frame_period]
+        return int(np.sum(np.round(late / self.frame_period) - 1))
+
+    # --- Flips isolés ---
+
+    def add_late(self, t_flip, t_target):
+        """Flip à t_flip pour un onset visé t_target (même horloge). Retourne les frames de retard."""
+        late = max(0, int(round((t_flip - t_target) / self.frame_period)))
+        self.n_late += late
+        self._trial_dropped += late
+        return late
+
+    # --- Bilan ---
+
+    def end_trial(self, label=''):
+        """Frames perdues de l'essai (avertissement si > budget), puis remise à zéro."""
+        self.pause()
+        dropped = self._trial_dropped
+        self._trial_dropped = 0
+        if dropped > self.budget:
+            self.warn(f"Frames perdues {label}: {dropped} (budget {self.budget})")
+        return dropped
+
+    def intervals(self):
+        return self._iv[:self.n]
+
+    def summary(self):
+        iv = self.intervals()
+        return {
+            'n_intervals': int(self.n),
+            'n_dropped': self._count_dropped(iv) if self.n else 0,
+            'n_late': int(self.n_late),
+            'median_ms': float(np.median(iv) * 1000) if self.n else float('nan'),
+            'max_ms': float(iv.max() * 1000) if self.n else float('nan'),
+        }
+
+    def save(self, path, bin_ms=0.5):
+        """
+        Histogramme des intervalles (colonnes bin_start_ms, bin_end_ms, count).
+        Retourne le chemin, ou None si aucun intervalle.
+        """
+        if self.n == 0:
+            return None
+        iv_ms = self.intervals() * 1000.0
+        top = max(4.0 * self.frame_period * 1000.0, float(iv_ms.max()) + bin_ms)
+        edges = np.arange(0.0, top + bin_ms, bin_ms)
+        counts, edges = np.histogram(iv_ms, bins=edges)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# frame_period_ms={self.frame_period * 1000:.4f} n_late_frames={self.n_late}\n")
+            f.write("bin_start_ms,bin_end_ms,count\n")
+            for lo, hi, c in zip(edges[:-1], edges[1:], counts):
+                if c:
+                    f.write(f"{lo:.2f},{hi:.2f},{int(c)}\n")
+        return path
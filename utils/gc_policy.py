@@ -0,0 +1,140 @@
+"""
+gc_policy.py
+------------
+Politique de ramasse-miettes pendant une tâche.
+
+    - freeze() après la préparation des stimuli : tous les objets existants
+      passent en génération permanente, les collectes ne les parcourent plus ;
+    - critical() : GC désactivé dans les sections déclarées (essai, flips),
+      réactivé à la sortie même sur exception ;
+    - collect_idle() : collecte des générations 0/1 seulement si la marge
+      avant la prochaine échéance le permet (ITI, repos).
+
+Chaque collecte (automatique ou explicite) est horodatée via gc.callbacks :
+une collecte pendant une section critique est signalée (in_critical=1).
+"""
+
+import gc
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class GCPolicy:
+    def __init__(self, clock, min_slack_s=0.05, capacity=8192):
+        """
+        Args:
+            clock: Horloge de la tâche (task_clock)
+            min_slack_s (float): Marge minimale pour une collecte d'ITI (s)
+            capacity (int): Collectes enregistrées au maximum
+        """
+        self.clock = clock
+        self.min_slack_s = float(min_slack_s)
+        self.capacity = int(capacity)
+
+        # start_task_s, duration_ms, generation, collected, in_critical, idle
+        self._log = np.zeros((self.capacity, 6))
+        self.n = 0
+        self._depth = 0
+        self._was_enabled = True
+        self._idle = False
+        self._t0 = None
+        self._task_t0 = None
+        self._frozen = False
+
+        gc.callbacks.append(self._on_gc)
+
+    # --- Politique ---
+
+    def freeze(self):
+        """Collecte complète puis gel des objets existants (stimuli, design)."""
+        gc.collect()
+        gc.freeze()
+        self._frozen = True
+        return gc.get_freeze_count()
+
+    @contextmanager
+    def critical(self):
+        """Section sans GC (réentrante). Rétablit l'état précédent en sortie."""
+        if self._depth == 0:
+            self._was_enabled = gc.isenabled()
+            gc.disable()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._was_enabled:
+                gc.enable()
+
+    def collect_idle(self, t_until, generation=1):
+        """
+        Collecte les générations <= generation (max 1) si t_until (task_clock)
+        laisse au moins min_slack_s. Retourne la durée (s), ou None si sautée.
+        """
+        if self._depth > 0:
+            return None
+        if t_until - self.clock.getTime() < self.min_slack_s:
+            return None
+        self._idle = True
+        t0 = time.perf_counter()
+        try:
+            gc.collect(min(int(generation), 1))
+        finally:
+            self._idle = False
+        return time.perf_counter() - t0
+
+    def close(self):
+        """Dégèle, réactive le GC et retire le callback (fin de tâche)."""
+        if self._frozen:
+            gc.unfreeze()
+            self._frozen = False
+        self._depth = 0
+        gc.enable()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    # --- Enregistrement ---
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._t0 = time.perf_counter()
+            self._task_t0 = self.clock.getTime()
+            return
+        if self._t0 is None:
+            return
+        if self.n < self.capacity:
+            self._log[self.n] = (
+                self._task_t0,
+                (time.perf_counter() - self._t0) * 1000.0,
+                info.get('generation', -1),
+                info.get('collected', 0),
+                1.0 if self._depth > 0 else 0.0,
+                1.0 if self._idle else 0.0,
+            )
+            self.n += 1
+        self._t0 = None
+
+    def collections(self):
+        return self._log[:self.n]
+
+    def summary(self):
+        c = self.collections()
+        return {
+            'n_collections': int(self.n),
+            'n_idle': int(c[:, 5].sum()) if self.n else 0,
+            'n_in_critical': int(c[:, 4].sum()) if self.n else 0,
+            'max_pause_ms': float(c[:, 1].max()) if self.n else 0.0,
+            'total_pause_ms': float(c[:, 1].sum()) if self.n else 0.0,
+        }
+
+    def save(self, path):
+        """Une ligne par collecte. Retourne le chemin, ou None si aucune collecte."""
+        if self.n == 0:
+            return None
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("start_task_s,duration_ms,generation,collected,in_critical,idle\n")
+            for start, dur, gen, coll, crit, idle in self.collections():
+                f.write(f"{start:.6f},{dur:.4f},{int(gen)},{int(coll)},{int(crit)},{int(idle)}\n")
+        return path
@@ -13,6 +13,9 @@ class SafeDummyParPort:
     Used when hardware is disabled or drivers are missing.
     """
     def __init__(self): 
+        self.timeline = None
+
+    def attach_clock(self, clock): 
         pass
 
     def send_trigger(self, code, duration=0.03): 
@@ -22,6 +25,9 @@ class SafeDummyParPort:
     def reset(self): 
         pass
 
+    def close(self): 
+        pass
+
 class SafeDummyEyeTracker:
     """
     Mock class for EyeTracker (Pylink).
@@ -33,7 +39,7 @@ class SafeDummyEyeTracker:
     def initialize(self, file_name="TEST.EDF"): 
         logger.log(f"[Dummy ET] Virtual file defined: {file_name}")
 
-    def send_message(self, msg): 
+    def send_message(self, msg, sync=False): 
         pass 
 
     def start_recording(self): 
@@ -42,8 +48,12 @@ class SafeDummyEyeTracker:
     def stop_recording(self): 
         pass
 
-    def close_and_transfer_data(self, local_folder="data"): 
+    def gaze_within(self, region, window_ms=200, min_fraction=0.8): 
+        return True
+
+    def close_and_transfer_data(self, local_folder="data", background=False): 
         logger.log(f"[Dummy ET] Data transfer simulation to {local_folder}")
+        return None
 
 # =============================================================================
 # 2. SECURE IMPORTS (Dependency Injection)
@@ -68,55 +78,213 @@ except (ImportError, OSError) as e:
 
 
 # =============================================================================
-# 3. FACTORY FUNCTION
+# 3. FACTORY FUNCTIONS
 # =============================================================================
-def setup_hardware(parport_actif=False, eyetracker_actif=False, window=None):
+def _create_parport(backend='lpt', serial_port=None):
+    """
+    Opens the trigger port for the given backend, or returns a Dummy on failure.
+    backend: 'lpt' (physical parallel port), 'serial' (USB-serial TTL box on
+             serial_port) or 'emulated' (memory-mapped file, no hardware).
+    """
+    if backend == 'serial':
+        try:
+            from hardware.serial_trigger import SerialTrigger
+            lpt = SerialTrigger(port=serial_port or 'COM3')
+            logger.ok(f"LPT: Serial trigger box connected on {lpt.port_name}.")
+            return lpt
+        except Exception as e:
+            logger.err(f"LPT: Serial init failed ({e}). Reverting to Dummy.")
+            return SafeDummyParPort()
+
+    if backend == 'emulated':
+        try:
+            from hardware.emulated_port import EmulatedParPort
+            lpt = EmulatedParPort()
+            logger.ok(f"LPT: Emulated port writing to {lpt.path}")
+            return lpt
+        except Exception as e:
+            logger.err(f"LPT: Emulator init failed ({e}). Reverting to Dummy.")
+            return SafeDummyParPort()
+
+    if not ParPortAvailable:
+        logger.log("LPT: Active in config but drivers missing. Using Dummy.")
+        return SafeDummyParPort()
+    try:
+        lpt = ParPort(address=0x378)
+        logger.ok("LPT: Parallel Port connected successfully.")
+        return lpt
+    except Exception as e:
+        logger.err(f"LPT: Init failed ({e}). Reverting to Dummy.")
+        return SafeDummyParPort()
+
+
+def _create_eyetracker():
+    """Instantiates the real EyeTracker, or returns a Dummy on failure."""
+    if not EyeTrackerAvailable:
+        logger.log("EyeTracker: Active in config but drivers missing. Using Dummy.")
+        return SafeDummyEyeTracker()
+    try:
+        # Instantiate Real EyeTracker
+        et = EyeTracker(dummy_mode=False)
+        
+        # Check internal state (some wrappers have their own dummy flag)
+        if not getattr(et, 'dummy_mode', False):
+            logger.ok("EyeTracker: Connected and Ready.")
+        else:
+            logger.warn("EyeTracker: Driver loaded but device not found (Internal Dummy).")
+        return et
+    except Exception as e:
+        logger.err(f"EyeTracker: Init failed ({e}). Reverting to Dummy.")
+        return SafeDummyEyeTracker()
+
+
+def setup_hardware(parport_actif=False, eyetracker_actif=False, window=None,
+                   parport_backend='lpt', serial_port=None):
     """
     Initializes hardware based on configuration and availability.
+    parport_backend selects the trigger port implementation (see _create_parport).
     
     Returns:
         tuple: (lpt_instance, et_instance)
         Both are guaranteed to be objects (Real or Dummy), never None.
     """
-    
-    # --- 1. SETUP PARALLEL PORT ---
-    lpt = None
-    if parport_actif:
-        if ParPortAvailable:
-            try:
-                lpt = ParPort(address=0x378)
-                logger.ok("LPT: Parallel Port connected successfully.")
-            except Exception as e:
-                logger.err(f"LPT: Init failed ({e}). Reverting to Dummy.")
-                lpt = SafeDummyParPort()
+    # Disabled devices are intentionally replaced by Dummies
+    lpt = _create_parport(parport_backend, serial_port) if parport_actif else SafeDummyParPort()
+    et = _create_eyetracker() if eyetracker_actif else SafeDummyEyeTracker()
+    return lpt, et
+
+
+# =============================================================================
+# 4. PROCESS-LIFETIME POOL
+# =============================================================================
+class HardwarePool:
+    """
+    Hardware sessions shared across Menu -> Task cycles (owned by main.py).
+
+    The parallel port and the EyeLink link are opened once and reused;
+    each task only opens its own EDF file (EyeTracker.initialize reuses a
+    live link). Connections are health-checked before being handed out
+    and reopened if they died between runs.
+
+    The EDF transfer of the previous task keeps running in the background
+    while the operator is back in the menu (track_transfer). Only the next
+    task that needs the EyeLink link waits for it, since the transfer
+    occupies that link; shutdown waits too.
+    """
+    def __init__(self):
+        self.lpt = None
+        self.lpt_backend = None
+        self.et = None
+        self.et_transfer = None
+
+    def acquire(self, parport_actif=False, eyetracker_actif=False, window=None,
+                parport_backend='lpt', serial_port=None):
+        """Same contract as setup_hardware(), but reuses open connections."""
+        if parport_actif:
+            backend_key = (parport_backend, serial_port if parport_backend == 'serial' else None)
+            if self.lpt is None or self.lpt_backend != backend_key or not self._lpt_ok():
+                self._close_lpt()
+                self.lpt = _create_parport(parport_backend, serial_port)
+                self.lpt_backend = backend_key
+            else:
+                logger.log("LPT: Reusing open Parallel Port.")
+            lpt = self.lpt
         else:
-            logger.log("LPT: Active in config but drivers missing. Using Dummy.")
             lpt = SafeDummyParPort()
-    else:
-        # Intentionally disabled by user
-        lpt = SafeDummyParPort()
-
-    # --- 2. SETUP EYETRACKER ---
-    et = None
-    if eyetracker_actif:
-        if EyeTrackerAvailable:
-            try:
-                # Instantiate Real EyeTracker
-                et = EyeTracker(dummy_mode=False)
-                
-                # Check internal state (some wrappers have their own dummy flag)
-                if not getattr(et, 'dummy_mode', False):
-                    logger.ok("EyeTracker: Connected and Ready.")
-                else:
-                    logger.warn("EyeTracker: Driver loaded but device not found (Internal Dummy).")
-            except Exception as e:
-                logger.err(f"EyeTracker: Init failed ({e}). Reverting to Dummy.")
-                et = SafeDummyEyeTracker()
+
+        if eyetracker_actif:
+            self.wait_transfer()  # Link busy until the previous EDF is received
+            if self.et is None or not self._et_ok():
+                self._close_et()
+                self.et = _create_eyetracker()
+                self.et.persistent = True
+            else:
+                logger.log("EyeTracker: Reusing open link (new EDF file only).")
+            et = self.et
         else:
-            logger.log("EyeTracker: Active in config but drivers missing. Using Dummy.")
             et = SafeDummyEyeTracker()
-    else:
-        # Intentionally disabled by user
-        et = SafeDummyEyeTracker()
 
-    return lpt, et
\ No newline at end of file
+        return lpt, et
+
+    def track_transfer(self, transfer):
+        """Takes over a background EDF transfer (EdfTransfer) so the menu can come back right away."""
+        self._reap_transfer()
+        if transfer is not None:
+            self.et_transfer = transfer
+            logger.log(f"EDF transfer continues in background: {transfer.progress_str()}")
+
+    def transfer_busy(self):
+        return self.et_transfer is not None and self.et_transfer.is_alive()
+
+    def wait_transfer(self, timeout=None):
+        """Blocks until the pending EDF transfer is over (progress logged). Returns success, None if none."""
+        if self.et_transfer is None:
+            return None
+        if self.et_transfer.is_alive():
+            logger.log("Waiting for the previous EDF transfer (EyeLink link busy)...")
+            self.et_transfer.wait(timeout=timeout, report=logger.log)
+        return self._reap_transfer()
+
+    def _reap_transfer(self):
+        """Logs and forgets a finished transfer. Returns its success (None if none or still running)."""
+        transfer = self.et_transfer
+        if transfer is None or transfer.is_alive():
+            return None
+        self.et_transfer = None
+        if transfer.success:
+            logger.ok(f"EDF transferred: {transfer.local_path}")
+        else:
+            logger.warn(transfer.progress_str())
+        return transfer.success
+
+    def health_check(self):
+        """Checks pooled connections between runs. Returns {'parport': bool|None, 'eyetracker': bool|None}."""
+        self._reap_transfer()
+        status = {
+            'parport': self._lpt_ok() if self.lpt is not None else None,
+            # Link in use by the EDF transfer: checked again by acquire()
+            'eyetracker': self._et_ok() if self.et is not None and not self.transfer_busy() else None,
+        }
+        for name, ok in status.items():
+            if ok is False:
+                logger.warn(f"HardwarePool: {name} unhealthy, will reconnect on next run.")
+        return status
+
+    def close(self):
+        """Releases everything (application shutdown)."""
+        self.wait_transfer()
+        self._close_lpt()
+        self._close_et()
+
+    def _lpt_ok(self):
+        check = getattr(self.lpt, 'is_healthy', None)
+        return bool(check()) if check else False
+
+    def _et_ok(self):
+        # A link that was never connected (first run) is healthy: initialize() will connect it
+        if getattr(self.et, 'el', None) is None:
+            return not isinstance(self.et, SafeDummyEyeTracker)
+        # Connection failed and fell back to dummy: reconnect instead of running without eye tracking
+        if getattr(self.et, 'fallback', False):
+            logger.warn("EyeTracker: running on dummy fallback (connection failed), will reconnect.")
+            return False
+        check = getattr(self.et, 'is_connected', None)
+        return bool(check()) if check else False
+
+    def _close_lpt(self):
+        if self.lpt is not None:
+            try:
+                self.lpt.close()
+            except Exception:
+                pass
+            self.lpt = None
+
+    def _close_et(self):
+        if self.et is not None:
+            try:
+                shutdown = getattr(self.et, 'shutdown', None)
+                if shutdown:
+                    shutdown()
+            except Exception:
+                pass
+            self.et = None
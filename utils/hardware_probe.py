@@ -0,0 +1,103 @@
+"""
+hardware_probe.py
+-----------------
+Détection du matériel (port parallèle, pylink) en arrière-plan, avec cache.
+
+main.py reconstruit le menu après chaque tâche : la détection n'est
+relancée que si le résultat en cache a expiré (TTL). Le menu s'affiche
+immédiatement et lit le résultat quand il est prêt.
+
+Si le HardwarePool de main.py tient déjà le port LPT (attach_pool), la
+détection interroge ce port (is_healthy) au lieu d'en ouvrir un second.
+"""
+
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_TTL_S = 300.0
+
+
+def _probe_parport(address=0x378, pool=None):
+    # Port déjà ouvert par le pool : pas de seconde ouverture
+    if pool is not None and pool.lpt is not None and (pool.lpt_backend or ('',))[0] == 'lpt':
+        try:
+            return bool(pool.lpt.is_healthy())
+        except Exception:
+            return False
+    try:
+        from hardware.parport import ParPort
+        test_port = ParPort(address=address)
+        present = not test_port.dummy_mode
+        test_port.close()
+        return present
+    except Exception:
+        return False
+
+
+def _probe_eyelink():
+    try:
+        import pylink  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+class HardwareProbe:
+    def __init__(self, ttl_s=DEFAULT_TTL_S):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._thread = None
+        self._result = None      # {'parport': bool, 'eyelink': bool}
+        self._timestamp = None   # time.monotonic() de la dernière détection
+        self.pool = None         # HardwarePool de main.py (cf. attach_pool)
+
+    def attach_pool(self, pool):
+        """Connexions du process : le port LPT du pool est interrogé plutôt que rouvert."""
+        self.pool = pool
+
+    def is_fresh(self):
+        # Instantané : _run affecte _timestamp avant _result
+        timestamp = self._timestamp
+        return (self._result is not None and timestamp is not None
+                and (time.monotonic() - timestamp) < self.ttl_s)
+
+    def start(self, force=False):
+        """Lance une détection en arrière-plan si le cache est absent ou expiré."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self.is_fresh() and not force:
+                return
+            self._thread = threading.Thread(target=self._run, name="HardwareProbe", daemon=True)
+            self._thread.start()
+
+    def result(self):
+        """Dernier résultat connu (éventuellement expiré), ou None si jamais détecté."""
+        return self._result
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._result
+
+    def _run(self):
+        t0 = time.perf_counter()
+        result = {'parport': _probe_parport(pool=self.pool), 'eyelink': _probe_eyelink()}
+        # _timestamp d'abord : un is_fresh() concurrent ne voit jamais _result sans horodatage
+        self._timestamp = time.monotonic()
+        self._result = result
+        logger.log(f"Détection matériel ({(time.perf_counter() - t0) * 1000:.0f} ms) : "
+                   f"LPT={result['parport']} | EyeLink={result['eyelink']}")
+
+
+# --- INSTANCE UNIQUE (durée de vie du process) ---
+_probe_instance = HardwareProbe()
+
+def get_hardware_probe():
+    """Retourne toujours le même service de détection"""
+    return _probe_instance
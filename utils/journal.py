@@ -0,0 +1,190 @@
+"""
+journal.py
+----------
+Journal de reprise après crash (fichier projeté en mémoire, mmap).
+
+Contenu :
+    - en-tête : nombre d'étapes du run, dernière étape terminée, compteur
+      de version (seqlock : impair pendant une écriture) ;
+    - état du générateur `random` (Mersenne Twister, 625 mots) après la
+      dernière étape terminée ;
+    - design du run (JSON : séquences d'essais générées), écrit une fois.
+
+Une « étape » est une unité rejouable du run : un essai, ou une phase
+entière comme la fenêtre de crise de TemporalJudgement.
+
+commit() après chaque étape n'écrit que dans la projection mémoire
+(quelques µs, aucun appel système) : le fichier survit à un crash du
+process (pages déjà dans le cache du système). sync() (msync) aux fins de
+bloc protège en plus d'une coupure d'alimentation.
+
+Fichier : data/journals/<nom>_<Tâche>[-<run_type>]_<session>.journal
+(un run d'entraînement ne remplace pas le journal d'un protocole complet
+interrompu dans la même session), retrouvé par le
+menu pour proposer « reprendre à l'étape k ». Supprimé en fin de run normale.
+Tant qu'un journal est reprenable, le menu repropose sa session
+(next_session) au lieu de passer à la suivante.
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+
+MAGIC = b'PSYJRNL1'
+# magic, seq, n_steps, last_completed, payload_len
+_HEADER = struct.Struct('<8sQqqq')
+# 624 mots + position (MT19937), gauss_next, gauss_next présent
+_RNG = struct.Struct('<625Id?')
+_OFF_SEQ = 8
+_OFF_LAST = 24
+_OFF_RNG = _HEADER.size
+
+
+def journal_path(root_dir, nom, task_key, session, run_type=None):
+    """
+    Chemin du journal d'un participant / tâche (clé du menu, ex: 'TemporalJudgement')
+    / type de run (TemporalJudgement : 'base', 'training'...) / session.
+    """
+    key = f"{task_key}-{run_type}" if run_type else task_key
+    return os.path.join(root_dir, 'data', 'journals', f"{nom}_{key}_{session}.journal")
+
+
+def resumable_sessions(root_dir, nom, task_key=None):
+    """
+    Sessions (str) ayant un run interrompu reprenable pour ce participant,
+    pour la tâche task_key (tous types de run) ou toutes tâches si None.
+    """
+    folder = os.path.join(root_dir, 'data', 'journals')
+    prefix, suffix = f"{nom}_", '.journal'
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    sessions = set()
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith(suffix)):
+            continue
+        key, _, session = name[len(prefix):-len(suffix)].rpartition('_')
+        if not key or '_' in key:  # Autre participant dont le nom prolonge celui-ci
+            continue
+        if task_key is not None and key.split('-')[0] != task_key:
+            continue
+        state = load_journal(os.path.join(folder, name))
+        if state is not None and state.resumable:
+            sessions.add(session)
+    return sorted(sessions)
+
+
+def next_session(root_dir, nom, last_session, current=None, task_key=None):
+    """
+    Session (int) à proposer dans le menu. Un run interrompu reprenable de la
+    tâche task_key (toutes si None) garde sa session : la plus ancienne qui en
+    a un. Si current (session choisie par l'opérateur) est donné, seul son
+    propre journal compte : current s'il est reprenable, sans sauter vers le
+    journal d'une autre session. Sinon last_session + 1 (dernière session
+    connue), ou None si le participant est inconnu.
+    """
+    pending = [int(s) for s in resumable_sessions(root_dir, nom, task_key) if s.isdigit()]
+    if current is not None:
+        if int(current) in pending:
+            return int(current)
+    elif pending:
+        return min(pending)
+    return None if last_session is None else int(last_session) + 1
+
+
+class JournalState:
+    def __init__(self, design, n_steps, last_completed, rng_state):
+        self.design = design
+        self.n_steps = n_steps
+        self.last_completed = last_completed
+        self.rng_state = rng_state  # None si illisible (écriture interrompue)
+
+    @property
+    def resumable(self):
+        return 0 < self.last_completed < self.n_steps
+
+
+def load_journal(path):
+    """Relit un journal. Retourne JournalState, ou None si absent ou invalide."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, seq, n_steps, last, payload_len = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            return None
+        payload = data[_OFF_RNG + _RNG.size:_OFF_RNG + _RNG.size + payload_len]
+        design = json.loads(payload.decode('utf-8'))
+    except (OSError, struct.error, ValueError):
+        return None
+
+    rng_state = None
+    if seq % 2 == 0:
+        *words, gauss, has_gauss = _RNG.unpack_from(data, _OFF_RNG)
+        rng_state = (3, tuple(words), gauss if has_gauss else None)
+    return JournalState(design, n_steps, last, rng_state)
+
+
+class RunJournal:
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self._mm = None
+        self._seq = 0
+
+    def begin(self, design, n_steps):
+        """Crée le journal (design + état RNG courant, 0 étape terminée)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        payload = json.dumps(design).encode('utf-8')
+        size = _OFF_RNG + _RNG.size + len(payload)
+
+        self._f = open(self.path, 'w+b')
+        self._f.truncate(size)
+        self._mm = mmap.mmap(self._f.fileno(), size)
+        _HEADER.pack_into(self._mm, 0, MAGIC, 0, int(n_steps), 0, len(payload))
+        self._mm[_OFF_RNG + _RNG.size:size] = payload
+        self._seq = 0
+        self.commit(0)
+        self._mm.flush()
+
+    def attach(self):
+        """Rouvre un journal existant pour continuer à l'écrire (reprise)."""
+        self._f = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._f.fileno(), 0)
+        self._seq = _HEADER.unpack_from(self._mm, 0)[1]
+        self._seq += self._seq % 2  # Écriture interrompue : on repart d'un état pair
+
+    def commit(self, last_completed):
+        """Étape `last_completed` terminée : état RNG + index. Quelques µs, sans appel système."""
+        if self._mm is None:
+            return
+        _, words, gauss = random.getstate()
+        struct.pack_into('<Q', self._mm, _OFF_SEQ, self._seq + 1)
+        _RNG.pack_into(self._mm, _OFF_RNG, *words, gauss or 0.0, gauss is not None)
+        struct.pack_into('<q', self._mm, _OFF_LAST, int(last_completed))
+        self._seq += 2
+        struct.pack_into('<Q', self._mm, _OFF_SEQ, self._seq)
+
+    def sync(self):
+        """msync : journal sur disque (fin de bloc)."""
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def finish(self):
+        """Run terminé normalement : plus rien à reprendre, le journal est supprimé."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,147 @@
+"""
+key_queue.py
+------------
+File de touches horodatées par le périphérique (psychopy.hardware.keyboard).
+
+Avec le backend Psychtoolbox, un thread lit la file HID en continu : le
+temps de chaque touche est celui de l'appui (horloge de la tâche), pas
+celui du passage de la boucle de rendu qui l'interroge. Les tâches
+consomment ensuite la file (get / wait) à leur rythme.
+
+Un seul lecteur clavier pour tout le processus : les touches « routées »
+(ex: 't' du scanner, cf. TRListener) sont redirigées vers leur abonné et
+n'apparaissent jamais comme réponses.
+
+Sans Psychtoolbox (backend 'event', lié à la pompe d'évènements de la
+fenêtre, donc au thread principal), pas de thread : la lecture se fait à
+chaque appel de get / wait.
+"""
+
+import threading
+import time
+from collections import deque
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+class KeyQueue:
+    def __init__(self, clock, poll_s=0.0005, capacity=1024):
+        """
+        Args:
+            clock: Horloge des timestamps (task_clock ; le reset est pris en compte)
+            poll_s (float): Période de lecture du thread (s)
+            capacity (int): Touches conservées au maximum (les plus anciennes sont perdues)
+        """
+        from psychopy.hardware import keyboard
+
+        self.clock = clock
+        self.poll_s = float(poll_s)
+        self._kb = keyboard.Keyboard(clock=clock)
+        self.threaded = bool(getattr(keyboard, 'havePTB', False))
+
+        self._cond = threading.Condition()
+        self._keys = deque(maxlen=int(capacity))
+        self._routes = {}
+        self._running = threading.Event()
+        self._thread = None
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        self._kb.clearEvents()
+        if not self.threaded:
+            logger.warn("Clavier : Psychtoolbox absent, lecture sur le thread principal.")
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="KeyQueue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Routage ---
+
+    def subscribe(self, key, callback):
+        """Redirige `key` vers callback(t) au lieu de la file de réponses."""
+        with self._cond:
+            self._routes[key] = callback
+
+    def unsubscribe(self, key):
+        with self._cond:
+            self._routes.pop(key, None)
+
+    # --- Consommation ---
+
+    def clear(self):
+        """Vide les réponses en attente (équivalent event.clearEvents)."""
+        if not self.threaded:
+            self._poll()
+        with self._cond:
+            self._keys.clear()
+
+    def get(self, keyList=None, clear=True):
+        """
+        Réponses en attente [(nom, t), ...] (comme event.getKeys(timeStamped=clock)).
+        Seules les touches de keyList sont retirées de la file.
+        """
+        if not self.threaded:
+            self._poll()
+        with self._cond:
+            if keyList is None:
+                out = list(self._keys)
+                if clear:
+                    self._keys.clear()
+                return out
+            out = [k for k in self._keys if k[0] in keyList]
+            if clear and out:
+                kept = [k for k in self._keys if k[0] not in keyList]
+                self._keys.clear()
+                self._keys.extend(kept)
+            return out
+
+    def wait(self, keyList=None, max_wait=float('inf')):
+        """
+        Bloque jusqu'à une touche de keyList (comme event.waitKeys).
+        Retourne [(nom, t), ...] ou None si max_wait est écoulé.
+        """
+        deadline = time.perf_counter() + max_wait
+        while True:
+            keys = self.get(keyList)
+            if keys:
+                return keys
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            if self.threaded:
+                with self._cond:
+                    self._cond.wait(min(remaining, 0.05))
+            else:
+                time.sleep(min(remaining, 0.001))
+
+    # --- Lecture ---
+
+    def _poll(self):
+        keys = self._kb.getKeys(waitRelease=False, clear=True)
+        if not keys:
+            return
+        with self._cond:
+            for k in keys:
+                route = self._routes.get(k.name)
+                if route is not None:
+                    route(k.rt)
+                else:
+                    self._keys.append((k.name, k.rt))
+            self._cond.notify_all()
+
+    def _run(self):
+        while self._running.is_set():
+            try:
+                self._poll()
+            except Exception as e:
+                logger.err(f"Clavier : erreur de lecture ({e})")
+            time.sleep(self.poll_s)
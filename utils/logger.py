@@ -22,7 +22,8 @@ class Logger:
         try:
             # On remonte la pile d'appel : 
             # 0: _get_context, 1: _print, 2: log/ok/warn, 3: TON CODE
-            stack = inspect.stack()[3]
+            # (sans les frames du profiler quand _print est chronométré)
+            stack = [f for f in inspect.stack() if not f.filename.endswith('profiler.py')][3]
             path = Path(stack.filename)
             
             # Essayer de rendre le chemin relatif (ex: tasks/doorreward.py)
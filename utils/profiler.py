@@ -0,0 +1,194 @@
+"""
+profiler.py
+-----------
+Profilage opt-in du chemin critique : durée de chaque phase d'essai
+(span) et des appels élémentaires (flip, trigger, clavier, logger,
+enregistrement), en perf_counter_ns.
+
+    with self.profiler.span('draw'):
+        stim.draw()
+
+Coût minimal :
+    - désactivé : span() renvoie un contexte vide partagé, instrument() ne
+      fait rien ;
+    - activé : un objet span réutilisé par phase (non réentrant pour une même
+      phase), deux lectures d'horloge et une écriture dans un tableau
+      préalloué.
+
+Les appels élémentaires sont instrumentés en remplaçant l'attribut de
+l'instance (instrument), restauré par restore() en fin de tâche : les
+objets partagés entre tâches (port de triggers du HardwarePool) retrouvent
+leur méthode d'origine.
+
+L'append des enregistrements est chronométré par RecordList (record_sink).
+
+Rapport : résumé par phase (<stem>_profile.csv) + histogrammes en
+puissances de 2 de microsecondes (<stem>_profile_hist.csv).
+"""
+
+import functools
+from time import perf_counter_ns
+
+import numpy as np
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('_add', '_pid', '_t0')
+
+    def __init__(self, add, pid):
+        self._add = add
+        self._pid = pid
+        self._t0 = 0
+
+    def __enter__(self):
+        self._t0 = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._add(self._pid, perf_counter_ns() - self._t0)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, capacity=262144):
+        """
+        Args:
+            enabled (bool): Profilage actif (sinon tous les appels sont sans effet)
+            capacity (int): Nombre de mesures conservées (préallouées)
+        """
+        self.enabled = bool(enabled)
+        self.capacity = int(capacity) if self.enabled else 0
+
+        self._phase = np.zeros(self.capacity, dtype=np.int32)
+        self._dur = np.zeros(self.capacity, dtype=np.int64)
+        self.n = 0
+        self.n_overflow = 0
+
+        self.phases = []      # nom de phase, indexé par pid
+        self._spans = {}      # nom -> _Span réutilisé
+        self._patched = []    # (objet, attribut, valeur d'instance d'origine ou None)
+
+    # --- Mesure ---
+
+    def span(self, name):
+        """Contexte chronométrant la phase `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        s = self._spans.get(name)
+        if s is None:
+            self.phases.append(name)
+            s = self._spans[name] = _Span(self._add, len(self.phases) - 1)
+        return s
+
+    def _add(self, pid, dur_ns):
+        i = self.n
+        if i < self.capacity:
+            self._phase[i] = pid
+            self._dur[i] = dur_ns
+            self.n = i + 1
+        else:
+            self.n_overflow += 1
+
+    def instrument(self, obj, attr, name):
+        """Chronomètre chaque appel de obj.attr sous la phase `name` (jusqu'à restore)."""
+        if not self.enabled or obj is None or not hasattr(obj, attr):
+            return
+        fn = getattr(obj, attr)
+        span = self.span(name)
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with span:
+                return fn(*args, **kwargs)
+
+        self._patched.append((obj, attr, vars(obj).get(attr)))
+        setattr(obj, attr, timed)
+
+    def restore(self):
+        """Rend leurs méthodes d'origine aux objets instrumentés."""
+        while self._patched:
+            obj, attr, original = self._patched.pop()
+            if original is None:
+                try:
+                    delattr(obj, attr)
+                except AttributeError:
+                    pass
+            else:
+                setattr(obj, attr, original)
+
+    # --- Bilan ---
+
+    def summary(self):
+        """{phase: {n, total_ms, mean_us, p50_us, p99_us, max_us}}"""
+        out = {}
+        if self.n == 0:
+            return out
+        phase = self._phase[:self.n]
+        dur_us = self._dur[:self.n] / 1000.0
+        for pid, name in enumerate(self.phases):
+            d = dur_us[phase == pid]
+            if len(d) == 0:
+                continue
+            out[name] = {
+                'n': int(len(d)),
+                'total_ms': float(d.sum() / 1000.0),
+                'mean_us': float(d.mean()),
+                'p50_us': float(np.percentile(d, 50)),
+                'p99_us': float(np.percentile(d, 99)),
+                'max_us': float(d.max()),
+            }
+        return out
+
+    def top(self, k=3):
+        """Les k phases les plus coûteuses (temps total), hors 'trial'."""
+        s = self.summary()
+        ranked = sorted((v['total_ms'], name) for name, v in s.items() if name != 'trial')
+        return [(name, total) for total, name in reversed(ranked[-k:])]
+
+    def save(self, path):
+        """
+        Résumé par phase (colonnes n, total_ms, mean_us, p50_us, p99_us, max_us,
+        share_trial = part du temps total des essais). Retourne le chemin, ou None.
+        """
+        s = self.summary()
+        if not s:
+            return None
+        trial_ms = s.get('trial', {}).get('total_ms', 0.0)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("phase,n,total_ms,mean_us,p50_us,p99_us,max_us,share_trial\n")
+            for name, v in sorted(s.items(), key=lambda kv: -kv[1]['total_ms']):
+                share = v['total_ms'] / trial_ms if trial_ms else float('nan')
+                f.write(f"{name},{v['n']},{v['total_ms']:.3f},{v['mean_us']:.2f},"
+                        f"{v['p50_us']:.2f},{v['p99_us']:.2f},{v['max_us']:.2f},{share:.4f}\n")
+        return path
+
+    def save_histograms(self, path):
+        """Histogrammes par phase (bornes en puissances de 2 de µs). Retourne le chemin, ou None."""
+        if self.n == 0:
+            return None
+        phase = self._phase[:self.n]
+        dur_us = np.maximum(self._dur[:self.n] / 1000.0, 1e-3)
+        bins = np.floor(np.log2(dur_us)).astype(np.int64)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("phase,bin_start_us,bin_end_us,count\n")
+            for pid, name in enumerate(self.phases):
+                b = bins[phase == pid]
+                if len(b) == 0:
+                    continue
+                values, counts = np.unique(b, return_counts=True)
+                for v, c in zip(values, counts):
+                    f.write(f"{name},{2.0 ** v:g},{2.0 ** (v + 1):g},{int(c)}\n")
+        return path
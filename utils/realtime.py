@@ -0,0 +1,185 @@
+"""
+realtime.py
+-----------
+Mode temps réel (opt-in) : priorité du process et isolation CPU.
+
+    - core.rush(True) : priorité maximale du process (peut exiger des droits :
+      CAP_SYS_NICE / root sous Linux, administrateur pour REALTIME sous Windows) ;
+    - cœur de rendu : le thread principal (boucle d'essais, flips) est épinglé
+      seul sur un cœur ;
+    - threads de fond (clavier, TR, triggers, EyeLink...) : épinglés sur les
+      autres cœurs. Un thread démarré après l'activation hérite du cœur de
+      rendu : pin_threads() est rappelé après leur démarrage (TR, EyeLink).
+
+Affinité par thread : os.sched_setaffinity(tid) sous Linux,
+SetThreadAffinityMask (ctypes) sous Windows. Ailleurs, pas d'isolation.
+
+Les réglages effectifs sont relus après application (verify) : le rapport
+indique ce qui a réellement pris effet, pas seulement ce qui a été demandé.
+La sauvegarde et le QC tournent après release(), hors mode temps réel.
+"""
+
+import os
+import sys
+import threading
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+def available_cpus():
+    """Cœurs utilisables par le process (affinité courante), triés."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        import psutil
+        return sorted(psutil.Process().cpu_affinity())
+    except Exception:
+        return list(range(os.cpu_count() or 1))
+
+
+def _thread_ids():
+    """Identifiants natifs de tous les threads du process."""
+    if sys.platform.startswith('linux'):
+        try:
+            return [int(t) for t in os.listdir('/proc/self/task')]
+        except OSError:
+            return []
+    try:
+        import psutil
+        return [t.id for t in psutil.Process().threads()]
+    except Exception:
+        return []
+
+
+def _set_thread_affinity(tid, cpus):
+    """Épingle le thread natif tid (0 = thread appelant) sur cpus. Retourne True si appliqué."""
+    cpus = sorted(cpus)
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(tid, cpus)
+            return True
+        except OSError:
+            return False
+    if sys.platform == 'win32':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mask = sum(1 << c for c in cpus)
+        if tid == 0:
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) != 0
+        handle = kernel32.OpenThread(0x0060, False, tid)  # SET_ | QUERY_INFORMATION
+        if not handle:
+            return False
+        try:
+            return kernel32.SetThreadAffinityMask(handle, mask) != 0
+        finally:
+            kernel32.CloseHandle(handle)
+    return False
+
+
+def _thread_affinity(tid=0):
+    """Affinité relue du thread (Linux seulement), None si inconnue."""
+    if hasattr(os, 'sched_getaffinity'):
+        try:
+            return sorted(os.sched_getaffinity(tid))
+        except OSError:
+            return None
+    return None
+
+
+class RealtimeMode:
+    def __init__(self, enabled=False, render_cpu=None):
+        """
+        Args:
+            enabled (bool): Mode actif (sinon apply / release ne font rien)
+            render_cpu (int): Cœur réservé au rendu (None = dernier cœur disponible,
+                              le cœur 0 recevant la plupart des interruptions)
+        """
+        self.enabled = bool(enabled)
+        self.render_cpu = render_cpu
+        self.active = False
+        self.report = {}
+
+        self._main_tid = None
+        self._cpus_before = None
+        self._workers = []
+
+    def apply(self):
+        """Priorité + affinités. À appeler depuis le thread de rendu. Retourne le rapport."""
+        if not self.enabled or self.active:
+            return self.report
+
+        from psychopy import core
+
+        cpus = available_cpus()
+        self._cpus_before = cpus
+        self._main_tid = threading.get_native_id()
+
+        render = self.render_cpu if self.render_cpu in cpus else cpus[-1]
+        workers = [c for c in cpus if c != render]
+
+        rush_ok = bool(core.rush(True))
+
+        isolated = bool(workers) and _set_thread_affinity(0, [render])
+        self._workers = workers if isolated else []
+
+        self.active = True
+        n_pinned = self.pin_threads()
+        self.report = self.verify()
+        self.report.update({
+            'rush': rush_ok,
+            'render_cpu': render if isolated else None,
+            'worker_cpus': workers if isolated else [],
+            'threads_pinned': n_pinned,
+        })
+        return self.report
+
+    def pin_threads(self):
+        """Épingle tous les threads autres que le rendu sur les cœurs de fond. Retourne leur nombre."""
+        if not self.active or not self._workers:
+            return 0
+        n = 0
+        for tid in _thread_ids():
+            if tid != self._main_tid and _set_thread_affinity(tid, self._workers):
+                n += 1
+        self.report['threads_pinned'] = n
+        return n
+
+    def verify(self):
+        """Relit la priorité et l'affinité effectives du thread appelant."""
+        out = {'priority': None, 'affinity': _thread_affinity(0)}
+        try:
+            import psutil
+            out['priority'] = psutil.Process().nice()
+        except Exception:
+            if hasattr(os, 'getpriority'):
+                out['priority'] = os.getpriority(os.PRIO_PROCESS, 0)
+        return out
+
+    def describe(self):
+        r = self.report
+        if not self.enabled:
+            return "Temps réel : désactivé"
+        if not r:
+            return "Temps réel : non appliqué"
+        iso = (f"rendu sur CPU {r['render_cpu']}, {r['threads_pinned']} thread(s) "
+               f"sur CPU {r['worker_cpus']}") if r['render_cpu'] is not None else "pas d'isolation CPU"
+        return (f"Temps réel : rush {'OK' if r['rush'] else 'REFUSÉ'} "
+                f"(priorité {r['priority']}) | {iso} | affinité relue {r['affinity']}")
+
+    def release(self):
+        """Priorité normale et affinité d'origine (fin de run : sauvegarde, QC)."""
+        if not self.active:
+            return
+        from psychopy import core
+
+        self._workers = []
+        try:
+            core.rush(False)
+        except Exception as e:
+            logger.warn(f"Temps réel : rush(False) impossible ({e})")
+        if self._cpus_before:
+            for tid in _thread_ids():
+                _set_thread_affinity(tid, self._cpus_before)
+        self.active = False
@@ -0,0 +1,193 @@
+"""
+record_sink.py
+--------------
+Écriture en continu des enregistrements d'essai (JSONL, append-only).
+
+Chaque global_records.append() (RecordList) dépose l'enregistrement dans
+une file ; un thread d'écriture l'ajoute au fichier <stem>_records.jsonl
+(une ligne JSON par enregistrement, colonnes libres : les tâches à
+évènements comme DoorReward ou TemporalJudgement n'ont pas un schéma fixe).
+Un crash ou une coupure ne perd que ce qui n'a pas encore été synchronisé.
+
+Politique fsync :
+    - 'trial' : fsync dès que la file est vidée (après chaque rafale
+      d'enregistrements, soit au moins une fois par essai) ;
+    - 'block' : fsync aux points de synchronisation (sync(), fin de bloc,
+      repos) et à la fermeture ;
+    - nombre : fsync au plus toutes les N secondes.
+Dans tous les cas, le fichier est vidé (flush) à chaque rafale : seul le
+passage sur disque (résistance à une coupure d'alimentation) dépend de la
+politique.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+_STOP = object()
+_SYNC = object()
+
+
+def _json_default(obj):
+    # Scalaires NumPy (int64, bool_) et autres objets non sérialisables
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+def load_records(path):
+    """Relit un fichier JSONL ; une dernière ligne tronquée (coupure) est ignorée."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+class RecordSink:
+    def __init__(self, path, fsync='trial'):
+        """
+        Args:
+            path (str): Fichier JSONL (ouvert en ajout)
+            fsync: 'trial', 'block' ou période en secondes (float)
+        """
+        if fsync not in ('trial', 'block'):
+            fsync = float(fsync)
+        self.path = path
+        self.fsync = fsync
+
+        self._f = open(path, 'a', encoding='utf-8')
+        self._queue = queue.SimpleQueue()
+        self._last_sync = time.perf_counter()
+
+        # Statistiques (lues en fin de run)
+        self.n_written = 0
+        self.n_fsync = 0
+        self.n_errors = 0
+        self.max_lag_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="RecordSink", daemon=True)
+        self._thread.start()
+
+    # --- API ---
+
+    def push(self, record):
+        """Dépose une copie de l'enregistrement. Non bloquant."""
+        self._queue.put((time.perf_counter(), dict(record)))
+
+    def sync(self):
+        """Point de synchronisation (fin de bloc) : fsync en politique 'block'."""
+        self._queue.put(_SYNC)
+
+    def close(self, timeout=5.0):
+        """Écrit le reste de la file, fsync, ferme. Retourne True si le thread s'est arrêté."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def rename(self, new_path):
+        """Déplace le fichier (après close), ex: pour le caler sur le nom du CSV final."""
+        if new_path != self.path:
+            os.replace(self.path, new_path)
+            self.path = new_path
+        return self.path
+
+    def stats(self):
+        return {
+            'n_written': self.n_written,
+            'n_fsync': self.n_fsync,
+            'n_errors': self.n_errors,
+            'max_lag_ms': self.max_lag_ms,
+        }
+
+    # --- Thread d'écriture ---
+
+    def _fsync(self):
+        try:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self.n_fsync += 1
+        except OSError:
+            self.n_errors += 1
+        self._last_sync = time.perf_counter()
+
+    def _write(self, item):
+        t_push, record = item
+        try:
+            self._f.write(json.dumps(record, default=_json_default, ensure_ascii=False) + "\n")
+            self.n_written += 1
+        except (TypeError, ValueError, OSError):
+            self.n_errors += 1
+        self.max_lag_ms = max(self.max_lag_ms, (time.perf_counter() - t_push) * 1000)
+
+    def _run(self):
+        periodic = self.fsync not in ('trial', 'block')
+        dirty = False
+        while True:
+            # Politique périodique : fsync même si plus rien n'arrive
+            timeout = None
+            if periodic and dirty:
+                timeout = max(0.0, self._last_sync + self.fsync - time.perf_counter())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._fsync()
+                dirty = False
+                continue
+
+            stop = False
+            sync = False
+            # Rafale : tout ce qui est déjà en file, puis un seul flush
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif item is _SYNC:
+                    sync = True
+                else:
+                    self._write(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if (stop or sync or self.fsync == 'trial'
+                    or (periodic and time.perf_counter() - self._last_sync >= self.fsync)):
+                self._fsync()
+                dirty = False
+            else:
+                try:
+                    self._f.flush()
+                except OSError:
+                    self.n_errors += 1
+                dirty = True
+
+            if stop:
+                self._f.close()
+                return
+
+
+class RecordList(list):
+    """
+    Liste d'enregistrements (global_records) : chaque append() est aussi
+    envoyé au sink (écriture en continu) et chronométré si un span est fourni.
+    """
+
+    def __init__(self, items=(), sink=None, span=None):
+        super().__init__(items)
+        self.sink = sink
+        self.span = span or nullcontext()
+
+    def append(self, item):
+        with self.span:
+            super().append(item)
+            if self.sink is not None:
+                self.sink.push(item)
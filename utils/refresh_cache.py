@@ -0,0 +1,97 @@
+"""
+refresh_cache.py
+----------------
+Cache disque des fréquences de rafraîchissement mesurées.
+
+main.py recrée une fenêtre à chaque tâche : sans cache, chaque lancement
+repaie win.getActualFrameRate (jusqu'à 100 frames + préchauffage). La
+mesure complète est faite une fois par écran / résolution / driver, puis
+réutilisée jusqu'à expiration. Une vérification rapide (20 frames) pendant
+les instructions déclenche une nouvelle mesure si elle contredit le cache.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+DEFAULT_TTL_DAYS = 30
+
+
+def display_key(win):
+    """Clé du cache : écran, résolution (pixels) et driver OpenGL."""
+    w, h = (int(v) for v in win.size)
+    driver = 'unknown'
+    try:
+        from pyglet.gl import gl_info
+        driver = f"{gl_info.get_vendor()} {gl_info.get_renderer()} {gl_info.get_version()}"
+    except Exception:
+        pass
+    return f"screen{getattr(win, 'screen', 0)}|{w}x{h}|{driver}"
+
+
+def measure_full(win):
+    """Mesure complète PsychoPy (lente). Retourne None si instable."""
+    return win.getActualFrameRate(nIdentical=10, nMaxFrames=100, threshold=1)
+
+
+def measure_quick(win, n_frames=20, draw=None):
+    """
+    Médiane des intervalles sur n_frames flips (~n_frames/fps secondes).
+    draw: callable rappelé avant chaque flip pour garder l'écran affiché.
+    """
+    stamps = np.empty(n_frames + 1)
+    for i in range(n_frames + 1):
+        if draw is not None:
+            draw()
+        stamps[i] = win.flip()
+    intervals = np.diff(stamps)
+    intervals = intervals[intervals > 0]
+    if len(intervals) == 0:
+        return None
+    return float(1.0 / np.median(intervals))
+
+
+class RefreshCache:
+    def __init__(self, path, ttl_days=DEFAULT_TTL_DAYS):
+        """
+        Args:
+            path (str): Fichier JSON du cache
+            ttl_days (float): Durée de validité d'une mesure (jours)
+        """
+        self.path = path
+        self.ttl_s = float(ttl_days) * 86400.0
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        """Fréquence en cache (Hz), ou None si absente / expirée."""
+        entry = self._entries.get(key)
+        if not entry or time.time() - entry.get('measured_at', 0) > self.ttl_s:
+            return None
+        return float(entry['rate_hz'])
+
+    def put(self, key, rate_hz):
+        """Enregistre une mesure et réécrit le fichier (écriture atomique)."""
+        self._entries[key] = {
+            'rate_hz': float(rate_hz),
+            'measured_at': time.time(),
+            'measured_on': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._write()
+
+    def _write(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp, self.path)
@@ -4,13 +4,24 @@ from tasks.stroop import Stroop
 from tasks.temporaljudgement import TemporalJudgement
 from tasks.doorreward import DoorReward
 
-def create_task(config, win):
+def create_task(config, win, hardware_pool=None):
     base_kwargs = {
         'win': win,
+        'hardware_pool': hardware_pool,
         'nom': config['nom'],
         'enregistrer': config['enregistrer'],
         'screenid': config['screenid'],
         'parport_actif': config['parport_actif'],
+        'eyetracker_actif': config.get('eyetracker_actif', False),
+        'parport_backend': config.get('parport_backend', 'lpt'),
+        'serial_port': config.get('serial_port'),
+        'tr_s': config.get('tr_s'),
+        'tr_source': config.get('tr_source', 'keyboard'),
+        'tr_locked': config.get('tr_locked', False),
+        'realtime': config.get('realtime', False),
+        'profile': config.get('profile', False),
+        'fsync_policy': config.get('fsync_policy', 'trial'),
+        'resume': config.get('resume', False),
         'mode': config['mode'],
         'session': config['session'], 
 
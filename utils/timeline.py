@@ -0,0 +1,102 @@
+"""
+timeline.py
+-----------
+Compilation du design en timeline quantifiée à la frame, AVANT le trigger.
+
+Le plan d'essais (onsets relatifs, durées, stimulus, code TTL) est figé en
+tableaux NumPy : la boucle de run ne fait plus qu'indexer
+(onset_s(i), stim_id[i], code[i]) au lieu de recalculer ses ancres.
+
+Les onsets sont arrondis à la frame la plus proche en absolu (pas de cumul
+des erreurs d'arrondi) et exprimés relativement à une origine fixée au
+moment du run (ex: fin du repos initial).
+"""
+
+import random
+
+import numpy as np
+
+
+def balanced_jitter(lo, hi, n, rng=random):
+    """
+    n durées réparties uniformément sur [lo, hi] puis mélangées : jitter par
+    essai, mais somme fixe (n * moyenne) -> durée de run identique d'un run à l'autre.
+    """
+    if n <= 0:
+        return []
+    values = list(np.linspace(lo, hi, n)) if n > 1 else [(lo + hi) / 2.0]
+    rng.shuffle(values)
+    return [float(v) for v in values]
+
+
+class Timeline:
+    def __init__(self, onset_frame, dur_frames, stim_id, code, stimuli, frame_period):
+        """
+        Args:
+            onset_frame (ndarray int64): Onset de chaque essai, en frames depuis l'origine
+            dur_frames (ndarray int32): Durée d'affichage du stimulus, en frames
+            stim_id (ndarray int32): Indice dans `stimuli`
+            code (ndarray int32): Code TTL de l'onset
+            stimuli (list): Étiquettes des stimuli (ex: texte), indexées par stim_id
+            frame_period (float): Période d'écran utilisée pour la quantification (s)
+        """
+        self.onset_frame = onset_frame
+        self.dur_frames = dur_frames
+        self.stim_id = stim_id
+        self.code = code
+        self.stimuli = stimuli
+        self.frame_period = float(frame_period)
+
+        # Secondes précalculées (évite la multiplication dans la boucle)
+        self.onset_s = onset_frame * self.frame_period
+        self.dur_s = dur_frames * self.frame_period
+
+    def __len__(self):
+        return len(self.onset_frame)
+
+    @property
+    def total_s(self):
+        """Onset du dernier essai + sa durée (s)."""
+        if len(self) == 0:
+            return 0.0
+        return float(self.onset_s[-1] + self.dur_s[-1])
+
+    def describe(self):
+        return (f"{len(self)} essais, {len(self.stimuli)} stimuli, "
+                f"{self.total_s:.1f} s @ {1.0 / self.frame_period:.2f} Hz")
+
+
+class TimelineBuilder:
+    """Accumule les essais (en secondes) puis compile en Timeline."""
+
+    def __init__(self):
+        self._onsets = []
+        self._durs = []
+        self._stims = []
+        self._codes = []
+        self._stim_index = {}
+        self.stimuli = []
+
+    def add(self, onset_s, dur_s, stim, code):
+        """onset_s relatif à l'origine du bloc ; stim = étiquette hashable."""
+        sid = self._stim_index.get(stim)
+        if sid is None:
+            sid = self._stim_index[stim] = len(self.stimuli)
+            self.stimuli.append(stim)
+        self._onsets.append(float(onset_s))
+        self._durs.append(float(dur_s))
+        self._stims.append(sid)
+        self._codes.append(int(code))
+
+    def compile(self, frame_period):
+        period = float(frame_period)
+        onset_frame = np.round(np.asarray(self._onsets) / period).astype(np.int64)
+        dur_frames = np.maximum(1, np.round(np.asarray(self._durs) / period)).astype(np.int32)
+        return Timeline(
+            onset_frame=onset_frame,
+            dur_frames=dur_frames,
+            stim_id=np.asarray(self._stims, dtype=np.int32),
+            code=np.asarray(self._codes, dtype=np.int32),
+            stimuli=list(self.stimuli),
+            frame_period=period,
+        )
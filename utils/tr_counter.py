@@ -0,0 +1,251 @@
+"""
+tr_counter.py
+-------------
+Compteur des impulsions TR du scanner pendant tout le run.
+
+Un thread d'écoute horodate chaque impulsion sur task_clock, à partir :
+    - du flux clavier 't' (psychopy.hardware.keyboard, indépendant de event.getKeys),
+      via la KeyQueue de la tâche si fournie (un seul lecteur clavier)
+    - ou d'une broche d'entrée du port parallèle (front montant)
+
+Les temps sont stockés dans un tableau préalloué. En fin de run :
+TR manqués / irréguliers, dérive horloge scanner vs tâche, table TR en CSV.
+"""
+
+import csv
+import threading
+import time
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+class TRListener:
+    def __init__(self, clock, tr_s=None, source='keyboard', key='t',
+                 read_pin=None, pin=10, capacity=8192, poll_s=0.001, key_queue=None):
+        """
+        Args:
+            clock: Horloge de la tâche (task_clock, remise à 0 au 1er TR)
+            tr_s (float): TR nominal (s). None = estimé (médiane des intervalles)
+            source (str): 'keyboard' ou 'port'
+            key (str): Touche envoyée par l'interface scanner
+            read_pin (callable): Lecture de broche (ex: ParPort.read_pin), source 'port'
+            pin (int): Numéro de broche d'entrée
+            key_queue (KeyQueue): Lecteur clavier partagé (source 'keyboard') ; la
+                                  touche y est routée vers ce compteur
+        """
+        self.clock = clock
+        self.tr_s = tr_s
+        self.source = source
+        self.key = key
+        self.read_pin = read_pin
+        self.pin = pin
+        self.poll_s = poll_s
+        self.key_queue = key_queue
+
+        self.times = np.full(int(capacity), np.nan, dtype=np.float64)
+        self.n = 0
+        self.n_overflow = 0
+
+        self._running = threading.Event()
+        self._thread = None
+
+    # --- Cycle de vie ---
+
+    def start(self, first_pulse_time=0.0):
+        """Démarre l'écoute. Le 1er TR (celui qui a lancé la tâche) est enregistré d'office."""
+        if first_pulse_time is not None:
+            self._append(first_pulse_time)
+        if self.source != 'port' and self.key_queue is not None:
+            self.key_queue.subscribe(self.key, self._append)
+            return
+        self._running.set()
+        target = self._run_port if self.source == 'port' else self._run_keyboard
+        self._thread = threading.Thread(target=target, name="TRListener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        if self.source != 'port' and self.key_queue is not None:
+            self.key_queue.unsubscribe(self.key)
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pulses(self):
+        """Vue (sans copie) des temps de TR enregistrés."""
+        return self.times[:self.n]
+
+    # --- Threads ---
+
+    def _append(self, t):
+        if self.n >= self.times.size:
+            self.n_overflow += 1
+            return
+        self.times[self.n] = t
+        self.n += 1
+
+    def _run_keyboard(self):
+        from psychopy.hardware import keyboard
+        # rt est relatif au dernier reset de `clock` : directement en temps tâche
+        kb = keyboard.Keyboard(clock=self.clock)
+        kb.clearEvents()
+        while self._running.is_set():
+            for k in kb.getKeys(keyList=[self.key], waitRelease=False, clear=True):
+                self._append(k.rt)
+            time.sleep(self.poll_s)
+
+    def _run_port(self):
+        last = bool(self.read_pin(self.pin))
+        while self._running.is_set():
+            state = bool(self.read_pin(self.pin))
+            if state and not last:
+                self._append(self.clock.getTime())
+            last = state
+            time.sleep(self.poll_s)
+
+    # --- Analyse ---
+
+    def analyze(self, tolerance=0.1):
+        """
+        Retourne (table, summary).
+        table : liste de dict (volume, task_time_s, interval_s, status)
+        status : 'ok', 'irregular' (|écart| > tolerance*TR) ou 'after_gap' (TR manqués avant)
+        Volume : index estimé en TR (tient compte des impulsions manquées).
+        """
+        t = self.pulses().copy()
+        summary = {'n_pulses': int(t.size), 'tr_nominal_s': self.tr_s}
+        if t.size < 2:
+            return [{'volume': 0, 'task_time_s': float(v), 'interval_s': None, 'status': 'ok'} for v in t], summary
+
+        diffs = np.diff(t)
+        tr = self.tr_s or float(np.median(diffs))
+        steps = np.maximum(np.rint(diffs / tr), 1).astype(int)
+        volumes = np.concatenate([[0], np.cumsum(steps)])
+
+        table = [{'volume': 0, 'task_time_s': float(t[0]), 'interval_s': None, 'status': 'ok'}]
+        n_irregular = 0
+        for i, (d, k) in enumerate(zip(diffs, steps), start=1):
+            if k > 1:
+                status = 'after_gap'
+            elif abs(d - tr) > tolerance * tr:
+                status = 'irregular'
+                n_irregular += 1
+            else:
+                status = 'ok'
+            table.append({'volume': int(volumes[i]), 'task_time_s': float(t[i]),
+                          'interval_s': float(d), 'status': status})
+
+        # Régression temps tâche ~ volume : pente = TR vu par l'horloge PC.
+        # 2e passe sans les impulsions aberrantes (écart > tolerance/2 * TR).
+        slope, intercept = np.polyfit(volumes, t, 1)
+        residuals = t - (slope * volumes + intercept)
+        keep = np.abs(residuals) <= 0.5 * tolerance * tr
+        if keep.sum() >= 2 and not keep.all():
+            slope, intercept = np.polyfit(volumes[keep], t[keep], 1)
+            residuals = t[keep] - (slope * volumes[keep] + intercept)
+        summary.update({
+            'tr_used_s': tr,
+            'tr_measured_s': float(slope),
+            'n_volumes': int(volumes[-1]) + 1,
+            'n_missed': int(np.sum(steps - 1)),
+            'n_irregular': n_irregular,
+            'jitter_ms_sd': float(np.std(residuals) * 1000),
+        })
+        if self.tr_s:
+            drift = (slope - self.tr_s) / self.tr_s
+            summary['drift_ppm'] = float(drift * 1e6)
+            summary['drift_ms_over_run'] = float(drift * (t[-1] - t[0]) * 1000)
+        return table, summary
+
+    def save(self, path):
+        """Écrit la table TR en CSV et loggue le résumé. Retourne le chemin (None si aucun TR)."""
+        if not self.n:
+            return None
+        table, summary = self.analyze()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['volume', 'task_time_s', 'interval_s', 'status'])
+            writer.writeheader()
+            writer.writerows(table)
+
+        msg = f"TR: {summary['n_pulses']} impulsions"
+        if 'n_volumes' in summary:
+            msg += (f" | {summary['n_volumes']} volumes | manqués: {summary['n_missed']} | "
+                    f"irréguliers: {summary['n_irregular']} | TR mesuré: {summary['tr_measured_s']*1000:.2f} ms")
+            if 'drift_ppm' in summary:
+                msg += f" | dérive: {summary['drift_ppm']:.0f} ppm ({summary['drift_ms_over_run']:.1f} ms/run)"
+        if summary.get('n_missed') or summary.get('n_irregular'):
+            logger.warn(msg)
+        else:
+            logger.log(msg)
+        return path
+
+
+class TRClock:
+    """
+    Modèle en ligne temps tâche ~ volume, recalé sur les TR reçus.
+
+    Régression linéaire incrémentale (sommes cumulées) sur les impulsions du
+    TRListener : t = intercept + slope * volume. Sans impulsion, le modèle
+    vaut l'identité (intercept 0, pente = TR nominal).
+    """
+
+    def __init__(self, listener, tr_s, window=64):
+        """
+        Args:
+            listener (TRListener): Source des impulsions
+            tr_s (float): TR nominal (s), obligatoire
+            window (int): Nombre de volumes récents utilisés pour la régression
+        """
+        self.listener = listener
+        self.tr_s = float(tr_s)
+        self.window = int(window)
+        self.intercept = 0.0
+        self.slope = self.tr_s
+
+        self._consumed = 0
+        self._last_volume = -1
+        self._last_time = None
+        self._vols = np.zeros(self.window)
+        self._times = np.zeros(self.window)
+        self._n_fit = 0
+
+    def update(self):
+        """Intègre les nouvelles impulsions. Coût O(window) seulement s'il y en a."""
+        n = self.listener.n
+        if n == self._consumed:
+            return
+        for t in self.listener.times[self._consumed:n]:
+            if self._last_time is None:
+                vol = 0
+            else:
+                vol = self._last_volume + max(1, int(round((t - self._last_time) / self.slope)))
+            k = self._n_fit % self.window
+            self._vols[k] = vol
+            self._times[k] = t
+            self._n_fit += 1
+            self._last_volume, self._last_time = vol, t
+        self._consumed = n
+
+        m = min(self._n_fit, self.window)
+        if m >= 2:
+            v, t = self._vols[:m], self._times[:m]
+            v_mean, t_mean = v.mean(), t.mean()
+            var = np.sum((v - v_mean) ** 2)
+            if var > 0:
+                self.slope = float(np.sum((v - v_mean) * (t - t_mean)) / var)
+                self.intercept = float(t_mean - self.slope * v_mean)
+        elif m == 1:
+            self.intercept = float(self._times[0] - self.slope * self._vols[0])
+
+    def to_task_time(self, planned_s):
+        """Temps scanner nominal (volumes x TR nominal) -> temps task_clock corrigé."""
+        self.update()
+        return self.intercept + self.slope * (planned_s / self.tr_s)
+
+    def to_planned(self, task_t):
+        """Inverse de to_task_time : temps task_clock -> temps scanner nominal."""
+        self.update()
+        return (task_t - self.intercept) / self.slope * self.tr_s